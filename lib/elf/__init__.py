@@ -20,4 +20,142 @@ class File(ptypes.pstruct.type, base.ElfXX_File):
         (__e_data, 'e_data'),
     ]
 
+    ## symbol resolution
+    __cache = None  # (.value, sections, {index : table})
+
+    def __state(self):
+        value, res = self.value, self.__cache
+        if res is None or res[0] is not value:
+            e_ident = self['e_ident'].li
+            sections = [(n['sh_type'].int(), n['sh_offset'].int(), n['sh_size'].int(), n['sh_link'].int(), n['sh_entsize'].int()) for n in self['e_data'].li['e_shoff'].d.li]
+            res = self.__cache = value, (e_ident['EI_DATA'].order(), e_ident['EI_CLASS'].int()), sections, {}
+        return res[1:]
+
+    def __section(self, index, types, method):
+        _, sections, _ = self.__state()
+        if not (0 <= index < len(sections)):
+            raise ptypes.error.NotFoundError(self, method, message='section {:d} is not within the section header table'.format(index))
+        type, offset, size, link, entsize = sections[index]
+        if type not in types:
+            raise ptypes.error.TypeError(self, method, message='section {:d} is of an unexpected type ({:#x})'.format(index, type))
+        if type == section.SHT_NOBITS.type:
+            return '', link, entsize
+        self.source.seek(self.getoffset() + offset)
+        return self.source.consume(size), link, entsize
+
+    def invalidate(self):
+        '''Discard the string and symbol tables and the address index that were cached by the file.'''
+        self.__cache = self.__layout = None
+
+    def strings(self, index):
+        '''Return the SHT_STRTAB section at `index` as a section.StringTable that is only read once.'''
+        _, _, tables = self.__state()
+        key = section.SHT_STRTAB.type, index
+        if key not in tables:
+            data, _, _ = self.__section(index, {section.SHT_STRTAB.type}, 'File.strings')
+            tables[key] = section.StringTable(data)
+        return tables[key]
+
+    def symbols(self, index):
+        '''Return the SHT_SYMTAB or SHT_DYNSYM section at `index` as a section.SymbolTable that is only read once.'''
+        (order, cls), sections, tables = self.__state()
+        key = section.SHT_SYMTAB.type, index
+        if key in tables:
+            return tables[key]
+
+        data, link, entsize = self.__section(index, {section.SHT_SYMTAB.type, section.SHT_DYNSYM.type}, 'File.symbols')
+        res = section.SymbolTable(data, self.strings(link), order, cls, entsize)
+
+        # attach the hash tables that index this symbol table, preferring SHT_GNU_HASH
+        for i, (type, _, _, link, _) in enumerate(sections):
+            if link == index and type == section.SHT_GNU_HASH.type:
+                res.hashes.insert(0, section.GnuHashTable(self.__section(i, {type}, 'File.symbols')[0], order, cls))
+            elif link == index and type == section.SHT_HASH.type:
+                res.hashes.append(section.HashTable(self.__section(i, {type}, 'File.symbols')[0], order))
+            continue
+        tables[key] = res
+        return res
+
+    def symboltables(self):
+        '''Return the indices of each SHT_DYNSYM and SHT_SYMTAB section, starting with the dynamic ones.'''
+        _, sections, _ = self.__state()
+        res = [i for i, (type, _, _, _, _) in enumerate(sections) if type == section.SHT_DYNSYM.type]
+        return res + [i for i, (type, _, _, _, _) in enumerate(sections) if type == section.SHT_SYMTAB.type]
+
+    def symbol(self, name, index=None):
+        '''Return the section.Symbol named `name` from the symbol table at `index`, or from any of them.'''
+        for i in self.symboltables() if index is None else [index]:
+            try:
+                return self.symbols(i).lookup(name)
+            except KeyError:
+                pass
+            continue
+        raise ptypes.error.NotFoundError(self, 'File.symbol', message='unable to locate symbol {!r}'.format(name))
+
+    ## address translation
+    __layout = None # (.value, segments by address, segments by offset, sections by address, sections by offset)
+
+    def __intervals(self):
+        value, res = self.value, self.__layout
+        if res is None or res[0] is not value:
+            e_data = self['e_data'].li
+            phdrs = [n for n in e_data['e_phoff'].d.li if n['p_type'].int() == segment.PT_LOAD.type]
+            shdrs = [n for n in e_data['e_shoff'].d.li if n['sh_flags']['SHF_ALLOC']]
+            res = self.__layout = value, \
+                ptypes.utils.intervals((n['p_vaddr'].int(), n['p_vaddr'].int() + n['p_memsz'].int(), n) for n in phdrs), \
+                ptypes.utils.intervals((n['p_offset'].int(), n['p_offset'].int() + n['p_filesz'].int(), n) for n in phdrs), \
+                ptypes.utils.intervals((n['sh_addr'].int(), n['sh_addr'].int() + n['sh_size'].int(), n) for n in shdrs), \
+                ptypes.utils.intervals((n['sh_offset'].int(), n['sh_offset'].int() + n['sh_size'].int(), n) for n in shdrs if n['sh_type'].int() != section.SHT_NOBITS.type)
+        return res[1:]
+
+    def __lookup(self, index, key, method, description):
+        try:
+            return index.get(key)
+        except KeyError:
+            pass
+        raise ptypes.error.NotFoundError(self, method, message='{:s} {:#x} is not within a known {:s}'.format(description, key, 'segment' if 'segment' in method else 'section'))
+
+    def getsegmentbyaddress(self, address):
+        '''Return the PT_LOAD program header that contains the virtual `address`.'''
+        index, _, _, _ = self.__intervals()
+        return self.__lookup(index, address, 'File.getsegmentbyaddress', 'address')
+
+    def getsegmentbyoffset(self, offset):
+        '''Return the PT_LOAD program header that contains the file `offset`.'''
+        _, index, _, _ = self.__intervals()
+        return self.__lookup(index, offset, 'File.getsegmentbyoffset', 'offset')
+
+    def getsectionbyaddress(self, address):
+        '''Return the SHF_ALLOC section header that contains the virtual `address`.'''
+        _, _, index, _ = self.__intervals()
+        return self.__lookup(index, address, 'File.getsectionbyaddress', 'address')
+
+    def getsectionbyoffset(self, offset):
+        '''Return the SHF_ALLOC section header that contains the file `offset`.'''
+        _, _, _, index = self.__intervals()
+        return self.__lookup(index, offset, 'File.getsectionbyoffset', 'offset')
+
+    def getsegmentsbyaddress(self, address, size):
+        '''Return each PT_LOAD program header that overlaps the virtual range at `address` of `size` bytes.'''
+        index, _, _, _ = self.__intervals()
+        return index.overlaps(address, address + size)
+
+    def getsectionsbyaddress(self, address, size):
+        '''Return each SHF_ALLOC section header that overlaps the virtual range at `address` of `size` bytes.'''
+        _, _, index, _ = self.__intervals()
+        return index.overlaps(address, address + size)
+
+    def getoffsetbyaddress(self, address):
+        '''Translate the virtual `address` into its offset within the file.'''
+        phdr = self.getsegmentbyaddress(address)
+        res = address - phdr['p_vaddr'].int()
+        if res >= phdr['p_filesz'].int():
+            raise ptypes.error.NotFoundError(self, 'File.getoffsetbyaddress', message='address {:#x} is not backed by the file'.format(address))
+        return phdr['p_offset'].int() + res
+
+    def getaddressbyoffset(self, offset):
+        '''Translate the file `offset` into the virtual address that it is loaded at.'''
+        phdr = self.getsegmentbyoffset(offset)
+        return phdr['p_vaddr'].int() + offset - phdr['p_offset'].int()
+
 from . import header,segment,section,dynamic
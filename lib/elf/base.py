@@ -23,34 +23,127 @@ class ElfXX_Off(ptype.rpointer_t):
         type = self._object_.__name__
         return '%s<%s>'%(self.typename(), type)
 
-class ULEB128(pbinary.terminatedarray):
-    class septet(pbinary.struct):
-        _fields_ = [
-            (1, 'more'),
-            (7, 'value'),
-        ]
-    _object_ = septet
-    def isTerminator(self, value):
-        return not bool(value['more'])
+class LEB128(ptype.type):
+    """
+    A little-endian base-128 integer that is decoded directly from its bytes.
 
-    def int(self): return self.get()
-    def get(self):
-        res = 0
-        for n in reversed(self):
-            res = (res << 7) | n['value']
-        return res
-    def set(self, value):
-        result = []
-        while value > 0:
-            result.append( self.new(self.septet).set((1, value & (2**7-1))) )
-            value /= 2**7
-        result[-1].set(more=0)
-        self.value[:] = result[:]
+    Its size is only known once it has been read, so asking for the blocksize
+    of an uninitialized instance will load it from its source. This lets it be
+    used as a field of a pstruct.type or an element of a parray.type.
+
+    The classmethods `decode` and `iterate` can be used to decode integers from
+    a string without creating an instance for each one.
+    """
+    signed = False
+    readahead = 0x10    # number of bytes to read at a time while looking for the last byte
+
+    def load(self, **attrs):
+        with ptypes.utils.assign(self, **attrs):
+            try:
+                self.__deserialize_block__(self.__consume())
+            except StopIteration, e:
+                raise ptypes.error.LoadError(self, consumed=len(self.value), exception=e)
         return self
 
+    def __consume(self):
+        '''Read from the source until the byte without the continuation bit has been read.'''
+        res, ofs, amount = bytearray(), self.getoffset(), self.readahead
+        while not any(byte & 0x80 == 0 for byte in res):
+            self.source.seek(ofs + len(res))
+            try:
+                data = self.source.consume(amount)
+
+            # the source might not be able to read ahead that far, so fall back to single bytes
+            except ptypes.error.ProviderError:
+                if amount == 1:
+                    break
+                amount = 1
+                continue
+
+            res += data
+            if len(data) < amount:
+                break
+            continue
+        return str(res)
+
+    def __deserialize_block__(self, block):
+        data = bytearray(block)
+        index = next((i for i, byte in enumerate(data) if not byte & 0x80), None)
+        if index is None:
+            self.value = str(data)
+            raise StopIteration(self.name(), len(data))
+        self.value = str(data[:index + 1])
+        return self
+
+    def blocksize(self):
+        return len(self.value) if self.value is not None else len(self.load().value)
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        '''Return the integer encoded at `offset` of the string `data` along with the offset that follows it.'''
+        data = data if isinstance(data, bytearray) else bytearray(data)
+        res = shift = 0
+        start, size = offset, len(data)
+        while True:
+            if offset >= size:
+                raise ptypes.error.ConsumeError(cls, start, offset - start + 1, offset - start)
+            byte = data[offset]
+            res, shift, offset = res | (byte & 0x7f) << shift, shift + 7, offset + 1
+            if not byte & 0x80:
+                break
+            continue
+        if cls.signed and res & (1 << (shift - 1)):
+            res -= 1 << shift
+        return res, offset
+
+    @classmethod
+    def iterate(cls, data, offset=0, count=None):
+        '''Yield up to `count` consecutive integers encoded in the string `data` starting at `offset`.'''
+        data = data if isinstance(data, bytearray) else bytearray(data)
+        signed, size = cls.signed, len(data)
+        while offset < size and count != 0:
+            res = shift = 0
+            start = offset
+            while True:
+                if offset >= size:
+                    raise ptypes.error.ConsumeError(cls, start, offset - start + 1, offset - start)
+                byte = data[offset]
+                res, shift, offset = res | (byte & 0x7f) << shift, shift + 7, offset + 1
+                if not byte & 0x80:
+                    break
+                continue
+            if signed and res & (1 << (shift - 1)):
+                res -= 1 << shift
+            yield res
+            count = None if count is None else count - 1
+        return
+
+    def __getvalue__(self):
+        if self.value is None:
+            raise ptypes.error.InitializationError(self, 'int')
+        res, _ = self.decode(self.value)
+        return res
+
+    def __setvalue__(self, integer):
+        res = bytearray()
+        while True:
+            byte, integer = integer & 0x7f, integer >> 7
+            if (integer == -1 and byte & 0x40) or (integer == 0 and not byte & 0x40) if self.signed else integer == 0:
+                res.append(byte)
+                break
+            res.append(byte | 0x80)
+        return super(LEB128, self).__setvalue__(str(res))
+
+    def get(self):
+        return self.__getvalue__()
+    int = num = number = __int__ = get
+
     def summary(self):
         res = self.int()
-        return '{:s} : {:d} : ({:#x}, {:d})'.format(self.__element__(), res, res, 7*len(self))
+        return '{:#x} ({:d}) : {:d} byte{:s}'.format(res, res, self.size(), '' if self.size() == 1 else 's')
+
+class ULEB128(LEB128): signed = False
+class SLEB128(LEB128): signed = True
 
 class ElfXX_File(ptype.boundary): pass
 class ElfXX_Header(ptype.boundary): pass
@@ -152,3 +245,60 @@ class e_version(pint.enum, Elf32_Word):
         ('EV_CURRENT',1),
     ]
 
+
+if __name__ == '__main__':
+    class Result(Exception): pass
+    class Success(Result): pass
+    class Failure(Result): pass
+
+    TestCaseList = []
+    def TestCase(fn):
+        def harness(**kwds):
+            name = fn.__name__
+            try:
+                res = fn(**kwds)
+                raise Failure
+            except Success,e:
+                print '%s: %r'% (name,e)
+                return True
+            except Failure,e:
+                print '%s: %r'% (name,e)
+            except Exception,e:
+                print '%s: %r : %r'% (name,Failure(), e)
+            return False
+        TestCaseList.append(harness)
+        return fn
+
+if __name__ == '__main__':
+    from ptypes import prov,error
+
+    @TestCase
+    def test_leb128_struct():
+        class t(pstruct.type):
+            _fields_ = [(ULEB128,'a'), (pint.uint8_t,'b')]
+        x = t(source=prov.string('\xe5\x8e\x26\x41')).l
+        if x['a'].int() == 624485 and x['b'].int() == 0x41 and x.size() == 4:
+            raise Success
+
+    @TestCase
+    def test_leb128_array():
+        x = dyn.array(SLEB128, 3)(source=prov.string('\xe5\x8e\x26\x7f\x80\x7f')).l
+        if [n.int() for n in x] == [624485, -1, -128]:
+            raise Success
+
+    @TestCase
+    def test_leb128_truncated():
+        class t(pstruct.type):
+            _fields_ = [(pint.uint8_t,'a'), (ULEB128,'b')]
+        try:
+            t(source=prov.string('\x00\xe5\x8e')).l
+        except error.LoadError:
+            raise Success
+
+if __name__ == '__main__':
+    import logging
+    ptypes.config.defaults.log.setLevel(logging.DEBUG)
+
+    results = []
+    for t in TestCaseList:
+        results.append( t() )
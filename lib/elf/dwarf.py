@@ -1,4 +1,7 @@
+import struct, bisect, collections
+import ptypes
 from ptypes import *
+from .base import LEB128, ULEB128, SLEB128
 
 class sbyte(pint.sint8_t): pass
 class ubyte(pint.uint8_t): pass
@@ -7,39 +10,102 @@ class uword(pint.uint32_t): pass
 
 ## page 176
 
+######################
+class DW_UT(pint.enum, ubyte):
+    _values_ = [
+        ('DW_UT_compile', 0x01),
+        ('DW_UT_type', 0x02),
+        ('DW_UT_partial', 0x03),
+        ('DW_UT_skeleton', 0x04),
+        ('DW_UT_split_compile', 0x05),
+        ('DW_UT_split_type', 0x06),
+    ]
 
-class LEB128(pbinary.terminatedarray):
-    def isTerminator(self, value):
-        return value['continue'].int() == 0
+class unit_length(pstruct.type):
+    _fields_ = [
+        (uword, 'length'),
+        (lambda s: pint.uint64_t if s['length'].li.int() == 0xffffffff else pint.uint_t, 'length64'),
+    ]
+    def int(self):
+        return self['length64'].int() if self.offsetsize() == 8 else self['length'].int()
+    def offsetsize(self):
+        return 8 if self['length'].int() == 0xffffffff else 4
+    def summary(self):
+        res = self.int()
+        return '{:#x} ({:d}-bit)'.format(res, 8 * self.offsetsize())
 
-class ULEB128(LEB128):
-    class _object_(pbinary.struct):
-        _fields_ = [(1,'continue'),(7,'integer')]
+class unit_offset(pint.uint_t):
+    def blocksize(self):
+        try:
+            return self.getparent(compilation_unit_header)['unit_length'].li.offsetsize()
+        except ptypes.error.NotFoundError:
+            return 4
 
-class SLEB128(LEB128):
-    class _object_(pbinary.struct):
-        _fields_ = [(1,'continue'),(-7,'integer')]
-######################
-class debugging_information_entry(ptype.type):
-    pass
+class unit_header(ptype.definition):
+    cache = {}
 
-# page 143
-class compilation_unit_header(debugging_information_entry):
+@unit_header.define(type=2)
+@unit_header.define(type=3)
+@unit_header.define
+class unit_header_v4(pstruct.type):
+    type = 4
     _fields_ = [
-        (pint.uint32_t or [pint.uint32_t, pint.uint64_t], 'unit_length'),
-        (uhalf, 'version')
-        (pint.uint32_t, 'debug_abbrev_offset'),
+        (unit_offset, 'debug_abbrev_offset'),
         (ubyte, 'address_size'),
     ]
 
-class type_unit_header(debugging_information_entry):
+@unit_header.define
+class unit_header_v5(pstruct.type):
+    type = 5
+    def __unit(self):
+        res = self['unit_type'].li
+        if res['DW_UT_type'] or res['DW_UT_split_type']:
+            return type_unit
+        elif res['DW_UT_skeleton'] or res['DW_UT_split_compile']:
+            return skeleton_unit
+        return ptype.undefined
+
+    class type_unit(pstruct.type):
+        _fields_ = [
+            (pint.uint64_t, 'type_signature'),
+            (unit_offset, 'type_offset'),
+        ]
+    class skeleton_unit(pstruct.type):
+        _fields_ = [
+            (pint.uint64_t, 'dwo_id'),
+        ]
+
     _fields_ = [
-        (pint.uint32_t or [pint.uint32_t, pint.uint64_t], 'unit_length'),
-        (uhalf, 'version')
-        (pint.uint32_t, 'debug_abbrev_offset'),
+        (DW_UT, 'unit_type'),
         (ubyte, 'address_size'),
+        (unit_offset, 'debug_abbrev_offset'),
+        (__unit, 'unit'),
+    ]
+type_unit, skeleton_unit = unit_header_v5.type_unit, unit_header_v5.skeleton_unit
+
+# page 143
+class compilation_unit_header(pstruct.type):
+    _fields_ = [
+        (unit_length, 'unit_length'),
+        (uhalf, 'version'),
+        (lambda s: unit_header.lookup(s['version'].li.int()), 'header'),
+    ]
+
+    def offsetsize(self):
+        return self['unit_length'].offsetsize()
+    def addresssize(self):
+        return self['header']['address_size'].int()
+    def abbreviations(self):
+        '''Return the offset of the unit's abbreviations within the .debug_abbrev section.'''
+        return self['header']['debug_abbrev_offset'].int()
+    def unitsize(self):
+        '''Return the number of bytes occupied by the unit including its length.'''
+        return self['unit_length'].size() + self['unit_length'].int()
+
+class type_unit_header(compilation_unit_header):
+    _fields_ = compilation_unit_header._fields_ + [
         (pint.uint64_t, 'type_signature'),
-        (pint.uint32_t or pint.uint64_t, 'type_offset'),
+        (unit_offset, 'type_offset'),
     ]
 
 ###################################
@@ -116,7 +182,7 @@ DW_LNS_set_isa = 0x0c
 DW_LNE_end_sequence = 0x01
 DW_LNE_set_address = 0x02
 DW_LNE_define_file = 0x03
-DW_LNE_set_discriminator  = 0x04
+DW_LNE_set_discriminator = 0x04
 DW_LNE_lo_user = 0x80
 DW_LNE_hi_user = 0xff
 '''
@@ -163,24 +229,24 @@ DW_ID_case_insensitive = 0x03
 '''
 DW_LANG_C89 = 0x0001	0
 DW_LANG_C = 0x0002	0
-DW_LANG_Ada83  = 0x0003	1
+DW_LANG_Ada83 = 0x0003	1
 DW_LANG_C_plus_plus = 0x0004	0
-DW_LANG_Cobol74  = 0x0005	1
-DW_LANG_Cobol85  = 0x0006	1
+DW_LANG_Cobol74 = 0x0005	1
+DW_LANG_Cobol85 = 0x0006	1
 DW_LANG_Fortran77 = 0x0007	1
 DW_LANG_Fortran90 = 0x0008	1
 DW_LANG_Pascal83 = 0x0009	1
 DW_LANG_Modula2 = 0x000a	1
 DW_LANG_Java = 0x000b	0
 DW_LANG_C99 = 0x000c	0
-DW_LANG_Ada95  = 0x000d	1
+DW_LANG_Ada95 = 0x000d	1
 DW_LANG_Fortran95 = 0x000e	1
-DW_LANG_PLI  = 0x000f	1
+DW_LANG_PLI = 0x000f	1
 DW_LANG_ObjC = 0x0010	0
 DW_LANG_ObjC_plus_plus = 0x0011	0
 DW_LANG_UPC = 0x0012	0
 DW_LANG_D = 0x0013	0
-DW_LANG_Python  = 0x0014	0
+DW_LANG_Python = 0x0014	0
 DW_LANG_lo_user = 0x8000	
 DW_LANG_hi_user = 0xffff	
 '''
@@ -215,11 +281,13 @@ DW_END_hi_user = 0xff
 '''
 
 #DW_at_decimal_sign
-DW_DS_unsigned 0x01
-DW_DS_leading_overpunch 0x02
-DW_DS_trailing_overpunch 0x03
-DW_DS_leading_separate 0x04
-DW_DS_trailing_separate 0x05
+'''
+DW_DS_unsigned = 0x01
+DW_DS_leading_overpunch = 0x02
+DW_DS_trailing_overpunch = 0x03
+DW_DS_leading_separate = 0x04
+DW_DS_trailing_separate = 0x05
+'''
 
 
 #DW_AT_encoding
@@ -239,7 +307,7 @@ DW_ATE_edited = 0x0c
 DW_ATE_signed_fixed = 0x0d
 DW_ATE_unsigned_fixed = 0x0e
 DW_ATE_decimal_float = 0x0f
-DW_ATE_UTF   = 0x10
+DW_ATE_UTF = 0x10
 DW_ATE_lo_user = 0x80
 DW_ATE_hi_user = 0xff
 '''
@@ -399,40 +467,63 @@ DW_OP_call_ref = 0x9a	1	4- or 8-byte offset of DIE
 DW_OP_form_tls_address = 0x9b	0	
 DW_OP_call_frame_cfa = 0x9c	0	
 DW_OP_bit_piece = 0x9d	2	ULEB128 size followed by ULEB128 offset
-DW_OP_implicit_value  = 0x9e	2	ULEB128 size followed by block of that size
-DW_OP_stack_value  = 0x9f	0	
+DW_OP_implicit_value = 0x9e	2	ULEB128 size followed by block of that size
+DW_OP_stack_value = 0x9f	0	
 DW_OP_lo_user = 0xe0		
 DW_OP_hi_user = 0xff		
 '''
 
 # attribute form encodings
-'''
-DW_FORM_addr = 0x01
-DW_FORM_block2 = 0x03
-DW_FORM_block4 = 0x04
-DW_FORM_data2 = 0x05
-DW_FORM_data4 = 0x06
-DW_FORM_data8 = 0x07
-DW_FORM_string = 0x08
-DW_FORM_block = 0x09
-DW_FORM_block1 = 0x0a
-DW_FORM_data1 = 0x0b
-DW_FORM_flag = 0x0c
-DW_FORM_sdata = 0x0d
-DW_FORM_strp = 0x0e
-DW_FORM_udata = 0x0f
-DW_FORM_ref_addr = 0x10
-DW_FORM_ref1 = 0x11
-DW_FORM_ref2 = 0x12
-DW_FORM_ref4 = 0x13
-DW_FORM_ref8 = 0x14
-DW_FORM_ref_udata = 0x15
-DW_FORM_indirect = 0x16
-DW_FORM_sec_offset  = 0x17
-DW_FORM_exprloc  = 0x18
-DW_FORM_flag_present  = 0x19
-DW_FORM_ref_sig8  = 0x20
-'''
+class DW_FORM(pint.enum):
+    _values_ = [
+        ('DW_FORM_addr', 0x01),
+        ('DW_FORM_block2', 0x03),
+        ('DW_FORM_block4', 0x04),
+        ('DW_FORM_data2', 0x05),
+        ('DW_FORM_data4', 0x06),
+        ('DW_FORM_data8', 0x07),
+        ('DW_FORM_string', 0x08),
+        ('DW_FORM_block', 0x09),
+        ('DW_FORM_block1', 0x0a),
+        ('DW_FORM_data1', 0x0b),
+        ('DW_FORM_flag', 0x0c),
+        ('DW_FORM_sdata', 0x0d),
+        ('DW_FORM_strp', 0x0e),
+        ('DW_FORM_udata', 0x0f),
+        ('DW_FORM_ref_addr', 0x10),
+        ('DW_FORM_ref1', 0x11),
+        ('DW_FORM_ref2', 0x12),
+        ('DW_FORM_ref4', 0x13),
+        ('DW_FORM_ref8', 0x14),
+        ('DW_FORM_ref_udata', 0x15),
+        ('DW_FORM_indirect', 0x16),
+        ('DW_FORM_sec_offset', 0x17),
+        ('DW_FORM_exprloc', 0x18),
+        ('DW_FORM_flag_present', 0x19),
+        ('DW_FORM_ref_sig8', 0x20),
+        ('DW_FORM_strx', 0x1a),
+        ('DW_FORM_addrx', 0x1b),
+        ('DW_FORM_ref_sup4', 0x1c),
+        ('DW_FORM_strp_sup', 0x1d),
+        ('DW_FORM_data16', 0x1e),
+        ('DW_FORM_line_strp', 0x1f),
+        ('DW_FORM_implicit_const', 0x21),
+        ('DW_FORM_loclistx', 0x22),
+        ('DW_FORM_rnglistx', 0x23),
+        ('DW_FORM_ref_sup8', 0x24),
+        ('DW_FORM_strx1', 0x25),
+        ('DW_FORM_strx2', 0x26),
+        ('DW_FORM_strx3', 0x27),
+        ('DW_FORM_strx4', 0x28),
+        ('DW_FORM_addrx1', 0x29),
+        ('DW_FORM_addrx2', 0x2a),
+        ('DW_FORM_addrx3', 0x2b),
+        ('DW_FORM_addrx4', 0x2c),
+        ('DW_FORM_GNU_addr_index', 0x1f01),
+        ('DW_FORM_GNU_str_index', 0x1f02),
+        ('DW_FORM_GNU_ref_alt', 0x1f20),
+        ('DW_FORM_GNU_strp_alt', 0x1f21),
+    ]
 
 # child determination
 '''
@@ -442,169 +533,589 @@ DW_CHILDREN_yes = 0x01
 
 
 # attribute names
-'''
-DW_AT_sibling = 0x01
-DW_AT_location = 0x02
-DW_AT_name = 0x03
-DW_AT_ordering = 0x09
-DW_AT_byte_size = 0x0b
-DW_AT_bit_offset = 0x0c
-DW_AT_bit_size = 0x0d
-DW_AT_stmt_list = 0x10
-DW_AT_low_pc = 0x11
-DW_AT_high_pc = 0x12
-DW_AT_language = 0x13
-DW_AT_discr = 0x15
-DW_AT_discr_value = 0x16
-DW_AT_visibility = 0x17
-DW_AT_import = 0x18
-DW_AT_string_length = 0x19
-DW_AT_common_reference = 0x1a
-DW_AT_comp_dir = 0x1b
-DW_AT_const_value = 0x1c
-DW_AT_containing_type = 0x1d
-DW_AT_default_value = 0x1e
-DW_AT_inline = 0x20
-DW_AT_is_optional = 0x21
-DW_AT_lower_bound = 0x22
-DW_AT_producer = 0x25
-DW_AT_prototyped = 0x27
-DW_AT_return_addr = 0x2a
-DW_AT_start_scope = 0x2c
-DW_AT_bit_stride = 0x2e
-DW_AT_upper_bound = 0x2f
-DW_AT_abstract_origin = 0x31
-DW_AT_accessibility = 0x32
-DW_AT_address_class = 0x33
-DW_AT_artificial = 0x34
-DW_AT_base_types = 0x35
-DW_AT_calling_convention = 0x36
-DW_AT_count = 0x37
-DW_AT_data_member_location = 0x38
-DW_AT_decl_column = 0x39
-DW_AT_decl_file = 0x3a
-DW_AT_decl_line = 0x3b
-DW_AT_declaration = 0x3c
-DW_AT_discr_list = 0x3d
-DW_AT_encoding = 0x3e
-DW_AT_external = 0x3f
-DW_AT_frame_base = 0x40
-DW_AT_friend = 0x41
-DW_AT_identifier_case = 0x42
-DW_AT_macro_info = 0x43
-DW_AT_namelist_item = 0x44
-DW_AT_priority = 0x45
-DW_AT_segment = 0x46
-DW_AT_specification = 0x47
-DW_AT_static_link = 0x48
-DW_AT_type = 0x49
-DW_AT_use_location = 0x4a
-DW_AT_variable_parameter = 0x4b
-DW_AT_virtuality = 0x4c
-DW_AT_vtable_elem_location = 0x4d
-DW_AT_allocated = 0x4e
-DW_AT_associated = 0x4f
-DW_AT_data_location = 0x50
-DW_AT_byte_stride = 0x51
-DW_AT_entry_pc = 0x52
-DW_AT_use_UTF8 = 0x53
-DW_AT_extension = 0x54
-DW_AT_ranges = 0x55
-DW_AT_trampoline = 0x56
-DW_AT_call_column = 0x57
-DW_AT_call_file = 0x58
-DW_AT_call_line = 0x59
-DW_AT_description = 0x5a
-DW_AT_binary_scale = 0x5b
-DW_AT_decimal_scale = 0x5c
-DW_AT_small = 0x5d
-DW_AT_decimal_sign = 0x5e
-DW_AT_digit_count = 0x5f
-DW_AT_picture_string = 0x60
-DW_AT_mutable = 0x61
-DW_AT_threads_scaled = 0x62
-DW_AT_explicit = 0x63
-DW_AT_object_pointer = 0x64
-DW_AT_endianity = 0x65
-DW_AT_elemental = 0x66
-DW_AT_pure = 0x67
-DW_AT_recursive = 0x68
-DW_AT_signature  = 0x69
-DW_AT_main_subprogram  = 0x6a
-DW_AT_data_bit_offset  = 0x6b
-DW_AT_const_expr  = 0x6c
-DW_AT_enum_class  = 0x6d
-DW_AT_linkage_name  = 0x6e
-DW_AT_lo_user = 0x2000
-DW_AT_hi_user = 0x3fff
-
-'''
+class DW_AT(pint.enum):
+    _values_ = [
+        ('DW_AT_sibling', 0x01),
+        ('DW_AT_location', 0x02),
+        ('DW_AT_name', 0x03),
+        ('DW_AT_ordering', 0x09),
+        ('DW_AT_byte_size', 0x0b),
+        ('DW_AT_bit_offset', 0x0c),
+        ('DW_AT_bit_size', 0x0d),
+        ('DW_AT_stmt_list', 0x10),
+        ('DW_AT_low_pc', 0x11),
+        ('DW_AT_high_pc', 0x12),
+        ('DW_AT_language', 0x13),
+        ('DW_AT_discr', 0x15),
+        ('DW_AT_discr_value', 0x16),
+        ('DW_AT_visibility', 0x17),
+        ('DW_AT_import', 0x18),
+        ('DW_AT_string_length', 0x19),
+        ('DW_AT_common_reference', 0x1a),
+        ('DW_AT_comp_dir', 0x1b),
+        ('DW_AT_const_value', 0x1c),
+        ('DW_AT_containing_type', 0x1d),
+        ('DW_AT_default_value', 0x1e),
+        ('DW_AT_inline', 0x20),
+        ('DW_AT_is_optional', 0x21),
+        ('DW_AT_lower_bound', 0x22),
+        ('DW_AT_producer', 0x25),
+        ('DW_AT_prototyped', 0x27),
+        ('DW_AT_return_addr', 0x2a),
+        ('DW_AT_start_scope', 0x2c),
+        ('DW_AT_bit_stride', 0x2e),
+        ('DW_AT_upper_bound', 0x2f),
+        ('DW_AT_abstract_origin', 0x31),
+        ('DW_AT_accessibility', 0x32),
+        ('DW_AT_address_class', 0x33),
+        ('DW_AT_artificial', 0x34),
+        ('DW_AT_base_types', 0x35),
+        ('DW_AT_calling_convention', 0x36),
+        ('DW_AT_count', 0x37),
+        ('DW_AT_data_member_location', 0x38),
+        ('DW_AT_decl_column', 0x39),
+        ('DW_AT_decl_file', 0x3a),
+        ('DW_AT_decl_line', 0x3b),
+        ('DW_AT_declaration', 0x3c),
+        ('DW_AT_discr_list', 0x3d),
+        ('DW_AT_encoding', 0x3e),
+        ('DW_AT_external', 0x3f),
+        ('DW_AT_frame_base', 0x40),
+        ('DW_AT_friend', 0x41),
+        ('DW_AT_identifier_case', 0x42),
+        ('DW_AT_macro_info', 0x43),
+        ('DW_AT_namelist_item', 0x44),
+        ('DW_AT_priority', 0x45),
+        ('DW_AT_segment', 0x46),
+        ('DW_AT_specification', 0x47),
+        ('DW_AT_static_link', 0x48),
+        ('DW_AT_type', 0x49),
+        ('DW_AT_use_location', 0x4a),
+        ('DW_AT_variable_parameter', 0x4b),
+        ('DW_AT_virtuality', 0x4c),
+        ('DW_AT_vtable_elem_location', 0x4d),
+        ('DW_AT_allocated', 0x4e),
+        ('DW_AT_associated', 0x4f),
+        ('DW_AT_data_location', 0x50),
+        ('DW_AT_byte_stride', 0x51),
+        ('DW_AT_entry_pc', 0x52),
+        ('DW_AT_use_UTF8', 0x53),
+        ('DW_AT_extension', 0x54),
+        ('DW_AT_ranges', 0x55),
+        ('DW_AT_trampoline', 0x56),
+        ('DW_AT_call_column', 0x57),
+        ('DW_AT_call_file', 0x58),
+        ('DW_AT_call_line', 0x59),
+        ('DW_AT_description', 0x5a),
+        ('DW_AT_binary_scale', 0x5b),
+        ('DW_AT_decimal_scale', 0x5c),
+        ('DW_AT_small', 0x5d),
+        ('DW_AT_decimal_sign', 0x5e),
+        ('DW_AT_digit_count', 0x5f),
+        ('DW_AT_picture_string', 0x60),
+        ('DW_AT_mutable', 0x61),
+        ('DW_AT_threads_scaled', 0x62),
+        ('DW_AT_explicit', 0x63),
+        ('DW_AT_object_pointer', 0x64),
+        ('DW_AT_endianity', 0x65),
+        ('DW_AT_elemental', 0x66),
+        ('DW_AT_pure', 0x67),
+        ('DW_AT_recursive', 0x68),
+        ('DW_AT_signature', 0x69),
+        ('DW_AT_main_subprogram', 0x6a),
+        ('DW_AT_data_bit_offset', 0x6b),
+        ('DW_AT_const_expr', 0x6c),
+        ('DW_AT_enum_class', 0x6d),
+        ('DW_AT_linkage_name', 0x6e),
+        ('DW_AT_string_length_bit_size', 0x6f),
+        ('DW_AT_string_length_byte_size', 0x70),
+        ('DW_AT_rank', 0x71),
+        ('DW_AT_str_offsets_base', 0x72),
+        ('DW_AT_addr_base', 0x73),
+        ('DW_AT_rnglists_base', 0x74),
+        ('DW_AT_dwo_name', 0x76),
+        ('DW_AT_reference', 0x77),
+        ('DW_AT_rvalue_reference', 0x78),
+        ('DW_AT_macros', 0x79),
+        ('DW_AT_call_all_calls', 0x7a),
+        ('DW_AT_call_all_source_calls', 0x7b),
+        ('DW_AT_call_all_tail_calls', 0x7c),
+        ('DW_AT_call_return_pc', 0x7d),
+        ('DW_AT_call_value', 0x7e),
+        ('DW_AT_call_origin', 0x7f),
+        ('DW_AT_call_parameter', 0x80),
+        ('DW_AT_call_pc', 0x81),
+        ('DW_AT_call_tail_call', 0x82),
+        ('DW_AT_call_target', 0x83),
+        ('DW_AT_call_target_clobbered', 0x84),
+        ('DW_AT_call_data_location', 0x85),
+        ('DW_AT_call_data_value', 0x86),
+        ('DW_AT_noreturn', 0x87),
+        ('DW_AT_alignment', 0x88),
+        ('DW_AT_export_symbols', 0x89),
+        ('DW_AT_deleted', 0x8a),
+        ('DW_AT_defaulted', 0x8b),
+        ('DW_AT_loclists_base', 0x8c),
+    ]
 
 # tag names
-'''
-DW_TAG_array_type = 0x01
-DW_TAG_class_type = 0x02
-DW_TAG_entry_point = 0x03
-DW_TAG_enumeration_type = 0x04
-DW_TAG_formal_parameter = 0x05
-DW_TAG_imported_declaration = 0x08
-DW_TAG_label = 0x0a
-DW_TAG_lexical_block = 0x0b
-DW_TAG_member = 0x0d
-DW_TAG_pointer_type = 0x0f
-DW_TAG_reference_type = 0x10
-DW_TAG_compile_unit = 0x11
-DW_TAG_string_type = 0x12
-DW_TAG_structure_type = 0x13
-DW_TAG_subroutine_type = 0x15
-DW_TAG_typedef = 0x16
-DW_TAG_union_type = 0x17
-DW_TAG_unspecified_parameters = 0x18
-DW_TAG_variant = 0x19
-DW_TAG_common_block = 0x1a
-DW_TAG_common_inclusion = 0x1b
-DW_TAG_inheritance = 0x1c
-DW_TAG_inlined_subroutine = 0x1d
-DW_TAG_module = 0x1e
-DW_TAG_ptr_to_member_type = 0x1f
-DW_TAG_set_type = 0x20
-DW_TAG_subrange_type = 0x21
-DW_TAG_with_stmt = 0x22
-DW_TAG_access_declaration = 0x23
-DW_TAG_base_type = 0x24
-DW_TAG_catch_block = 0x25
-DW_TAG_const_type = 0x26
-DW_TAG_constant = 0x27
-DW_TAG_enumerator = 0x28
-DW_TAG_file_type = 0x29
-DW_TAG_friend = 0x2a
-DW_TAG_namelist = 0x2b
-DW_TAG_namelist_item = 0x2c
-DW_TAG_packed_type = 0x2d
-DW_TAG_subprogram = 0x2e
-DW_TAG_template_type_parameter = 0x2f
-DW_TAG_template_value_parameter = 0x30
-DW_TAG_thrown_type = 0x31
-DW_TAG_try_block = 0x32
-DW_TAG_variant_part = 0x33
-DW_TAG_variable = 0x34
-DW_TAG_volatile_type = 0x35
-DW_TAG_dwarf_procedure = 0x36
-DW_TAG_restrict_type = 0x37
-DW_TAG_interface_type = 0x38
-DW_TAG_namespace = 0x39
-DW_TAG_imported_module = 0x3a
-DW_TAG_unspecified_type = 0x3b
-DW_TAG_partial_unit = 0x3c
-DW_TAG_imported_unit = 0x3d
-DW_TAG_condition = 0x3f
-DW_TAG_shared_type = 0x40
-DW_TAG_type_unit  = 0x41
-DW_TAG_rvalue_reference_type  = 0x42
-DW_TAG_template_alias  = 0x43
-DW_TAG_lo_user = 0x4080
-DW_TAG_hi_user = 0xffff
-'''
+class DW_TAG(pint.enum):
+    _values_ = [
+        ('DW_TAG_array_type', 0x01),
+        ('DW_TAG_class_type', 0x02),
+        ('DW_TAG_entry_point', 0x03),
+        ('DW_TAG_enumeration_type', 0x04),
+        ('DW_TAG_formal_parameter', 0x05),
+        ('DW_TAG_imported_declaration', 0x08),
+        ('DW_TAG_label', 0x0a),
+        ('DW_TAG_lexical_block', 0x0b),
+        ('DW_TAG_member', 0x0d),
+        ('DW_TAG_pointer_type', 0x0f),
+        ('DW_TAG_reference_type', 0x10),
+        ('DW_TAG_compile_unit', 0x11),
+        ('DW_TAG_string_type', 0x12),
+        ('DW_TAG_structure_type', 0x13),
+        ('DW_TAG_subroutine_type', 0x15),
+        ('DW_TAG_typedef', 0x16),
+        ('DW_TAG_union_type', 0x17),
+        ('DW_TAG_unspecified_parameters', 0x18),
+        ('DW_TAG_variant', 0x19),
+        ('DW_TAG_common_block', 0x1a),
+        ('DW_TAG_common_inclusion', 0x1b),
+        ('DW_TAG_inheritance', 0x1c),
+        ('DW_TAG_inlined_subroutine', 0x1d),
+        ('DW_TAG_module', 0x1e),
+        ('DW_TAG_ptr_to_member_type', 0x1f),
+        ('DW_TAG_set_type', 0x20),
+        ('DW_TAG_subrange_type', 0x21),
+        ('DW_TAG_with_stmt', 0x22),
+        ('DW_TAG_access_declaration', 0x23),
+        ('DW_TAG_base_type', 0x24),
+        ('DW_TAG_catch_block', 0x25),
+        ('DW_TAG_const_type', 0x26),
+        ('DW_TAG_constant', 0x27),
+        ('DW_TAG_enumerator', 0x28),
+        ('DW_TAG_file_type', 0x29),
+        ('DW_TAG_friend', 0x2a),
+        ('DW_TAG_namelist', 0x2b),
+        ('DW_TAG_namelist_item', 0x2c),
+        ('DW_TAG_packed_type', 0x2d),
+        ('DW_TAG_subprogram', 0x2e),
+        ('DW_TAG_template_type_parameter', 0x2f),
+        ('DW_TAG_template_value_parameter', 0x30),
+        ('DW_TAG_thrown_type', 0x31),
+        ('DW_TAG_try_block', 0x32),
+        ('DW_TAG_variant_part', 0x33),
+        ('DW_TAG_variable', 0x34),
+        ('DW_TAG_volatile_type', 0x35),
+        ('DW_TAG_dwarf_procedure', 0x36),
+        ('DW_TAG_restrict_type', 0x37),
+        ('DW_TAG_interface_type', 0x38),
+        ('DW_TAG_namespace', 0x39),
+        ('DW_TAG_imported_module', 0x3a),
+        ('DW_TAG_unspecified_type', 0x3b),
+        ('DW_TAG_partial_unit', 0x3c),
+        ('DW_TAG_imported_unit', 0x3d),
+        ('DW_TAG_condition', 0x3f),
+        ('DW_TAG_shared_type', 0x40),
+        ('DW_TAG_type_unit', 0x41),
+        ('DW_TAG_rvalue_reference_type', 0x42),
+        ('DW_TAG_template_alias', 0x43),
+        ('DW_TAG_coarray_type', 0x44),
+        ('DW_TAG_generic_subrange', 0x45),
+        ('DW_TAG_dynamic_type', 0x46),
+        ('DW_TAG_atomic_type', 0x47),
+        ('DW_TAG_call_site', 0x48),
+        ('DW_TAG_call_site_parameter', 0x49),
+        ('DW_TAG_skeleton_unit', 0x4a),
+        ('DW_TAG_immutable_type', 0x4b),
+    ]
+
+### reading the debugging information entries of an elf.File
+Entry = collections.namedtuple('Entry', ['offset', 'depth', 'tag', 'children', 'attributes'])
+Function = collections.namedtuple('Function', ['low', 'high', 'name', 'offset'])
+
+class Abbreviation(object):
+    '''A declaration from .debug_abbrev that describes the tag and attribute forms of an entry.'''
+    def __init__(self, code, tag, children, attributes):
+        self.code, self.tag, self.children, self.attributes = code, tag, children, attributes
+
+    def __repr__(self):
+        attributes = ('{:s}:{:s}'.format(DW_AT.byvalue(at, '{:#x}'.format(at)), DW_FORM.byvalue(form, '{:#x}'.format(form))) for at, form, _ in self.attributes)
+        return '<{:s} {:d} {:s} children={!s} [{:s}]>'.format(self.__class__.__name__, self.code, DW_TAG.byvalue(self.tag, '{:#x}'.format(self.tag)), self.children, ', '.join(attributes))
+
+    @classmethod
+    def table(cls, data, offset=0):
+        """Parse the abbreviations at `offset` of the bytearray `data` into a dictionary keyed by their code.
+
+        If `data` ends before the table does, an IndexError is raised.
+        """
+        res, decode = {}, ULEB128.decode
+        while True:
+            code, offset = decode(data, offset)
+            if code == 0:
+                break
+            tag, offset = decode(data, offset)
+            children, offset = data[offset], offset + 1
+
+            attributes = []
+            while True:
+                attribute, offset = decode(data, offset)
+                form, offset = decode(data, offset)
+                if attribute == form == 0:
+                    break
+                value, offset = SLEB128.decode(data, offset) if form == DW_FORM_implicit_const else (None, offset)
+                attributes.append((attribute, form, value))
+            res[code] = cls(code, tag, bool(children), attributes)
+        return res
+
+class Forms(object):
+    """
+    The functions that decode each DW_FORM for units with the same version,
+    address size, offset size, and byteorder.
+
+    Each function takes the Unit, its data, and the offset of the attribute,
+    and returns the value along with the offset that follows it. References
+    within a unit are returned as offsets into .debug_info, and any strings or
+    indexed addresses are resolved through the unit.
+    """
+    def __init__(self, version, addresssize, offsetsize, order):
+        prefix = '<' if order is ptypes.config.byteorder.littleendian else '>'
+        integers = {1 : 'B', 2 : 'H', 4 : 'I', 8 : 'Q'}
+
+        def fixed(size):
+            unpack = struct.Struct(prefix + integers[size]).unpack_from
+            return lambda unit, data, offset: (unpack(data, offset)[0], offset + size)
+        def triple(unit, data, offset):
+            res = data[offset : offset + 3]
+            return reduce(lambda agg, by: agg * 0x100 + by, res if prefix == '>' else reversed(res), 0), offset + 3
+        def uleb(unit, data, offset):
+            return ULEB128.decode(data, offset)
+        def sleb(unit, data, offset):
+            return SLEB128.decode(data, offset)
+        def block(length):
+            def decode(unit, data, offset):
+                size, offset = length(unit, data, offset)
+                return str(data[offset : offset + size]), offset + size
+            return decode
+        def string(unit, data, offset):
+            res = data.find('\x00', offset)
+            if res < 0:
+                raise ptypes.error.ConsumeError(self, offset, len(data) - offset + 1, len(data) - offset)
+            return str(data[offset : res]), res + 1
+        def resolve(read, f):
+            def decode(unit, data, offset):
+                res, offset = read(unit, data, offset)
+                return f(unit, res), offset
+            return decode
+        def indirect(unit, data, offset):
+            form, offset = ULEB128.decode(data, offset)
+            return self.lookup[form](unit, data, offset)
+
+        address, section = fixed(addresssize), fixed(offsetsize)
+        reference = lambda read: resolve(read, lambda unit, res: unit.offset + res)
+        strp = lambda name: resolve(section, lambda unit, res: unit.info.string(name, res))
+        strx = lambda read: resolve(read, lambda unit, res: unit.strx(res))
+        addrx = lambda read: resolve(read, lambda unit, res: unit.addrx(res))
+
+        res = {
+            'DW_FORM_addr' : address, 'DW_FORM_flag' : fixed(1), 'DW_FORM_flag_present' : lambda unit, data, offset: (True, offset),
+            'DW_FORM_data1' : fixed(1), 'DW_FORM_data2' : fixed(2), 'DW_FORM_data4' : fixed(4), 'DW_FORM_data8' : fixed(8),
+            'DW_FORM_data16' : block(lambda unit, data, offset: (16, offset)),
+            'DW_FORM_sdata' : sleb, 'DW_FORM_udata' : uleb,
+            'DW_FORM_block1' : block(fixed(1)), 'DW_FORM_block2' : block(fixed(2)), 'DW_FORM_block4' : block(fixed(4)),
+            'DW_FORM_block' : block(uleb), 'DW_FORM_exprloc' : block(uleb),
+            'DW_FORM_string' : string, 'DW_FORM_strp' : strp('.debug_str'), 'DW_FORM_line_strp' : strp('.debug_line_str'),
+            'DW_FORM_strx' : strx(uleb), 'DW_FORM_strx1' : strx(fixed(1)), 'DW_FORM_strx2' : strx(fixed(2)), 'DW_FORM_strx3' : strx(triple), 'DW_FORM_strx4' : strx(fixed(4)),
+            'DW_FORM_addrx' : addrx(uleb), 'DW_FORM_addrx1' : addrx(fixed(1)), 'DW_FORM_addrx2' : addrx(fixed(2)), 'DW_FORM_addrx3' : addrx(triple), 'DW_FORM_addrx4' : addrx(fixed(4)),
+            'DW_FORM_ref1' : reference(fixed(1)), 'DW_FORM_ref2' : reference(fixed(2)), 'DW_FORM_ref4' : reference(fixed(4)), 'DW_FORM_ref8' : reference(fixed(8)),
+            'DW_FORM_ref_udata' : reference(uleb), 'DW_FORM_ref_addr' : address if version <= 2 else section, 'DW_FORM_ref_sig8' : fixed(8),
+            'DW_FORM_ref_sup4' : fixed(4), 'DW_FORM_ref_sup8' : fixed(8), 'DW_FORM_strp_sup' : section,
+            'DW_FORM_sec_offset' : section, 'DW_FORM_loclistx' : uleb, 'DW_FORM_rnglistx' : uleb,
+            'DW_FORM_indirect' : indirect,
+            'DW_FORM_GNU_addr_index' : addrx(uleb), 'DW_FORM_GNU_str_index' : strx(uleb), 'DW_FORM_GNU_ref_alt' : section, 'DW_FORM_GNU_strp_alt' : section,
+        }
+        self.lookup = {DW_FORM.byname(name) : f for name, f in res.items()}
+
+    def decoder(self, abbreviation):
+        """Return a (tag, children, [(attribute, function), ...], relative) tuple for decoding the entries of `abbreviation`.
+
+        If `relative` is true, then the DW_AT_high_pc of the entry is relative to its DW_AT_low_pc.
+        """
+        res, relative = [], False
+        for attribute, form, value in abbreviation.attributes:
+            if form == DW_FORM_implicit_const:
+                f = lambda unit, data, offset, value=value: (value, offset)
+            elif form in self.lookup:
+                f = self.lookup[form]
+            else:
+                raise ptypes.error.TypeError(self, 'Forms.decoder', message='unable to decode attribute {:#x} with an unknown form ({:#x})'.format(attribute, form))
+            res.append((attribute, f))
+            relative = relative or (attribute == DW_AT_high_pc and form in self.constants)
+        return abbreviation.tag, abbreviation.children, res, relative
+
+DW_FORM_implicit_const = DW_FORM.byname('DW_FORM_implicit_const')
+DW_AT_low_pc, DW_AT_high_pc = DW_AT.byname('DW_AT_low_pc'), DW_AT.byname('DW_AT_high_pc')
+Forms.constants = {DW_FORM.byname(name) for name in ['DW_FORM_data1', 'DW_FORM_data2', 'DW_FORM_data4', 'DW_FORM_data8', 'DW_FORM_sdata', 'DW_FORM_udata', 'DW_FORM_implicit_const']}
+
+class Unit(object):
+    """
+    A unit from .debug_info whose entries are decoded from its data as they are
+    iterated through.
+    """
+    def __init__(self, info, offset, header, data):
+        self.info, self.offset, self.header = info, offset, header
+        self.version, self.addresssize, self.offsetsize = header['version'].int(), header.addresssize(), header.offsetsize()
+        self.data, self.start = bytearray(data), header.size()
+        self.decoders = info.decoders(header.abbreviations(), self.version, self.addresssize, self.offsetsize)
+
+        # the bases used by the indexed forms are attributes of the first
+        # entry, so decode it without resolving them to find out what they are.
+        self.str_offsets_base = self.addr_base = None
+        for entry in self.entries():
+            attributes = entry.attributes
+            self.str_offsets_base = attributes.get(DW_AT.byname('DW_AT_str_offsets_base'), 2 * self.offsetsize)
+            self.addr_base = attributes.get(DW_AT.byname('DW_AT_addr_base'), 2 * self.offsetsize)
+            break
+        return
+
+    def __repr__(self):
+        return '<{:s} offset={:#x} size={:#x} version={:d}>'.format(self.__class__.__name__, self.offset, len(self.data), self.version)
+
+    def strx(self, index):
+        '''Return the string at `index` of the unit's contribution to .debug_str_offsets, or `index` if the base is not known yet.'''
+        if self.str_offsets_base is None:
+            return index
+        offset, = self.info.unpack('.debug_str_offsets', self.str_offsets_base + index * self.offsetsize, self.offsetsize)
+        return self.info.string('.debug_str', offset)
+
+    def addrx(self, index):
+        '''Return the address at `index` of the unit's contribution to .debug_addr, or `index` if the base is not known yet.'''
+        if self.addr_base is None:
+            return index
+        res, = self.info.unpack('.debug_addr', self.addr_base + index * self.addresssize, self.addresssize)
+        return res
+
+    def entries(self):
+        """Yield each Entry of the unit in the order that they are stored.
+
+        Each Entry contains its offset in .debug_info, its depth, tag, whether it
+        has children, and a dictionary of its attribute values keyed by the
+        DW_AT of each attribute. A DW_AT_high_pc is always an address.
+        """
+        data, decoders, decode = self.data, self.decoders, ULEB128.decode
+        offset, depth, size = self.start, 0, len(data)
+        while offset < size:
+            position, code = offset, data[offset]
+            code, offset = (code, offset + 1) if code < 0x80 else decode(data, offset)
+            if code == 0:
+                depth -= 1
+                continue
+
+            try:
+                tag, children, attributes, relative = decoders[code]
+            except KeyError:
+                raise ptypes.error.NotFoundError(self, 'Unit.entries', message='entry at {:#x} uses an undefined abbreviation ({:d})'.format(self.offset + position, code))
+
+            res = {}
+            for attribute, f in attributes:
+                res[attribute], offset = f(self, data, offset)
+            if relative and DW_AT_low_pc in res:
+                res[DW_AT_high_pc] += res[DW_AT_low_pc]
+            yield Entry(self.offset + position, depth, tag, children, res)
+            depth += 1 if children else 0
+        return
+
+class DebugInfo(object):
+    """
+    Reads the debugging information of an elf.File one unit at a time.
+
+    Sections are read through a ptypes.provider.cached so that only the most
+    recently used pages of the file are kept. Each table from .debug_abbrev is
+    parsed once and cached along with the functions that decode each of its
+    abbreviations, and up to `limit` strings that were read are memoized.
+    """
+    def __init__(self, file, pagesize=0x10000, maxpages=0x100, limit=0x10000):
+        e_ident = file['e_ident'].li
+        self.order, self.limit = e_ident['EI_DATA'].order(), limit
+        self.source = ptypes.provider.cached(file.source, pagesize=pagesize, maxpages=maxpages)
+        self.header = dyn.clone(compilation_unit_header, recurse=dict(byteorder=self.order))
+
+        self.sections = {}
+        for item in file['e_data'].li['e_shoff'].d.li:
+            name = item['sh_name'].str()
+            if name.startswith('.debug_'):
+                self.sections[name] = file.getoffset() + item['sh_offset'].int(), item['sh_size'].int()
+            continue
+
+        self.__abbreviations, self.__decoders, self.__forms, self.__strings = {}, {}, {}, {}
+
+    def read(self, name, offset, size):
+        '''Return up to `size` bytes from `offset` of the section named `name`.'''
+        if name not in self.sections:
+            raise ptypes.error.NotFoundError(self, 'DebugInfo.read', message='unable to locate section {!r}'.format(name))
+        base, length = self.sections[name]
+        if not (0 <= offset <= length):
+            raise ptypes.error.NotFoundError(self, 'DebugInfo.read', message='offset {:#x} is outside of section {!r} ({:#x})'.format(offset, name, length))
+        self.source.seek(base + offset)
+        return self.source.consume(min(size, length - offset))
+
+    def unpack(self, name, offset, *sizes):
+        '''Return the integers of each of the specified `sizes` from `offset` of the section named `name`.'''
+        format = ('<' if self.order is ptypes.config.byteorder.littleendian else '>') + str().join({1 : 'B', 2 : 'H', 4 : 'I', 8 : 'Q'}[size] for size in sizes)
+        return struct.unpack(format, self.read(name, offset, sum(sizes)))
+
+    def string(self, name, offset):
+        '''Return the string at `offset` of the section named `name`.'''
+        key = name, offset
+        if key in self.__strings:
+            return self.__strings[key]
+
+        res, size = '', 0x100
+        while True:
+            data = self.read(name, offset + len(res), size)
+            index = data.find('\x00')
+            if index >= 0 or len(data) < size:
+                res += data[:index] if index >= 0 else data
+                break
+            res, size = res + data, size * 2
+
+        if len(self.__strings) >= self.limit:
+            self.__strings.clear()
+        self.__strings[key] = res
+        return res
+
+    def abbreviations(self, offset):
+        '''Return the abbreviations at `offset` of .debug_abbrev as a dictionary keyed by their code.'''
+        if offset in self.__abbreviations:
+            return self.__abbreviations[offset]
+
+        size = 0x1000
+        while True:
+            data = bytearray(self.read('.debug_abbrev', offset, size))
+            try:
+                res = Abbreviation.table(data)
+            except IndexError:
+                if len(data) < size:
+                    raise ptypes.error.NotFoundError(self, 'DebugInfo.abbreviations', message='abbreviations at {:#x} are not terminated'.format(offset))
+                size *= 2
+                continue
+            break
+        self.__abbreviations[offset] = res
+        return res
+
+    def decoders(self, offset, version, addresssize, offsetsize):
+        '''Return the decoder of each abbreviation at `offset` of .debug_abbrev keyed by their code.'''
+        key = offset, version, addresssize, offsetsize
+        if key not in self.__decoders:
+            forms = self.__forms.setdefault(key[1:], Forms(version, addresssize, offsetsize, self.order))
+            self.__decoders[key] = {code : forms.decoder(item) for code, item in self.abbreviations(offset).items()}
+        return self.__decoders[key]
+
+    def invalidate(self):
+        '''Discard the abbreviations, decoders, and strings that were cached.'''
+        self.__abbreviations.clear(), self.__decoders.clear(), self.__strings.clear()
+
+    def units(self):
+        '''Yield each Unit in .debug_info, only reading it once it is reached.'''
+        if '.debug_info' not in self.sections:
+            return
+        base, size = self.sections['.debug_info']
+        offset = 0
+        while offset < size:
+            header = self.header(offset=base + offset, source=self.source).l
+            res = header.unitsize()
+            yield Unit(self, offset, header, self.read('.debug_info', offset, res))
+            offset += res
+        return
+
+    def entries(self):
+        '''Yield each Entry from every unit in .debug_info.'''
+        for unit in self.units():
+            for entry in unit.entries():
+                yield entry
+            continue
+        return
+
+    def functions(self):
+        """Yield a Function for each DW_TAG_subprogram that has a DW_AT_low_pc and DW_AT_high_pc.
+
+        A function without a name takes the name of the entry that its
+        DW_AT_abstract_origin or DW_AT_specification refers to when that
+        entry is in the same unit.
+        """
+        subprogram = DW_TAG.byname('DW_TAG_subprogram')
+        names = [DW_AT.byname('DW_AT_name'), DW_AT.byname('DW_AT_linkage_name')]
+        origins = [DW_AT.byname('DW_AT_abstract_origin'), DW_AT.byname('DW_AT_specification')]
+
+        for unit in self.units():
+            named, references, pending = {}, {}, []
+            for entry in unit.entries():
+                attributes = entry.attributes
+                name = next((attributes[at] for at in names if at in attributes), None)
+                if name is not None:
+                    named[entry.offset] = name
+                else:
+                    reference = next((attributes[at] for at in origins if at in attributes), None)
+                    if reference is not None:
+                        references[entry.offset] = reference
+
+                if entry.tag != subprogram or DW_AT_low_pc not in attributes or DW_AT_high_pc not in attributes:
+                    continue
+                low, high = attributes[DW_AT_low_pc], attributes[DW_AT_high_pc]
+                if high <= low:
+                    continue
+                elif name is None:
+                    pending.append(Function(low, high, None, entry.offset))
+                else:
+                    yield Function(low, high, name, entry.offset)
+                continue
+
+            # now that the unit is finished, name the functions that refer to another entry
+            for item in pending:
+                offset, seen = item.offset, set()
+                while offset in references and offset not in seen:
+                    seen.add(offset)
+                    offset = references[offset]
+                yield item._replace(name=named.get(offset))
+            continue
+        return
+
+    def index(self):
+        '''Return a FunctionIndex of every function in .debug_info.'''
+        return FunctionIndex(self.functions())
+
+class FunctionIndex(object):
+    """
+    Functions sorted by their lowest address so that the one containing an
+    address can be found by bisection.
+    """
+    def __init__(self, functions):
+        self.functions = sorted(functions)
+        self.starts = [item.low for item in self.functions]
+
+        # the highest address reached by any function up to each index
+        self.reach, res = [], 0
+        for item in self.functions:
+            res = max(res, item.high)
+            self.reach.append(res)
+        return
+
+    def __len__(self):
+        return len(self.functions)
+
+    def __iter__(self):
+        return iter(self.functions)
+
+    def lookup(self, address):
+        '''Return the innermost Function containing `address`, or raise a KeyError.'''
+        index = bisect.bisect_right(self.starts, address) - 1
+        while index >= 0 and self.reach[index] > address:
+            res = self.functions[index]
+            if address < res.high:
+                return res
+            index -= 1
+        raise KeyError(address)
 
 if __name__ == '__main__':
     import ptypes,dwarf
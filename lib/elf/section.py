@@ -11,10 +11,12 @@ class _sh_name(pint.type):
         return '{:s} : {!r}'.format(super(_sh_name, self).summary(), res)
 
     def str(self):
-        table = self.getparent(ElfXX_Ehdr).stringtable()
-        if isinstance(table, SHT_STRTAB):
-            return table.read(self.int()).str()
-        raise ptypes.error.TypeError(self, 'str')
+        index = self.getparent(ElfXX_Ehdr)['e_shstrndx'].int()
+        table = self.getparent(ElfXX_File).strings(index)
+        try:
+            return table[self.int()]
+        except IndexError:
+            raise ptypes.error.NotFoundError(self, 'str')
 
 class _sh_type(pint.enum):
     SHT_LOSUNW, SHT_HISUNW = 0x6ffffffa, 0x6fffffff
@@ -116,13 +118,11 @@ class _st_name(pint.type):
 
     def str(self):
         index = self.getparent(ElfXX_Shdr)['sh_link'].int()
-        res = self.getparent(ElfXX_Ehdr)['e_shoff'].d.li
-        if index >= len(res):
+        table = self.getparent(ElfXX_File).strings(index)
+        try:
+            return table[self.int()]
+        except IndexError:
             raise ptypes.error.NotFoundError(self, 'str')
-        table = res[index]['sh_offset'].d.li
-        if isinstance(table, SHT_STRTAB):
-            return table.read(self.int()).str()
-        raise ptypes.error.TypeError(self, 'str')
 
 class st_info(pbinary.struct):
     class st_bind(pbinary.enum):
@@ -315,6 +315,26 @@ class SHT_HASH(pstruct.type):
         (lambda s: dyn.array(Elf32_Word, s['nchain'].li.int()), 'chain'),
     ]
 
+@Type.define
+class SHT_GNU_HASH(pstruct.type):
+    type = 0x6ffffff6
+    def __bloom(self):
+        t = Elf64_Xword if isinstance(self.getparent(ElfXX_Shdr), Elf64_Shdr) else Elf32_Word
+        return dyn.array(t, self['bloom_size'].li.int())
+    def __chain(self):
+        res = sum(self[n].li.size() for n in ('nbuckets', 'symoffset', 'bloom_size', 'bloom_shift', 'bloom', 'buckets'))
+        return dyn.array(Elf32_Word, max(0, self.blocksize() - res) // 4)
+
+    _fields_ = [
+        (Elf32_Word, 'nbuckets'),
+        (Elf32_Word, 'symoffset'),
+        (Elf32_Word, 'bloom_size'),
+        (Elf32_Word, 'bloom_shift'),
+        (__bloom, 'bloom'),
+        (lambda s: dyn.array(Elf32_Word, s['nbuckets'].li.int()), 'buckets'),
+        (__chain, 'chain'),
+    ]
+
 from . import segment
 @Type.define
 class SHT_DYNAMIC(segment.PT_DYNAMIC):
@@ -510,3 +530,159 @@ class SHT_ARM_ATTRIBUTES(pstruct.type):
         (pint.uint8_t, 'version'),
         (__vendor, 'vendor'),
     ]
+
+### symbol resolution directly from the data of each section
+import struct, itertools, collections
+
+Symbol = collections.namedtuple('Symbol', ['index', 'name', 'value', 'size', 'info', 'other', 'shndx'])
+
+def elf_hash(name):
+    '''Return the SysV hash of `name` as used by an SHT_HASH section.'''
+    res = 0
+    for ch in bytearray(name):
+        res = (res << 4) + ch
+        g = res & 0xf0000000
+        res ^= g >> 24
+        res &= ~g
+    return res & 0xffffffff
+
+def gnu_hash(name):
+    '''Return the GNU hash of `name` as used by an SHT_GNU_HASH section.'''
+    res = 5381
+    for ch in bytearray(name):
+        res = (res * 33 + ch) & 0xffffffff
+    return res
+
+class StringTable(object):
+    '''The data of an SHT_STRTAB section with each string that was read cached by its offset.'''
+    def __init__(self, data):
+        self.data, self.cache = data, {}
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, offset):
+        try:
+            return self.cache[offset]
+        except KeyError:
+            pass
+        if not (0 <= offset < len(self.data)):
+            raise IndexError(offset)
+        end = self.data.find('\x00', offset)
+        res = self.cache[offset] = self.data[offset : None if end < 0 else end]
+        return res
+
+class SymbolTable(object):
+    '''
+    The data of an SHT_SYMTAB or SHT_DYNSYM section decoded with `struct` and
+    named using its linked StringTable.
+
+    A symbol is found by name with the SHT_GNU_HASH or SHT_HASH sections that
+    were attached to the table, and a dictionary of every name otherwise.
+    '''
+    formats = {
+        1 : ('IIIBBH', ('name', 'value', 'size', 'info', 'other', 'shndx')),
+        2 : ('IBBHQQ', ('name', 'info', 'other', 'shndx', 'value', 'size')),
+    }
+
+    def __init__(self, data, strings, order, cls, entsize=0):
+        format, fields = self.formats[cls]
+        self.codec = struct.Struct(('<' if order is ptypes.config.byteorder.littleendian else '>') + format)
+        self.entsize = entsize or self.codec.size
+        self.fields = tuple(fields.index(name) for name in Symbol._fields[2:])
+        self.data, self.strings = data, strings
+        self.hashes, self.names = [], None
+
+    def __len__(self):
+        return len(self.data) // self.entsize
+
+    def name(self, index):
+        '''Return the name of the symbol at `index`.'''
+        if not (0 <= index < len(self)):
+            raise IndexError(index)
+        offset, = struct.unpack_from(self.codec.format[0] + 'I', self.data, index * self.entsize)
+        return self.strings[offset]
+
+    def __getitem__(self, index):
+        if not (0 <= index < len(self)):
+            raise IndexError(index)
+        res = self.codec.unpack_from(self.data, index * self.entsize)
+        return Symbol(index, self.strings[res[0]], *(res[i] for i in self.fields))
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def lookup(self, name):
+        '''Return the Symbol named `name` or raise a KeyError if it is not found.'''
+        for table in self.hashes:
+            index = table.lookup(self, name)
+            if index is not None:
+                return self[index]
+            continue
+
+        # hash tables skip undefined symbols, so fall back to every name
+
+        if self.names is None:
+            res = self.names = {}
+            for index in xrange(len(self)):
+                res.setdefault(self.name(index), index)
+        return self[self.names[name]]
+
+class HashTable(object):
+    '''The data of an SHT_HASH section.'''
+    def __init__(self, data, order):
+        prefix = '<' if order is ptypes.config.byteorder.littleendian else '>'
+        nbucket, nchain = struct.unpack_from(prefix + 'II', data, 0)
+        self.bucket = struct.unpack_from('{:s}{:d}I'.format(prefix, nbucket), data, 8)
+        self.chain = struct.unpack_from('{:s}{:d}I'.format(prefix, nchain), data, 8 + 4 * nbucket)
+
+    def lookup(self, symbols, name):
+        '''Return the index of the symbol in `symbols` named `name`, or None.'''
+        if not self.bucket:
+            return None
+        index = self.bucket[elf_hash(name) % len(self.bucket)]
+        while 0 < index < len(self.chain):
+            if symbols.name(index) == name:
+                return index
+            index = self.chain[index]
+        return None
+
+class GnuHashTable(object):
+    '''The data of an SHT_GNU_HASH section.'''
+    def __init__(self, data, order, cls):
+        prefix = '<' if order is ptypes.config.byteorder.littleendian else '>'
+        nbuckets, self.symoffset, nbloom, self.shift = struct.unpack_from(prefix + '4I', data, 0)
+        word = 'I' if cls == 1 else 'Q'
+        self.bits = 8 * struct.calcsize(word)
+        self.bloom = struct.unpack_from('{:s}{:d}{:s}'.format(prefix, nbloom, word), data, 16)
+        offset = 16 + nbloom * struct.calcsize(word)
+        self.buckets = struct.unpack_from('{:s}{:d}I'.format(prefix, nbuckets), data, offset)
+        offset += 4 * nbuckets
+        self.chains = struct.unpack_from('{:s}{:d}I'.format(prefix, (len(data) - offset) // 4), data, offset)
+
+    def lookup(self, symbols, name):
+        '''Return the index of the symbol in `symbols` named `name`, or None.'''
+        if not (self.buckets and self.bloom):
+            return None
+        h = gnu_hash(name)
+
+        # check the bloom filter before walking the chain
+        word = self.bloom[(h // self.bits) % len(self.bloom)]
+        mask = (1 << (h % self.bits)) | (1 << ((h >> self.shift) % self.bits))
+        if word & mask != mask:
+            return None
+
+        index = self.buckets[h % len(self.buckets)]
+        if index < self.symoffset:
+            return None
+        for index in itertools.count(index):
+            i = index - self.symoffset
+            if i >= len(self.chains):
+                break
+            res = self.chains[i]
+            if res | 1 == h | 1 and symbols.name(index) == name:
+                return index
+            if res & 1:
+                break
+        return None
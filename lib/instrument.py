@@ -161,13 +161,7 @@ class instruction(object):
 ### tools for lifting
     def lift(self, address, length):
         '''return the bytes required in order to lift to code at /address/ along a valid instruction boundary'''
-        def producer(address, mm):
-            while True:
-                yield mm.read(address, 1)
-                address += 1
-            raise NotImplementedError("WTF")
-
-        consumeable = producer(address, self.memorymanager)
+        consumeable = self.memorymanager.iterate(address)
         lifted = ""
         while length > 0:
             instruction = ''.join(ia32.consume(consumeable))
@@ -0,0 +1,205 @@
+'''
+persistent cache of the segments, symbols, and relocations that were read into a store.
+
+a store is saved within a cache directory under the name of the file that it was read from,
+along with the size, inode, modification time, change time, and sha1 of that file. when the file
+is opened again, the store is restored from the cache if each of these match or if the file still
+has the same sha1, in which case the cache is updated with the new key. otherwise, the store is
+read from the file and the cache is replaced.
+
+this works for any store.base whose relocators were registered with `register`, and that can be
+recreated from the arguments returned by their __reduce__. a cache that names any other relocator
+is rejected, so that loading it can't call anything else. the coff stores can't use this, as
+linker.coff can't currently be imported.
+
+the cache is written with marshal and contains the following:
+    (VERSION, (size, inode, mtime, ctime, sha1), modulename, segments, records, offsets, relocators)
+
+    segments    -- [(segmentname, length, protection, data)]
+    records     -- [(value, [(module, symbolname, scope, segmentname)])] each of which is
+                    a group of symbolnames that alias the same value
+    offsets     -- {segmentname : [(module, symbolname, offset)]} for the symbols that are
+                    reloaded whenever the segment is moved
+    relocators  -- {segmentname : (tag, args)} for recreating the relocator returned by
+                    .getrelocator. the tag is the name that its class was registered with,
+                    and the relocator's __reduce__ provides its args.
+
+a restored store only contains data, so any hooks that were attached to its symbols by the
+original store are not restored.
+'''
+import os,hashlib,marshal,logging
+import store
+
+VERSION = 3
+SCOPES = (store.LocalScope, store.GlobalScope, store.ExternalScope)
+
+# relocator classes that can be restored from the cache, keyed by their tag
+RELOCATORS = {}
+
+def register(cls):
+    '''Register the relocator class cls so that it can be cached. This can be used as a decorator'''
+    RELOCATORS['.'.join((cls.__module__, cls.__name__))] = cls
+    return cls
+
+def key(path, previous=None):
+    '''Return the (size, inode, mtime, ctime, sha1) of the file at path. If the file is unchanged from the previous key, it is returned without calculating the sha1'''
+    st = os.stat(path)
+    result = st.st_size, st.st_ino, st.st_mtime, st.st_ctime
+    if previous is not None and result == tuple(previous[:-1]):
+        return previous
+
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(0x100000), ''):
+            sha.update(data)
+        pass
+    return result + (sha.hexdigest(),)
+
+def location(path, directory):
+    '''Return the path of the cache for the file at path'''
+    name = os.path.basename(path)
+    return os.path.join(directory, '{:s}.{:s}.cache'.format(name, hashlib.sha1(os.path.abspath(path)).hexdigest()[:16]))
+
+def snapshot(st):
+    '''Return a tuple containing the segments, symbols, and relocations of the store st which can be marshalled'''
+    scopes = dict((name, SCOPES.index(scope)) for scope in SCOPES for name in st.scope.get(scope, ()))
+    segments = dict((name, segmentname) for segmentname, names in st.scopesegment.iteritems() for name in names)
+
+    # group each symbolname by the record that it aliases
+    records, visited = [], set()
+    for name in st.iterkeys():
+        if name in visited or name[1] is store.BaseAddress:
+            continue
+        names = sorted(st.getaliases(name))
+        visited.update(names)
+        records.append((st[name], [(module, symbolname, scopes.get((module,symbolname), 0), segments.get((module,symbolname))) for module, symbolname in names]))
+
+    # the offset of each symbol is loaded by moving its segment, so restore them afterwards
+    segmentnames, offsets = st.listsegments(), {}
+    for segmentname in segmentnames:
+        offsets[segmentname] = [(module, symbolname, st[module,symbolname]) for module, symbolname in st.loadsymbols(segmentname)]
+        st[segmentname] = st[segmentname]
+
+    result, relocators = [], {}
+    for segmentname in segmentnames:
+        result.append((segmentname, st.getsegmentlength(segmentname), st.getsegmentprotection(segmentname), st.getsegment(segmentname)))
+        relocator = st.getrelocator(segmentname)
+        if relocator is not None:
+            cls, args = relocator.__reduce__()[:2]
+            tag = '.'.join((cls.__module__, cls.__name__))
+            if RELOCATORS.get(tag) is not cls:
+                raise ValueError('relocator {:s} for segment {!r} is not registered'.format(tag, segmentname))
+            relocators[segmentname] = tag, args
+        continue
+    return st.modulename, result, records, offsets, relocators
+
+class restored(store.base):
+    '''
+    A store that was restored from a snapshot of another store.
+    '''
+    def __init__(self, snapshot):
+        super(restored, self).__init__()
+        self.modulename, segments, records, self.__offsets, self.__relocators = snapshot
+        self.__segments = [segmentname for segmentname, _, _, _ in segments]
+        self.__segmentdata = dict((segmentname, (length, protection, data)) for segmentname, length, protection, data in segments)
+
+        for value, names in records:
+            (module, symbolname, scope, segmentname), aliases = names[0], names[1:]
+            self.add((module, symbolname), value, SCOPES[scope], segmentname)
+            for alias in aliases:
+                self.alias(alias[:2], (module, symbolname))
+                self.scope[SCOPES[alias[2]]].add(alias[:2])
+                self.scopesegment.setdefault(alias[3], set()).add(alias[:2])
+            continue
+        return
+
+    def listsegments(self):
+        return self.__segments[:]
+
+    def getsegment(self, name):
+        _, _, data = self.__segmentdata[name]
+        return data
+
+    def getsegmentlength(self, name):
+        length, _, _ = self.__segmentdata[name]
+        return length
+
+    def getsegmentprotection(self, name):
+        _, protection, _ = self.__segmentdata[name]
+        return protection
+
+    def loadsymbols(self, segmentname):
+        result = set()
+        for module, symbolname, offset in self.__offsets[segmentname]:
+            self[module, symbolname] = offset
+            result.add((module, symbolname))
+        return result
+
+    def getrelocator(self, name):
+        if name not in self.__relocators:
+            return None
+        tag, args = self.__relocators[name]
+        return RELOCATORS[tag](*args)
+
+    def relocatesegment(self, name, data):
+        relocator = self.getrelocator(name)
+        return data if relocator is None else relocator(data, self)
+
+def load(path, directory):
+    '''Return the store for the file at path from the cache in directory, or None if it is missing or out of date'''
+    filename = location(path, directory)
+    try:
+        with open(filename, 'rb') as f:
+            result = marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(result, tuple) or len(result) != 7 or result[0] != VERSION:
+        return None
+    previous, record = result[1], result[2:]
+
+    # only restore the relocators that were registered
+    relocators = record[-1]
+    if not isinstance(relocators, dict) or any(not isinstance(item, tuple) or len(item) != 2 or item[0] not in RELOCATORS or not isinstance(item[1], tuple) for item in relocators.itervalues()):
+        logging.warning('{:s} : ignoring cache {:s} for {:s} due to an unregistered relocator'.format(__name__, filename, path))
+        return None
+
+    current = key(path, previous)
+    if current[-1] != previous[-1]:
+        return None
+
+    # the file was touched without being modified, so update the key to avoid hashing it again
+    if current != previous:
+        write(filename, marshal.dumps((VERSION, current) + record))
+    return restored(record)
+
+def write(filename, data):
+    '''Write data to the cache at filename without ever leaving it partially written'''
+    directory = os.path.dirname(filename)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(filename + '.tmp', 'wb') as f:
+        f.write(data)
+    os.rename(filename + '.tmp', filename)
+
+def save(path, directory, st):
+    '''Write the store st that was read from the file at path into the cache in directory'''
+    filename = location(path, directory)
+    try:
+        data = marshal.dumps((VERSION, key(path)) + snapshot(st))
+    except ValueError, e:
+        logging.warning('{:s} : unable to cache {:s} : {!s}'.format(st.name(), path, e))
+        return False
+    write(filename, data)
+    return True
+
+def fetch(path, directory, loader):
+    '''Return the store for the file at path from the cache in directory, or read it with loader() and then cache it'''
+    result = load(path, directory)
+    if result is not None:
+        logging.info('{:s} : restored {:s} from the cache'.format(result.name(), path))
+        return result.do()
+
+    result = loader()
+    save(path, directory, result)
+    return result
@@ -62,7 +62,8 @@ objects
     the only thing in this module to care about is the base.
 '''
 
-import logging,warnings,array,bisect
+import logging,warnings,array,bisect,multiprocessing
+from ptypes import utils
 class DuplicateSymbol(Warning): pass
 class UninitializedSymbol(Warning): pass
 
@@ -88,11 +89,13 @@ class symboltable(dict):
     '''
 
     aliases = None        # key of id's
+    __names = None        # set of aliases key'd by id
     __hooks = None        # key'd by id
     modulename = None     # str of the modulename. subclasses should set this when they figure it out
     def __init__(self):
         super(symboltable, self).__init__()
         self.aliases = {}
+        self.__names = {}
         self.__hooks = {}
         self.modulename = '%s_%x'%(self.__class__.__name__, id(self))
 
@@ -116,6 +119,7 @@ class symboltable(dict):
     def clear(self):
         super(symboltable, self).clear()
         self.aliases = {}
+        self.__names = {}
         self.__hooks = {}
 
     def update(self, dict):
@@ -124,26 +128,38 @@ class symboltable(dict):
         return
 
     def __contains__(self, k):
+        k = [(None,k), k][ type(k) is tuple and len(k) == 2 ]
         return k in self.aliases
 
     has_key = lambda self: self.aliases.has_key(k)
     items = lambda self: list(self.iteritems())
     keys = lambda self: list(self.iterkeys())
 
+    __nohook = staticmethod(lambda symboltable,symbolname:True)
+
     __item_id = 0
     def __new_record(self):
         '''Allocates an id, and creates a new record initialized as None'''
         id = self.__item_id
         self.__item_id += 1
         super(symboltable, self).__setitem__(id, None)
-        self.__hooks[id] = lambda symboltable,symbolname:True
+        self.__names[id] = set()
+        self.__hooks[id] = self.__nohook
         return id
 
     def __del_record(self, id):
         super(symboltable, self).__delitem__(id)
+        del(self.__names[id])
         del(self.__hooks[id])
         return True
 
+    def __dispatch(self, id, key):
+        '''Call the hook for the record at id whilst preventing it from being re-entered'''
+        p = self.__hooks[id]
+        self.__hooks[id] = self.__nohook
+        p(self, key)
+        self.__hooks[id] = p
+
     def __getitem__direct(self, (module,symbolname)):
         return super(symboltable,self).__getitem__(self.aliases[(module,symbolname)])
 
@@ -152,19 +168,15 @@ class symboltable(dict):
         if key not in self.aliases:
             id = self.__new_record()
             self.aliases[key] = id
+            self.__names[id].add(key)
         else:
             id = self.aliases[key]
         super(symboltable, self).__setitem__(id, value)
-
-        p = self.__hooks[id]
-        self.__hooks[id] = lambda symboltable,symbolname:True
-        p(self, key)
-        self.__hooks[id] = p
+        self.__dispatch(id, key)
 
     def __delitem__direct(self, (module,symbolname)):
         id = self.aliases[(module,symbolname)]
-        aliases = (k for k,v in self.aliases.items() if v == id)
-        for name in aliases:
+        for name in self.__names[id]:
             del(self.aliases[name])
         self.__del_record(id)
 
@@ -176,6 +188,10 @@ class symboltable(dict):
         key = [(None,key), key][ type(key) is tuple and len(key) == 2 ]
         return self.__setitem__direct(key, value)
 
+    def get(self, key, default=None):
+        key = [(None,key), key][ type(key) is tuple and len(key) == 2 ]
+        return self.__getitem__direct(key) if key in self.aliases else default
+
     def __delitem__(self, key):
         '''Delete a symbol from the store. Warning: This will delete all aliases and hooks to the symbol as well'''
         key = [(None,key), key][ type(key) is tuple and len(key) == 2 ]
@@ -187,24 +203,36 @@ class symboltable(dict):
             yield x
         return
 
+    def __alias_detach(self, name):
+        '''Remove name from its record, and free the record if it was the last one referencing it'''
+        id = self.aliases.pop(name)
+        names = self.__names[id]
+        names.discard(name)
+        if not names:
+            self.__del_record(id)
+        return id
+
     def alias(self, name, target):
         '''Add an alias from one symbol name to another'''
         name,target = tuple(self.__alias_expand([name,target]))
-        self.aliases[name] = self.aliases[target]
+        id = self.aliases[target]
+        if name in self.aliases and self.aliases[name] != id:
+            self.__alias_detach(name)
+        self.aliases[name] = id
+        self.__names[id].add(name)
         return True
 
     def unalias(self, name):
         '''Remove a symbol alias. Free the record when there's no aliases left.'''
         name, = tuple(self.__alias_expand([name]))
-
-        id = self.aliases[name]
-        del(self.aliases[name])
-
-        count = len([1 for k,v in self.aliases.items() if v == id])
-        if count == 0:
-            self.__del_record(id)
+        self.__alias_detach(name)
         return True
 
+    def getaliases(self, name):
+        '''Return the set of symbol names that refer to the same record as the specified symbol'''
+        name, = tuple(self.__alias_expand([name]))
+        return set(self.__names[self.aliases[name]])
+
     ### hooks. yes lame, but in case an implementation needs to update more symbols on update of one.
     def hook(self, name, fn):
         '''
@@ -236,69 +264,58 @@ class symboltable(dict):
         return symbolnames
 
     def merge(self, store, symbolnames=None):
-        '''merge symboltables'''
+        '''
+        merge symboltables
+
+        every symbol is validated against the store before anything is modified. symbols
+        that are new to this table keep the aliasing they have within the store, and the
+        hook for each record that was updated is only called once all of the values have
+        been copied.
+        '''
         if symbolnames is None:
             symbolnames = store.aliases.keys()
-        localnames = symbolnames = set(self.__alias_expand(symbolnames))
-        #localnames = set((([module,store.modulename][module is None],symbolname) for module,symbolname in symbolnames))
-
-        def generate_key2alias_lookup(st, symbolnames):
-            for key in symbolnames:
-                yield (key, tuple((name for name,x in st.aliases.iteritems() if x == st.aliases[key])))
-            return
+        localnames = set(self.__alias_expand(symbolnames))
 
-        def generate_id2value_lookup(st, symbolnames):
-            for key in symbolnames:
-                id = st.aliases[key]
-                yield (id, super(symboltable, st).__getitem__(id))    # (id, value)
-            return
-
-        def generate_name2id_lookup(st, symbolnames):
-            for key in symbolnames:
-                yield (key, st.aliases[key])
-            return
-
-        # for importing values by id
-        store_lookup_value_by_id = dict(generate_id2value_lookup(store, symbolnames))
-        store_lookup_aliases_by_key = dict(generate_key2alias_lookup(store, symbolnames))
-
-        # add new elements that we're merging in
-        for n in localnames.difference(self.viewkeys()):
-            self.__setitem__direct(n, None)
-
-        local_lookup_aliases_by_key = dict(generate_key2alias_lookup(self, localnames))
-
-        result = set()
-        for ln,id in generate_name2id_lookup(self, localnames):
-            module,symbolname=ln
-            check = super(symboltable, self).__getitem__(id)
+        # validate the symbols by grouping each local name by the store record it comes from
+        records = {}
+        for ln in localnames:
+            module,symbolname = ln
             sn = ([module,None][module==store.modulename],symbolname)
-            value = store_lookup_value_by_id[store.aliases[sn]]
-
-            # FIXME: I should break this function into two parts in order to pre-check for symbol issues
-#            if check is not None:
-#                logging.debug('%s : merge : Destination symbol %s has already been initialized with %s'% (self.name(), ln, repr(check)))
+            if sn not in store.aliases:
+                raise KeyError('Symbol {!r} is unknown in {:s}'.format(sn, store.modulename))
+            records.setdefault(store.aliases[sn], []).append(ln)
+
+        # copy each value into the record its names share, creating it if necessary
+        updated = {}
+        for sid,names in records.iteritems():
+            value = super(symboltable, store).__getitem__(sid)
             if value is None:
-                logging.debug('{:s} : merge : Source symbol {!r} is uninitialized'.format(self.name(), sn))
-
-            # copy value, and call it's hook
-            super(symboltable, self).__setitem__(id, value)
-            self.__hooks[id](self, ln)
-
-            # add aliases
-            a,b = set(local_lookup_aliases_by_key[ln]),set(store_lookup_aliases_by_key[sn])
-            [ self.alias(x,ln) for x in b ]
-
-            # remove other aliases
-            [ self.unalias(x) for x in b.difference(a) ]
+                logging.debug('{:s} : merge : Source symbol {!r} is uninitialized'.format(self.name(), names[0]))
+
+            existing = [n for n in names if n in self.aliases]
+            id = self.aliases[existing[0]] if existing else self.__new_record()
+            for ln in names:
+                if ln not in self.aliases:
+                    self.aliases[ln] = id
+                    self.__names[id].add(ln)
+                super(symboltable, self).__setitem__(self.aliases[ln], value)
+                updated.setdefault(self.aliases[ln], ln)
+            continue
 
-            # save the symbolname we updated
-            result.add(ln)
-        return result
+        # now that every value has been assigned, dispatch the hooks in the order the records were created
+        for id in sorted(updated):
+            if id in self.__hooks:
+                self.__dispatch(id, updated[id])
+            continue
+        return localnames
 
     def __repr__(self):
        return ' '.join((self.name(), '{!r}'.format(dict((([([k,(self.modulename,k[1])][k[0] is None],v) for k,v in self.iteritems()]))))))
 
+def relocatechunk((relocator, data, namespace)):
+    '''Relocate a segment with the relocator and symbols provided by its store. This is used by the workers in container.link'''
+    return relocator(data, namespace)
+
 #####################
 class base(symboltable):
     '''
@@ -400,15 +417,20 @@ class base(symboltable):
         except KeyError:
             raise KeyError('Symbol {!r} is unknown in {:s}'.format(name, self.modulename))
 
+        # moving a segment means that its address index needs to be rebuilt
+        key = [(None,name), name][ type(name) is tuple and len(name) == 2 ]
+        if self.__segments is not None and key in self.__segments[0]:
+            self.__segments = None
         super(base,self).__setitem__(name, value)
 
     def add(self, (module,symbolname), value, scope=GlobalScope, segment=None):
         '''Store the specified symbol in the symbol store'''
-        if (module,symbolname) in self.keys():
+        if (module,symbolname) in self.aliases:
             raise KeyError('Symbol {!r} is already defined as {!r} in {:s}'.format(symbolname, self[module,symbolname], self.modulename))
 
         # store our symbol and its value
         super(base, self).__setitem__((module,symbolname), value)
+        self.invalidate()
 
         # store in our segment index
         try:
@@ -483,6 +505,15 @@ class base(symboltable):
         raise NotImplementedError
     def relocatesegment(self, name, data):
         raise NotImplementedError
+    def getrelocator(self, name):
+        '''
+        Intended to be overloaded. return a picklable callable that relocates a segment without needing this store.
+
+        the callable is given the segment data and a dict containing the value of each symbol listed in its .symbols
+        attribute, and returns the relocated data. each of these symbols must be resolved before the segment is relocated.
+        if None is returned, the segment will be relocated with .relocatesegment
+        '''
+        return None
 
     def merge(self, store, symbolnames=None):
         '''
@@ -517,14 +548,34 @@ class base(symboltable):
 
         return symbolnames
 
+    __segments = None   # (set of segment keys, utils.intervals of each segment's address)
+    def __segmentindex(self):
+        '''Return an index of the address range of each segment that is rebuilt whenever one of them is moved'''
+        if self.__segments is None:
+            names = self.listsegments()
+            res = ((self[None,n], self.getsegmentlength(n), n) for n in names)
+            self.__segments = set((None,n) for n in names), utils.intervals((b, b+l, n) for b,l,n in res if b is not None)
+        return self.__segments[1]
+
+    def invalidate(self):
+        '''Discard the index of segment addresses so that it is rebuilt the next time it's searched.
+
+        This needs to be called if the length of a segment is changed.
+        '''
+        self.__segments = None
+
     def findsegment(self, address):
         '''Searches the symbol table for the segment containing the specified address'''
-        for name in self.segments:
-            b,l = self[None,name], self.getsegmentlength(name)
-            if address >= b and address < b+l:
-                return name
+        try:
+            return self.__segmentindex().get(address)
+        except KeyError:
+            pass
         raise ValueError("Unable to locate a segment containing address %x"% address)
 
+    def findsegments(self, address, size):
+        '''Return the names of each segment that overlaps the specified range of addresses'''
+        return self.__segmentindex().overlaps(address, address+size)
+
 class container(base):
     '''
     This class should contain sub-stores, and provides a single store containing all the merged symbols
@@ -597,6 +648,7 @@ class container(base):
             self.storesegments[segmentname] = v
 
         v.insert(bisect.bisect(v, a), a)
+        self.invalidate()
         return
 
     ## segment stuff
@@ -645,11 +697,10 @@ class container(base):
         for index,name,store in segments:
 
             size = store.getsegmentlength(name)
-            globals = store.getglobalsbysegmentname(name)
             externals = store.getexternals()
 
             # merge in externals
-            print index,store,externals
+            logging.debug('%s : merging %d externals into %s'% (self.name(), len(externals), store.name()))
             store.merge(self, externals)
 
             # grab chunk
@@ -665,14 +716,88 @@ class container(base):
             data[offset:offset+size] = array.array('c',chunk)
 
             # import any globals that were calculated
-            localnames = set((([module,store.modulename][module is None],symbolname) for module,symbolname in globals))
-            for gname,lname in zip(globals,localnames):
-                self[lname] = store[gname]
+            self.__import_globals(store, name)
 
             offset += size
             baseaddress += size
         return data.tostring()
 
+    def __import_globals(self, store, name):
+        '''Copy the globals that a store calculated for its segment back into the container'''
+        for gname in store.getglobalsbysegmentname(name):
+            if gname in self:
+                self[gname] = store[gname]
+            continue
+        return
+
+    def resolve(self, segmentnames=None):
+        '''
+        Assign the address of each member store's segments, import the globals that were calculated, and then merge
+        the externals into each member store exactly once. Return the segmentnames that were resolved.
+        '''
+        segmentnames = self.listsegments() if segmentnames is None else list(segmentnames)
+
+        stores = []
+        for segmentname in segmentnames:
+            assert self[segmentname] is not None, '%s : segment %s address is undefined'%(self.name(), segmentname)
+
+            # reset our symbol addresses which will assign each store's segment
+            self[segmentname] = self[segmentname]
+            for index,name,store in self.storesegments[segmentname]:
+                self.__import_globals(store, name)
+                if store not in stores:
+                    stores.append(store)
+                continue
+            continue
+
+        # now that every global is known, each store's externals can be resolved
+        for store in stores:
+            store.merge(self, store.getexternals())
+        return segmentnames
+
+    def link(self, segmentnames=None, processes=0):
+        '''
+        Resolve every symbol and then relocate each segment. Return a dict of the relocated data keyed by segmentname.
+
+        each member segment whose store provides a relocator is only given the symbols that it needs, and is
+        relocated in this process unless `processes` asks for a pool of that many workers. the pool has to
+        pickle each segment and its namespace, so it is only worth it for relocators that are expensive.
+        '''
+        segmentnames = self.resolve(segmentnames)
+
+        # collect each member segment as either a job for the pool or data that was already relocated
+        chunks, jobs = [], []
+        for segmentname in segmentnames:
+            for index,name,store in self.storesegments[segmentname]:
+                data, relocator = store.getsegment(name), store.getrelocator(name)
+                if relocator is None:
+                    chunks.append((segmentname, store.relocatesegment(name, data)))
+                    continue
+                namespace = dict((symbol, store.get(symbol)) for symbol in relocator.symbols)
+                unresolved = [symbol for symbol, value in namespace.iteritems() if value is None]
+                if unresolved:
+                    raise KeyError('Symbols {!r} are unresolved in {:s}'.format(sorted(unresolved), store.modulename))
+                chunks.append((segmentname, len(jobs)))
+                jobs.append((relocator, data, namespace))
+            continue
+
+        logging.debug('%s : relocating %d segments with %d relocators'% (self.name(), len(chunks), len(jobs)))
+        if not processes or len(jobs) < 2:
+            results = map(relocatechunk, jobs)
+        else:
+            pool = multiprocessing.Pool(processes)
+            try:
+                results = pool.map(relocatechunk, jobs)
+            finally:
+                pool.close()
+                pool.join()
+
+        # join the relocated chunks back together in the order of each segment
+        result = dict((segmentname, []) for segmentname in segmentnames)
+        for segmentname, item in chunks:
+            result[segmentname].append(results[item] if isinstance(item, int) else item)
+        return dict((segmentname, ''.join(items)) for segmentname, items in result.iteritems())
+
     def loadsymbols(self, segmentname):
         segments = self.storesegments[segmentname]
         symbols = self.scopesegment[segmentname]
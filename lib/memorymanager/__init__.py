@@ -11,8 +11,8 @@ memorymanager.new(handle=yourhandle)
 ### this module intends to provide an interface for managing address space inside another /context/ (whatever that may be, like a process)
 ### this includes things like allocations, frees, file mappings, code page creation...(using that one module or whatever that i wrote)
 
+import array
 import allocator
-from ptypes import bitmap
 
 # XXX: it might be cool to add an option to duplicate attributes from
 #      another MemoryManager instance
@@ -56,7 +56,21 @@ class MemoryManager(__provider):
 
     def read(self, address, length):
         '''Read /length/ bytes starting at /address/'''
-        return self.allocator.read(address, length)     # XXX: we can probably optimize this so it does it by page size
+        return self.allocator.read(address, length)
+
+    def iterate(self, address):
+        '''Yield each byte starting at /address/, reading ahead to the end of each page'''
+        pagesize = self.allocator.getPageSize()
+        while True:
+            length = pagesize - (address & (pagesize-1))
+            for n in self.read(address, length):
+                yield n
+            address += length
+        return
+
+    def view(self, address, length):
+        '''Return a memoryview of /length/ bytes at /address/ if the allocator maps them into this process'''
+        return self.allocator.view(address, length)
 
     def write(self, address, data):
         '''Write /data/ to the location specified by /address/'''
@@ -122,45 +136,64 @@ class MemoryManager(__provider):
         pages = self.loaded[pointer]
         self.__unload_loaded(pointer, pages)
 
+class Arena(object):
+    '''A page that is divided into chunks of the same size'''
+    def __init__(self, pointer, chunksize, count):
+        self.pointer, self.chunksize, self.count = pointer, chunksize, count
+
+        # free chunks are popped from the end so that they're handed out in order
+        self.available = range(count)[::-1]
+        self.sizes = array.array('I', [0]) * count
+        self.listed = False
+
+    def used(self):
+        return self.count - len(self.available)
+
 class Managed(MemoryManager):
     # XXX: i feel like this was largely influenced by my pathetic phk research from like 8 years ago
     arenas = dict
     allocations = dict    # lookup all page occupancy
 
+    minimum = 0x10        # smallest chunk size
+    retain = 0x10         # number of empty pages to keep for new arenas
+
     def __init__(self, allocator):
         super(Managed, self).__init__(allocator)
 
-        self.allocations = {}
-        self.arenas = {}
+        self.allocations = {}   # {page : Arena or number of pages}
+        self.arenas = {}        # {chunksize : set of Arena}
+        self.partial = {}       # {chunksize : [Arena]} that might still have a free chunk
+        self.unused = []        # empty pages that can be reused by an arena
+        self.live = 0           # bytes that are allocated, with pages counted entirely
 
     def __alloc_dochunks(self, size):
-        # initialize an arena if it doesn't exist
-        k = 1<<bitmap.fit(size-1)
+        k = max(self.minimum, 1 << (size-1).bit_length())
 
-        try:
-            self.arenas[k]
+        # find the most recent arena with a free chunk, discarding any that became full or were released
+        partial = self.partial.setdefault(k, [])
+        while partial and not partial[-1].available:
+            partial.pop().listed = False
 
-        except KeyError:
-            self.arenas[k] = [ self.__alloc_arena(k) ]
-
-        arena = self.arenas[k]
-
-        # try really hard to allocate from it
-        try:
-            res = self.__alloc_from_bucket(arena, size)
+        if partial:
+            arena = partial[-1]
+        else:
+            arena = self.__alloc_arena(k)
+            arena.listed = True
+            partial.append(arena)
 
-        except ValueError:
-            arena.append( self.__alloc_arena(k) )
-            return self.__alloc_from_bucket(arena, size)
-
-        return res
+        index = arena.available.pop()
+        arena.sizes[index] = size
+        return arena.pointer + index * arena.chunksize, arena
 
     def alloc(self, size):
+        size = max(1, size)
         pagesize = self.allocator.getPageSize()
         if size < pagesize>>1:
             res = self.__alloc_dochunks(size)
+            self.live += size
         else:
             res = self.__alloc_pages((size+pagesize-1)/pagesize)
+            self.live += res[1] * pagesize
 
         # assign to page lookup
         pointer,type = res
@@ -173,34 +206,14 @@ class Managed(MemoryManager):
     def __alloc_pages(self, count):
         return (self.allocator.getWriteable(None, count), count)
 
-    def __alloc_arena(self, elementsize, pages=1):
-        '''allocates an arena for elements of /elementsize/'''
-        allocator = self.allocator
-
-        size = allocator.getPageSize()*pages
-        pointer = allocator.getWriteable(None, pages)
-        res = bitmap.new(0, size / elementsize )
-        return (pointer, (int(elementsize), res))
-
-    # XXX: this modifies /bucket/ directly...just a heads up.
-    def __alloc_from_bucket(self, bucket, size):
-        for i,n in zip(range(len(bucket)), bucket):
-            pointer,(chunksize,layout) = n
-            count = (size / chunksize)+1
-
-            try:
-                freeslot = bitmap.runscan(layout, 0, count)
-            except ValueError:
-                raise NotImplementedError('none free in index %d -> %s'% (i, bitmap.string(layout)))    # just because i haven't done this test case yet
-                continue
-
-            layout = bitmap.set(layout, freeslot, 1, count)
-
-            # found a free slot, write it directly into bucket
-            bucket[i] = (pointer, (chunksize, layout))
-            return pointer + freeslot*chunksize, bucket[i]
+    def __alloc_arena(self, elementsize):
+        '''allocates an arena for elements of /elementsize/, reusing an empty page if there is one'''
+        pagesize = self.allocator.getPageSize()
+        pointer = self.unused.pop() if self.unused else self.allocator.getWriteable(None, 1)
 
-        raise ValueError('Unable to allocate {:d} bytes out of bucket {!r}'.format(size, bucket))
+        res = Arena(pointer, elementsize, pagesize / elementsize)
+        self.arenas.setdefault(elementsize, set()).add(res)
+        return res
 
     def free(self, pointer):
         pagemask = self.allocator.getPageSize()-1
@@ -208,41 +221,71 @@ class Managed(MemoryManager):
 
         # free that pointer
         allocation = self.allocations[page]
-        if type(allocation) is tuple:
-            chunksize,bitmap = allocation
+        if isinstance(allocation, Arena):
             # we're a smaller chunk
-            self.__free_arena(pointer)
+            self.__free_arena(allocation, pointer)
             return
 
         # free those pages
+        if pointer != page:
+            raise ValueError('Pointer {:x} is not the start of an allocation'.format(pointer))
         allocationPages = allocation
         self.allocator.freeWriteable(page, allocationPages)
         del( self.allocations[page] )
+        self.live -= allocationPages * (pagemask+1)
         return
 
-    def __free_arena(self, pointer):
-        pagemask = self.allocator.getPageSize()-1
-        page = pointer & ~pagemask
-
-        arena = self.allocations[page]
-        basepointer,(chunksize,layout) = arena
-
+    def __free_arena(self, arena, pointer):
         # convert pointer into index
-        offset = pointer - basepointer
-        index = offset / chunksize
+        index, offset = divmod(pointer - arena.pointer, arena.chunksize)
+        if offset or arena.sizes[index] == 0:
+            raise ValueError('Pointer {:x} is not an allocated chunk of {:d} bytes'.format(pointer, arena.chunksize))
+
+        self.live -= arena.sizes[index]
+        arena.sizes[index] = 0
+        arena.available.append(index)
+
+        # if the arena was full, then it has a chunk to give out again
+        if not arena.listed:
+            arena.listed = True
+            self.partial[arena.chunksize].append(arena)
+
+        # if every chunk is free, then keep the page for another arena or release it
+        if len(arena.available) == arena.count:
+            self.__free_page(arena)
+        return
 
-        # clear the bit
-        layout = bitmap.set(layout, index, False)
-        self.allocations[page] = (basepointer,(chunksize,layout))
+    def __free_page(self, arena):
+        # the most recent arena stays around so that an alloc/free of a single chunk doesn't thrash
+        partial = self.partial[arena.chunksize]
+        if partial and partial[-1] is arena:
+            return
 
-        # if all the bits are clear, we can remove this page
-        if bitmap.isempty(layout):
-            self.allocator.freeWriteable(page, 1)
-            del(self.allocations[page])
+        del(self.allocations[arena.pointer])
+        self.arenas[arena.chunksize].discard(arena)
+        arena.available = []     # lazily removed from the partial list
+
+        if len(self.unused) < self.retain:
+            self.unused.append(arena.pointer)
             return
+        self.allocator.freeWriteable(arena.pointer, 1)
 
-        # perhaps zero the buffer out?
-        return
+    def statistics(self):
+        '''Return a dict describing the memory that is being managed'''
+        pagesize = self.allocator.getPageSize()
+        arenas = [n for items in self.arenas.itervalues() for n in items]
+        pages = sum(n for n in self.allocations.itervalues() if not isinstance(n, Arena))
+        used = sum(n.used() * n.chunksize for n in arenas) + pages * pagesize
+        reserved = (len(arenas) + len(self.unused) + pages) * pagesize
+        return {
+            'arenas' : len(arenas),
+            'pages' : len(arenas) + len(self.unused) + pages,
+            'unused' : len(self.unused),
+            'reserved' : reserved,
+            'used' : used,
+            'live' : self.live,
+            'fragmentation' : (1.0 - float(self.live) / reserved) if reserved else 0.0,
+        }
 
 if False and __name__ == '__main__':
     import sys
@@ -8,7 +8,7 @@ allocator.new(pid=yourpid)
 allocator.new(handle=yourhandle)
 """
 
-import sys,ctypes
+import sys,os,ctypes
 ### this is written this way in case we need to target this at PaX.
 ## logic is like:
 ##    1] address = getWriteableMemory(suggestion, length)
@@ -65,6 +65,13 @@ class OSExecPageAllocator(object):
         '''returns page size of the platform'''
         raise NotImplementedError
 
+    def view(self, address, length):
+        '''
+        returns a memoryview of /length/ bytes at /address/ if the
+        memory is mapped into our address space
+        '''
+        raise NotImplementedError
+
     ## XXX: this is cheating, but it makes allocators work just like a ptypes source
     __offset = 0
     def seek(self, offset):
@@ -76,24 +83,27 @@ class OSExecPageAllocator(object):
 
 class Local(OSExecPageAllocator):
     def read(self, address, length):
-        blockpointer = ctypes.POINTER(ctypes.c_char*length)
-        v = ctypes.c_void_p(address)
-        p = ctypes.cast(v, blockpointer)
-        return ''.join(p.contents)
+        return ctypes.string_at(address, length)
 
     def write(self, address, value):
         assert type(value) is str
-        length = len(value)
-        blockpointer = ctypes.POINTER(ctypes.c_char*length)
-        v = ctypes.c_void_p(address)
-        p = ctypes.cast(v, blockpointer)
-        for i,c in zip(xrange(length), str(value)):
-            p.contents[i] = c
+        ctypes.memmove(address, value, len(value))
         return True
 
+    def view(self, address, length):
+        '''
+        returns a writeable memoryview of /length/ bytes at /address/.
+        the pages must stay mapped for as long as the view is used.
+        '''
+        return memoryview((ctypes.c_char*length).from_address(address))
+
 if sys.platform == 'linux2':
     libc = ctypes.CDLL('libc.so.6')
-    libc.mmap.restype = ctypes.c_uint
+    libc.mmap.restype = ctypes.c_void_p
+    libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+    libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    libc.mprotect.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+    MAP_FAILED = ctypes.c_void_p(-1).value
 
     PROT_NONE = 0x0
     PROT_READ = 0x1
@@ -115,6 +125,9 @@ if sys.platform == 'linux2':
     MAP_NONBLOCK = 0x10000
 
     class LinuxLocal(Local):
+        def __init__(self):
+            super(LinuxLocal, self).__init__(os.getpid())
+
         def getPageSize(self):
             return 1<<12
 
@@ -123,20 +136,20 @@ if sys.platform == 'linux2':
                 desiredAddress, count*4096, PROT_WRITE|PROT_READ,
                 MAP_ANONYMOUS|MAP_PRIVATE, -1, 0
             )
-            if res == 0xffffffff:
+            if res == MAP_FAILED:
                 raise OSError('Unable to map page')
             return res
 
         def freeWriteable(self, address, count, **attrs):
             res = libc.munmap(address, count*4096)
-            if res == 0xffffffff:
+            if res == -1:
                 raise OSError('Unable to unmap page')
             return res
 
         def getExecutable(self, sourceAddress, count, **attrs):
             size = count * 4096
             res = libc.mprotect(sourceAddress, size, PROT_READ|PROT_EXEC)
-            if res == 0xffffffff:
+            if res == -1:
                 raise OSError('Unable to mprotect page')
             return sourceAddress
 
@@ -178,6 +191,9 @@ if sys.platform == 'win32':
     class Windows(Local):
         handle = int
 
+        def view(self, address, length):
+            raise NotImplementedError('Memory belonging to handle({:x}) is not mapped into this process'.format(self.handle))
+
         def setMemoryPermission(self, address, count, permission):
             # O(1), baby
 
@@ -276,7 +292,6 @@ if sys.platform == 'win32':
             if res == 0:
                 message = 'Unable to read from handle({:x})[{:08x}:{:08x}].'.format(self.handle, address, address+length)
                 raise OSError(message, "GetLastError() -> {!r}".format(getLastErrorTuple()))
-.format
             assert NumberOfBytesRead.value == length, 'Expected %d bytes, received %d bytes.'% (length, NumberOfBytesRead.value)
             return str(Buffer.raw)
 
@@ -321,6 +336,9 @@ if sys.platform == 'win32':
             super(WindowsLocal, self).__init__(id)
             self.handle = id    # XXX: shouldn't this be a handle of some kind?
 
+        def view(self, address, length):
+            return Local.view(self, address, length)
+
     def new(*args, **kwds):
         if 'pid' in kwds:
             pid = kwds['pid']
@@ -2,7 +2,7 @@
 
 import ptypes,sdkddkver,rtltypes
 from WinNT import *
-import itertools,functools,operator,math
+import itertools,functools,operator,math,struct
 import logging
 
 class HeapException(ptypes.error.RequestError):
@@ -1063,6 +1063,48 @@ if 'Heap':
                 res = res.next()
             return
 
+        def Encoding(self):
+            '''Return the (EncodeFlagMask, Keys) that each _HEAP_ENTRY within the segment is encoded with'''
+            try:
+                heap = self.getparent(type=_HEAP)
+            except ptypes.NotFoundError:
+                return getattr(self, '_HEAP_ENTRY_EncodeFlagMask', 0), getattr(self, '_HEAP_ENTRY_Encoding', (0, 0))
+            return heap['EncodeFlagMask'].li.int(), tuple(n.int() for n in heap['Encoding'].li['Keys'])
+
+        def Walk(self):
+            '''Yield an (offset, size, flags, busy) tuple for each chunk within the committed range of the segment
+
+            The committed range is read from the provider all at once, and the
+            header of each chunk is decoded with the Encoding of the _HEAP
+            without creating any chunks. The flags are the UnusedBytes of the
+            header. Use .Chunk(offset) to create the chunk at an offset.
+            '''
+            start, end = self.Bounds()
+            mask, (k1, k2) = self.Encoding()
+            if getattr(self, 'WIN64', False):
+                header, cs, busy = struct.Struct('<8xLL'), 16, 0x18
+            else:
+                header, cs, busy = struct.Struct('<LL'), 8, 0x08
+
+            self.source.seek(start)
+            data = self.source.consume(end - start)
+
+            offset = 0
+            while offset + header.size <= len(data):
+                n1, n2 = header.unpack_from(data, offset)
+                if n1 & mask:
+                    n1, n2 = n1 ^ k1, n2 ^ k2
+                size, flags = (n1 & 0xffff) * cs, n2 >> 24
+                if size == 0:
+                    raise InvalidBlockSize(self, '_HEAP_SEGMENT.Walk', offset=start + offset, size=size)
+                yield start + offset, size, flags, bool(flags & busy)
+                offset += size
+            return
+
+        def Chunk(self, offset):
+            '''Return the chunk at the specified ``offset`` that was yielded by .Walk()'''
+            return self.new(_BE_HEAP_CHUNK, offset=offset)
+
         def walk(self):
             yield self
             for n in self['SegmentListEntry'].walk(): yield n
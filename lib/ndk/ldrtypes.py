@@ -1,3 +1,4 @@
+import bisect,operator
 from WinNT import *
 import umtypes,pecoff
 
@@ -117,17 +118,81 @@ class PEB_LDR_DATA(pstruct.type, versioned):
             (HANDLE, 'ShutdownThreadId'),
         ])
 
+    __index = None  # (InLoadOrderModuleList, sorted DllBase, [(DllBase, SizeOfImage, module)], {BaseDllName : module}, {FullDllName : module}, {path : module})
+
     def walk(self):
         for x in self['InLoadOrderModuleList'].walk():
             yield x
         return
 
-    def search(self, string):
-        for x in self.walk():
-            if string == x['FullDllName'].str():
-                return x
+    def __modules(self):
+        '''Return the cached (bases, ranges, names, fullnames, paths) of each module, walking the InLoadOrderModuleList to build them if its head has changed.'''
+        key, cache = self['InLoadOrderModuleList'].serialize(), self.__index
+        if cache is not None and cache[0] == key:
+            _, bases, ranges, names, fullnames, paths = cache
+            return bases, ranges, names, fullnames, paths
+
+        # each entry is created from the loader data rather than from the entry
+        # before it, so that the chain of parents doesn't grow with each module.
+        head, entries = self['InLoadOrderModuleList'], []
+        address, visited = head['Flink'].int(), {0, head.getoffset()}
+        while address not in visited:
+            m = self.new(LDR_DATA_TABLE_ENTRY, offset=address).l
+            entries.append(m)
+            visited.add(address)
+            address = m['InLoadOrderLinks']['Flink'].int()
+
+        # the first module in load order wins when more than one has the same name
+        ranges, names, fullnames, paths = [], {}, {}, {}
+        for m in entries:
+            ranges.append((m['DllBase'].int(), m['SizeOfImage'].int(), m))
+            names.setdefault(m['BaseDllName'].str(), m)
+            fullname = m['FullDllName'].str()
+            fullnames.setdefault(fullname, m)
+            if fullname is not None:
+                paths.setdefault(self.__path(fullname), m)
             continue
-        raise KeyError
+        ranges.sort(key=operator.itemgetter(0))
+        bases = [base for base, _, _ in ranges]
+        self.__index = key, bases, ranges, names, fullnames, paths
+        return bases, ranges, names, fullnames, paths
+
+    @staticmethod
+    def __path(name):
+        return name.lower().replace('\\', '/')
+
+    def invalidate(self):
+        '''Discard the cached modules so that they are rebuilt the next time they're searched.
+
+        Modules are appended to the end of the InLoadOrderModuleList, so the cache
+        is also rebuilt when the head of the list changes. This needs to be called
+        if a module was modified in some other way.
+        '''
+        self.__index = None
+
+    def getmodulebyaddress(self, address):
+        '''Return the module whose image contains the specified ``address``.'''
+        bases, ranges, _, _, _ = self.__modules()
+        index = bisect.bisect_right(bases, address) - 1
+        if index >= 0:
+            base, size, m = ranges[index]
+            if base <= address < base + size:
+                return m
+        raise KeyError(address)
+
+    def getmodulebyname(self, name):
+        '''Return the module with the specified BaseDllName.'''
+        _, _, names, _, _ = self.__modules()
+        return names[name]
+
+    def getmodulebyfullname(self, name):
+        '''Return the module with the specified FullDllName, ignoring case and the type of path separator.'''
+        _, _, _, _, paths = self.__modules()
+        return paths[self.__path(name)]
+
+    def search(self, string):
+        _, _, _, fullnames, _ = self.__modules()
+        return fullnames[string]
 
 class PPEB_LDR_DATA(P(PEB_LDR_DATA)): pass
 
@@ -245,32 +245,36 @@ class PEB(pstruct.type, versioned):
         # See https://www.geoffchappell.com/studies/windows/win32/ntdll/structs/peb/index.htm
         return
 
-    def getmodulebyname(self, name):
+    __ldr = None    # (Ldr, PEB_LDR_DATA)
+
+    def __loader(self):
+        '''Return the PEB_LDR_DATA that Ldr points to.
+
+        The same instance is used for each lookup with the head of its module list
+        reloaded, so that the modules that it has indexed are only walked again when
+        the head has changed.
+        '''
+        address, cache = self['Ldr'].int(), self.__ldr
+        if cache is not None and cache[0] == address:
+            _, ldr = cache
+            ldr['InLoadOrderModuleList'].l
+            return ldr
         ldr = self['Ldr'].d.l
-        for m in ldr.walk():
-            if m['BaseDllName'].str() == name:
-                return m
-            continue
-        raise KeyError(name)
+        self.__ldr = address, ldr
+        return ldr
+
+    def invalidate(self):
+        '''Discard the loader data and its modules so that they are rebuilt the next time a module is searched.'''
+        self.__ldr = None
+
+    def getmodulebyname(self, name):
+        return self.__loader().getmodulebyname(name)
 
     def getmodulebyaddress(self, address):
-        ldr = self['Ldr'].d.l
-        for m in ldr.walk():
-            start,size = m['DllBase'].int(),m['SizeOfImage'].int()
-            left,right = start, start+size
-            if address >= left and address <= right:
-                return m
-            continue
-        raise KeyError(name)
+        return self.__loader().getmodulebyaddress(address)
 
     def getmodulebyfullname(self, name):
-        ldr = self['Ldr'].d.l
-        name = name.lower().replace('\\', '/')
-        for m in ldr.walk():
-            if m['FullDllName'].str().lower().replace('\\', '/') == name:
-                return m
-            continue
-        raise KeyError(name)
+        return self.__loader().getmodulebyfullname(name)
 
 class TEB_ACTIVE_FRAME_CONTEXT(pstruct.type):
     _fields_ = [
@@ -5,7 +5,7 @@ from ..__base__ import *
 from .headers import virtualaddress
 from . import headers
 
-import logging
+import logging,struct,collections
 
 pbinary.setbyteorder(ptypes.config.byteorder.littleendian)
 
@@ -34,7 +34,7 @@ class StreamHdr(pstruct.type):
             res = self.getparent(StreamHdr)
             cb = res['Size'].int()
             t = Stream.withdefault(res['Name'].str(), blocksize=lambda s, cb=cb: cb)
-            if issubclass(t, parray.block):
+            if issubclass(t, (parray.block, Heap)):
                 return dyn.clone(t, blocksize=lambda s, cb=cb: cb)
             return t
 
@@ -388,16 +388,79 @@ class PermissionSet(pstruct.type):
 ### Stream types
 class Stream(ptype.definition): cache = {}
 
+def decompress(data, offset):
+    '''Return the (integer, size) of the CInt at /offset/ of the string /data/'''
+    res = ord(data[offset])
+    if res & 0x80 == 0:
+        return res, 1
+    elif res & 0x40 == 0:
+        return (res & 0x3f) << 8 | ord(data[offset+1]), 2
+    res, = struct.unpack_from('>L', data, offset)
+    return res & 0x1fffffff, 4
+
+class Heap(ptype.block):
+    """
+    A heap of objects within the metadata that is indexed by the offset of each object.
+
+    Loading the heap only reads its data. The object at an offset is decoded
+    from this data by .Get(offset) without creating any of the other objects
+    in the heap, and the most recent ``cachesize`` of them are kept. The
+    elements of the heap are only created if the heap is iterated.
+    """
+    _object_ = None
+    cachesize = 0x1000
+    __cache = None      # (.value, provider.snapshot, OrderedDict({offset : object}))
+    __elements = None   # (.value, parray.block)
+
+    def Get(self, offset):
+        value, cache = self.value, self.__cache
+        if cache is None or cache[0] is not value:
+            cache = self.__cache = value, ptypes.provider.snapshot([(self.getoffset(), value)]), collections.OrderedDict()
+        _, source, objects = cache
+        if offset in objects:
+            res = objects[offset] = objects.pop(offset)
+            return res
+
+        if not 0 <= offset < len(value):
+            raise IndexError(offset)
+        res = objects[offset] = self.new(self._object_, __name__=str(offset), offset=self.getoffset() + offset).load(source=source)
+        while len(objects) > self.cachesize:
+            objects.popitem(last=False)
+        return res
+
+    def elements(self):
+        '''Return every object in the heap as a parray.block'''
+        value, cache = self.value, self.__elements
+        if cache is None or cache[0] is not value:
+            t = dyn.clone(parray.block, _object_=self._object_, blocksize=lambda s, cb=self.blocksize(): cb)
+            cache = self.__elements = value, self.new(t, __name__='elements', offset=self.getoffset()).l
+        _, res = cache
+        return res
+
+    def field(self, offset):
+        return self.elements().field(offset)
+
+    def __iter__(self):
+        return iter(self.elements())
+
+    def __getitem__(self, index):
+        return self.elements()[index]
+
+    def summary(self, **options):
+        return '{:s} size={:#x}'.format(self.typename(), self.blocksize())
+
 @Stream.define
-class HStrings(parray.block):
+class HStrings(Heap):
     type = '#Strings'
     _object_ = pstr.szstring
 
-    def Get(self, offset):
-        return self.field(offset)
+    def String(self, offset):
+        '''Return the string at /offset/ directly from the data of the heap'''
+        data = self.value
+        return data[offset : data.index('\0', offset)]
 
 @Stream.define
-class HUserStrings(parray.block):
+class HUserStrings(Heap):
     type = '#US'
     class _object_(pstruct.type):
         def __data(self):
@@ -410,8 +473,11 @@ class HUserStrings(parray.block):
             (lambda self: dyn.block(self['length'].li.Get() & 1), r'\0'),
         ]
 
-    def Get(self, offset):
-        return self.field(offset)
+    def String(self, offset):
+        '''Return the user-string at /offset/ directly from the data of the heap'''
+        data = self.value
+        cb, size = decompress(data, offset)
+        return data[offset + size : offset + size + (cb & ~1)].decode('utf-16-le')
 
 @Stream.define
 class HGUID(parray.block):
@@ -424,7 +490,7 @@ class HGUID(parray.block):
         raise IndexError(index)
 
 @Stream.define
-class HBlob(parray.block):
+class HBlob(Heap):
     type = '#Blob'
     class _object_(pstruct.type):
         _fields_ = [
@@ -432,8 +498,11 @@ class HBlob(parray.block):
             (lambda self: dyn.block(self['length'].li.Get()), 'data'),
         ]
 
-    def Get(self, offset):
-        return self.field(offset)
+    def Data(self, offset):
+        '''Return the bytes of the blob at /offset/ directly from the data of the heap'''
+        data = self.value
+        cb, size = decompress(data, offset)
+        return data[offset + size : offset + size + cb]
 
 ### Mapping types
 class ElementType(ptype.definition): cache = {}
@@ -466,11 +535,82 @@ class STRING(SerString): type=14
 # FIXME: Implement some more ElementType definitions
 # FIXME: Add a .summary() method for friendly output
 
-class TableRow(ptype.encoded_t):
-    def __getitem__(self, name):
-        return self.d.li.__getitem__(name)
-    def repr(self):
-        return self.d.li.repr()
+class TableRows(ptype.block):
+    """
+    The rows of a table within the #~ stream.
+
+    Each row is only decoded from the data of the table when it is accessed,
+    and is never read from the source again.
+    The _object_ is the row type with columns that have already been resolved
+    to their width by HTables.Layout, and stride is the size of each row.
+    """
+    _object_, widths, stride = None, (), 0
+    __rows = None   # (.value, provider.snapshot, {index : row})
+
+    def __row(self, index):
+        value, cache = self.value, self.__rows
+        if cache is None or cache[0] is not value:
+            cache = self.__rows = value, ptypes.provider.snapshot([(self.getoffset(), value)]), {}
+        _, source, rows = cache
+        if index in rows:
+            return rows[index]
+
+        offset = index * self.stride
+        res = self.new(self._object_, __name__=str(index), offset=self.getoffset() + offset)
+        return rows.setdefault(index, res.load(source=source))
+
+    def __len__(self):
+        return self.blocksize() // self.stride if self.stride else 0
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self.__row(index)
+        return
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.__row(idx) for idx in xrange(*index.indices(len(self)))]
+        idx = index + len(self) if index < 0 else index
+        if not 0 <= idx < len(self):
+            raise IndexError(index)
+        return self.__row(idx)
+
+    def Get(self, index):
+        if index > 0:
+            return self[index - 1]
+        raise IndexError(index)
+
+    def columns(self, *names):
+        """Return a list for each column in ``names`` containing its integer from every row of the table.
+
+        The columns are unpacked from the data of the table with a single
+        struct format for each row, and without decoding any of the rows. A
+        coded index is returned as the integer it is encoded as, with its
+        tag in the lowest Tag.width bits.
+        """
+        fields = [name.lower() for _, name in self._object_._fields_]
+        codes = {1 : 'B', 2 : 'H', 4 : 'I', 8 : 'Q'}
+        if any(width not in codes for width in self.widths):
+            raise ptypes.error.TypeError(self, 'TableRows.columns', message='Unable to unpack the columns of {!r} with widths {!r}'.format(self._object_, self.widths))
+        indices = []
+        for name in names:
+            if name.lower() not in fields:
+                raise KeyError(name)
+            indices.append(fields.index(name.lower()))
+
+        # unpack a number of rows at a time so that the format doesn't get too large
+        format, data, count = str().join(codes[width] for width in self.widths), self.serialize(), len(self)
+        result, chunk = [[] for _ in self.widths], min(count, 0x1000)
+        for index in xrange(0, count, chunk or 1):
+            total = min(chunk, count - index)
+            res = struct.unpack_from('<' + format * total, data, index * self.stride)
+            for column, items in enumerate(result):
+                items.extend(res[column :: len(self.widths)])
+            continue
+        return tuple(result[index] for index in indices)
+
+    def summary(self, **options):
+        return '{:s} rows={:d} stride={:#x}'.format(self._object_.typename() if self._object_ else 'undefined', len(self), self.stride)
 
 class Tables(parray.type):
     length = 64
@@ -482,15 +622,8 @@ class Tables(parray.type):
         if count:
             logging.debug("{:s} : {:s} : Loading {:s}({:d}) table with {:d} rows. : {:d} of {:d}".format('.'.join((res.typename(),self.__class__.__name__)), self.instance(), TableType.byvalue(index, 'undefined'), index, count, 1+len(self.value), self.length))
 
-        rowtype = Table.withdefault(index, type=index)
-        rowsize = rowtype.PreCalculateSize(res) if Table.has(index) else 0
-        t = dyn.clone(TableRow, _object_=rowtype, _value_=dyn.block(rowsize))
-
-        def Get(self, index):
-            if index > 0:
-                return self[index - 1]
-            raise IndexError(index)
-        return dyn.array(t, count, Get=Get, blocksize=(lambda s, cb=rowsize*count: cb))
+        rowtype, widths, stride = res.Layout(index)
+        return dyn.clone(TableRows, _object_=rowtype, widths=widths, stride=stride, length=stride*count)
 
     def __getindex__(self, index):
         return TableType.byname(index) if isinstance(index, basestring) else index
@@ -534,6 +667,27 @@ class HTables(pstruct.type):
             present = res['Valid'].li.index
             return pint.uint32_t if present(index) else pint.uint_t
 
+    __layout = None     # (Rows.value, HeapSizes, {index : (rowtype, widths, stride)})
+
+    def Layout(self, index):
+        """Return the (rowtype, widths, stride) for the rows of the table at ``index``.
+
+        The width of every column of each table is calculated the first time
+        from the Rows and HeapSizes fields, and the rowtype that is returned
+        uses those widths so that its columns don't need to look them up.
+        """
+        rows, heapsizes = self['Rows'].li, self['HeapSizes'].li
+        cache = self.__layout
+        if cache is None or cache[0] is not rows.value or cache[1] != heapsizes.int():
+            counts = [n.int() for n in rows]
+            layout = {}
+            for table in Table.cache.itervalues():
+                widths = table.Columns(counts, heapsizes)
+                layout[table.type] = table.Fixed(widths), tuple(widths), sum(widths)
+            cache = self.__layout = rows.value, heapsizes.int(), layout
+        _, _, layout = cache
+        return layout[index] if index in layout else (Table.withdefault(index, type=index), (), 0)
+
     def __padding_Tables(self):
         hdr = self.getparent(StreamHdr)
         cb = hdr['Size'].li.int()
@@ -557,7 +711,12 @@ class HTables(pstruct.type):
 class Table(ptype.definition): cache = {}
 
 ## index types
-class Index(ptype.generic): pass
+class Index(ptype.generic):
+    @classmethod
+    def Fixed(cls, width):
+        '''Return a copy of the index that is always /width/ bytes instead of looking it up in HTables'''
+        return dyn.clone(cls, length=width, blocksize=lambda self, cb=width: cb)
+
 class StreamIndex(Index, pint.uint_t): pass
 class TableIndex(Index): pass
 class CodedIndex(Index): pass
@@ -619,6 +778,11 @@ class TaggedIndex(CodedIndex, pstruct.type):
         # return a uint16_t if the tagged index is able to store the maximum number of rows otherwise use a uint32_t
         return dyn.clone(pint.uint_t, length=1) if count < 2**(16 - self.Tag.width) else dyn.clone(pint.uint_t, length=3)
 
+    @classmethod
+    def Fixed(cls, width):
+        tag = dyn.clone(cls.TagByte, _fields_=[(8 - cls.Tag.width, 'Index'), (cls.Tag, 'Tag')])
+        return dyn.clone(cls, _fields_=[(tag, 'Tag'), (dyn.clone(pint.uint_t, length=width-1), 'Index')])
+
     @classmethod
     def Tables(cls):
         '''Returns the indices of every table that can be represent by this TaggedInex'''
@@ -1096,24 +1260,34 @@ class GenericParamAttributes(pbinary.flags):
 ## table definitions
 class PreCalculatableTable(ptype.generic):
     @classmethod
-    def PreCalculateSize(cls, htables):
-        rows, heapsizes = htables['Rows'].li, htables['HeapSizes'].li
-    
+    def Columns(cls, counts, heapsizes):
+        '''Return the width of each column given the number of rows in each table and the HeapSizes flags'''
         res = []
         for t, name in cls._fields_:
             if issubclass(t, Index):
                 if issubclass(t, StreamIndex):
                     res.append(4 if heapsizes[t.type] else 2)
                 elif issubclass(t, TableIndex):
-                    res.append(2 if rows[t.type].int() < 0x10000 else 4)
+                    res.append(2 if counts[t.type] < 0x10000 else 4)
                 elif issubclass(t, CodedIndex):
-                    count = max(rows[index].int() for index in t.Tables())
+                    count = max(counts[index] for index in t.Tables())
                     res.append(2 if count < 2**(16 - t.Tag.width) else 4)
                 else:
                     raise TypeError((cls, t, name))
                 continue
             res.append(t().a.blocksize())
-        return sum(res)
+        return res
+
+    @classmethod
+    def Fixed(cls, widths):
+        '''Return a copy of the table whose indices are each of the width in /widths/'''
+        fields = [(t.Fixed(width) if issubclass(t, Index) else t, name) for (t, name), width in zip(cls._fields_, widths)]
+        return dyn.clone(cls, _fields_=fields)
+
+    @classmethod
+    def PreCalculateSize(cls, htables):
+        rows, heapsizes = htables['Rows'].li, htables['HeapSizes'].li
+        return sum(cls.Columns([n.int() for n in rows], heapsizes))
 
 @Table.define
 class TModule(PreCalculatableTable, pstruct.type):
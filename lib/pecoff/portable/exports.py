@@ -46,6 +46,8 @@ class IMAGE_EXPORT_DIRECTORY(pstruct.type):
         ( __ExportData, 'ExportData'),
     ]
 
+    __lookup = None     # (.value, {key : ordinal}, {ordinal : entrypoint}, {ordinal : forwarded})
+
     def GetNames(self):
         """Returns a list of all the export names"""
         Header = headers.locateHeader(self)
@@ -86,7 +88,7 @@ class IMAGE_EXPORT_DIRECTORY(pstruct.type):
         data = section.data().l.serialize()
 
         block = data[offset: offset + 4*self['NumberOfFunctions'].int()]
-        return address, array.array('L', block)
+        return address, array.array('I', block)
 
     def Hint(self, index):
         '''Returns the hint/ordinal of the specified export.'''
@@ -212,14 +214,14 @@ class IMAGE_EXPORT_DIRECTORY(pstruct.type):
 
             # convert the aof into an array that's wikiwiki
             data = aof.d.l.cast(dyn.array(dword, len(aof.d)))
-            eat = array.array('L', data.l.serialize())
+            eat = array.array('I', data.l.serialize())
 
             # check that the aof is within the bounds of the section, warn the user despite supporting it anyways
             if any(not section.containsaddress(ea) for ea in (aof.int(), aof.int() + 4*self['NumberOfFunctions'].int())):
                 logging.warn("{:s} : Export Address Table goes outside bounds of designated section. ({:#x} <= {:#x}{:+#x} < {:#x})".format('.'.join((cls.__module__, cls.__name__)), section['VirtualAddress'].int(), aof.int(), aof.int() + 4*self['NumberOfFunctions'].int(), section['VirtualAddress'].int() + section['VirtualSize'].int()))
         else:
             logging.warn("{:s} : No export addresses found in IMAGE_EXPORT_DIRECTORY. ({:s})".format('.'.join((cls.__module__, cls.__name__)), aof.summary()))
-            eat = array.array('L', [])
+            eat = array.array('I', [])
 
         ## name ordinal table
         if aono.int() > 0:
@@ -285,13 +287,47 @@ class IMAGE_EXPORT_DIRECTORY(pstruct.type):
             va += 4
         return
 
+    def __index(self):
+        '''Return the cached ({key : ordinal}, {ordinal : entrypoint}, {ordinal : forwarded}) for each export, building them with .iterate() if necessary.'''
+        value, cache = self.value, self.__lookup
+        if cache is not None and cache[0] is value:
+            _, keys, entrypoints, forwards = cache
+            return keys, entrypoints, forwards
+
+        # each export can be found by its ordinal, name, ordinal name, or where it's forwarded to
+        keys, entrypoints, forwards = {}, {}, {}
+        for _, ordinal, name, ordinalstring, entrypoint, forwarded in self.iterate():
+            for key in (ordinal, name, ordinalstring, forwarded):
+                keys.setdefault(key, ordinal)
+            if ordinal is None:
+                continue
+            entrypoints.setdefault(ordinal, entrypoint)
+            if forwarded is not None:
+                forwards.setdefault(ordinal, forwarded)
+            continue
+        self.__lookup = value, keys, entrypoints, forwards
+        return keys, entrypoints, forwards
+
+    def invalidate(self):
+        '''Discard the cached exports so that they are rebuilt the next time they're searched.
+
+        This needs to be called if any of the tables that the directory points to are modified.
+        '''
+        self.__lookup = None
+
     def search(self, key):
         '''Search the export list for an export that matches key.
 
         Return its index/hint.
         '''
-        for offset, ordinal, name, ordinalstring, value, forwardedrva in self.iterate():
-            if key == ordinal or key == name or key == ordinalstring or key == forwardedrva:
-                return ordinal
-            continue
-        raise KeyError(key)
+        keys, _, _ = self.__index()
+        return keys[key]
+
+    def resolve(self, key):
+        '''Search the export list for an export that matches key.
+
+        Return a tuple of its (entrypoint, forwarded). Only one of them will be defined.
+        '''
+        keys, entrypoints, forwards = self.__index()
+        ordinal = keys[key]
+        return entrypoints.get(ordinal), forwards.get(ordinal)
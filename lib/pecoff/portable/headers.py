@@ -231,9 +231,31 @@ SectionTable = IMAGE_SECTION_HEADER
 class SectionTableArray(parray.type):
     _object_ = IMAGE_SECTION_HEADER
 
+    __index = None  # (.value, utils.intervals by address, utils.intervals by offset)
+
+    def __intervals(self):
+        '''Return the cached (addresses, offsets) interval index of each section, building them if the array was reloaded.'''
+        value, cache = self.value, self.__index
+        if cache is not None and cache[0] is value:
+            _, addresses, offsets = cache
+            return addresses, offsets
+
+        addresses = ptypes.utils.intervals((n['VirtualAddress'].int(), n['VirtualAddress'].int() + n.getloadedsize(), n) for n in value)
+        offsets = ptypes.utils.intervals((n['PointerToRawData'].int(), n['PointerToRawData'].int() + n.getreadsize(), n) for n in value)
+        self.__index = value, addresses, offsets
+        return addresses, offsets
+
+    def invalidate(self):
+        '''Discard the index of each section's address and offset so that it is rebuilt the next time it's searched.
+
+        This needs to be called if the boundaries of any of the sections are modified.
+        '''
+        self.__index = None
+
     def getsectionbyaddress(self, address):
         """Identify the `IMAGE_SECTION_HEADER` by the va specified in /address/"""
-        sections = [n for n in self if n.containsaddress(address)]
+        addresses, _ = self.__intervals()
+        sections = addresses.find(address)
         if len(sections) > 1:
             cls = self.__class__
             logging.warn("{:s} : More than one section was returned for address {:x}".format('.'.join((cls.__module__, cls.__name__)), address))
@@ -243,13 +265,25 @@ class SectionTableArray(parray.type):
 
     def getsectionbyoffset(self, offset):
         """Identify the `IMAGE_SECTION_HEADER` by the file-offset specified in /offset/"""
-        sections = [n for n in self if n.containsoffset(offset)]
+        _, offsets = self.__intervals()
+        sections = offsets.find(offset)
         if len(sections) > 1:
-            logging.warn("{:s} : More than one section was returned for offset {:x}".format('.'.join((cls.__module__, cls.__name__)), address))
+            cls = self.__class__
+            logging.warn("{:s} : More than one section was returned for offset {:x}".format('.'.join((cls.__module__, cls.__name__)), offset))
         if len(sections):
             return sections[0]
         raise KeyError('Offset %x not in a known section'% (offset))
 
+    def getsectionsbyaddress(self, address, size):
+        """Return each `IMAGE_SECTION_HEADER` that overlaps the va range specified by /address/ and /size/"""
+        addresses, _ = self.__intervals()
+        return addresses.overlaps(address, address + size)
+
+    def getsectionsbyoffset(self, offset, size):
+        """Return each `IMAGE_SECTION_HEADER` that overlaps the file-offset range specified by /offset/ and /size/"""
+        _, offsets = self.__intervals()
+        return offsets.overlaps(offset, offset + size)
+
     def getstringbyoffset(self, offset):
         """Fetch the string in the section specified by /offset/"""
         return self.new(pstr.szstring, __name__='string[%x]'% offset, offset=offset + self.getparent(Header).getoffset()).load().serialize()
@@ -206,6 +206,7 @@ class IMAGE_IMPORT_DIRECTORY_ENTRY(pstruct.type):
 
 class IMAGE_IMPORT_DIRECTORY(parray.terminated):
     _object_ = IMAGE_IMPORT_DIRECTORY_ENTRY
+    __lookup = None     # (.value, number of entries, {name : entry})
 
     def isTerminator(self, value):
         data = array.array('B', value.serialize())
@@ -216,16 +217,33 @@ class IMAGE_IMPORT_DIRECTORY(parray.terminated):
             yield entry
         return
 
+    def __index(self):
+        '''Return the cached {name : entry} for each import dll, building it with .iterate() if necessary.'''
+        value, cache = self.value, self.__lookup
+        if cache is not None and cache[0] is value and cache[1] == len(value):
+            _, _, names = cache
+            return names
+
+        names = {}
+        for entry in self.iterate():
+            names.setdefault(entry['Name'].d.li.str(), entry)
+        self.__lookup = value, len(value), names
+        return names
+
+    def invalidate(self):
+        '''Discard the cached import dlls so that they are rebuilt the next time they're searched.
+
+        This needs to be called if the name of any of the import dlls are modified.
+        '''
+        self.__lookup = None
+
     def search(self, key):
         '''
         search the import list for an import dll that matches key
         return the rva
         '''
-        for entry in self.iterate():
-            if key == entry['Name'].d.li.str():
-                return entry
-            continue
-        raise KeyError(key)
+        names = self.__index()
+        return names[key]
 
 class IMAGE_DELAYLOAD_DIRECTORY_ENTRY(pstruct.type):
     def __IAT(self):
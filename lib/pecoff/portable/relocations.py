@@ -3,7 +3,7 @@ from ptypes import ptype,pstruct,pbinary,dyn,parray,bitmap,pint
 
 from ..__base__ import *
 
-import array
+import array,struct,bisect,logging
 
 class MachineRelocation(ptype.definition):
     cache = {}
@@ -198,8 +198,9 @@ class IMAGE_BASERELOC_DIRECTORY_ENTRY(pstruct.type):
     ]
 
     def fetchrelocations(self):
-        block = self['Relocations'].serialize()
-        relocations = array.array('H').fromstring(block)
+        relocations = array.array('H', self['Relocations'].serialize())
+        if sys.byteorder == 'big':
+            relocations.byteswap()
         return [((v&0xf000)/0x1000, v&0x0fff) for v in relocations]
 
     def getrelocations(self, section):
@@ -259,51 +260,132 @@ if False:       # deprecated because we would like to be able to separate segmen
 
 class IMAGE_BASERELOC_DIRECTORY(parray.block):
     _object_ = IMAGE_BASERELOC_DIRECTORY_ENTRY
+
+    # the size of the value modified by each type of relocation
+    __sizes__ = {1 : 2, 2 : 2, 3 : 4, 4 : 2, 10 : 8}
+
+    __fixups = None     # (.value, rvas, types, adjustments)
+
     def getbysection(self, section):
         return ( entry for entry in self if section.containsaddress(entry['Page RVA'].int()) )
 
+    def fixups(self):
+        """Return the address and type of every relocation in the directory.
+
+        The result is an array of rvas, an array of the relocation type for
+        each rva, and a dictionary of the low 16 bits for each HIGHADJ
+        relocation keyed by its rva. They are sorted by rva and ABSOLUTE
+        relocations are skipped.
+        """
+        if self.__fixups is not None and self.__fixups[0] is self.value:
+            return self.__fixups[1:]
+
+        data, offset, res, adjustments = self.serialize(), 0, [], {}
+        while offset + 8 <= len(data):
+            page, size = struct.unpack_from('<II', data, offset)
+            if size < 8:
+                break
+            entries = array.array('H', data[offset + 8 : offset + size - (size % 2)])
+            if sys.byteorder == 'big':
+                entries.byteswap()
+
+            # HIGHADJ uses the entry that follows it for the low 16 bits of its adjustment
+            if any(item >> 12 == 4 for item in entries):
+                iterable = iter(entries)
+                for item in iterable:
+                    if item >> 12 == 4:
+                        adjustments[page + (item & 0xfff)] = next(iterable, 0)
+                    res.append((page + (item & 0xfff), item >> 12))
+            else:
+                res.extend((page + (item & 0xfff), item >> 12) for item in entries)
+            offset += size
+
+        if any(a > b for a, b in zip(res[:-1], res[1:])):
+            res.sort()
+        rvas, types = array.array('I', (rva for rva, type in res if type)), array.array('B', (type for _, type in res if type))
+        self.__fixups = self.value, rvas, types, adjustments
+        return rvas, types, adjustments
+
     def relocate(self, data, section, namespace):
-        if not isinstance(data, array.array):
+        """Apply the relocations for ``section`` to ``data``, the section's contents as an array.array or bytearray.
+
+        Each target is moved to the address that ``namespace`` maps the name
+        of the section containing it to. HIGH, LOW, and HIGHADJ relocations
+        only contain part of their target, so they can only be applied when
+        every section is moved by the same amount.
+        """
+        if not isinstance(data, (array.array, bytearray)):
             raise AssertionError("Type of argument `data` must of an instance of {!r} : not isinstance({!r}, array.array)".format(array.array, data.__class__))
+        size = len(data) * (data.itemsize if isinstance(data, array.array) else 1)
 
-        sectionname = section['Name'].str()
         imagebase = self.getparent(Header)['OptionalHeader']['ImageBase'].int()
-
         sectionarray = section.parent
-        sectionvaLookup = dict( ((s['Name'].str(),s['VirtualAddress'].int()) for s in sectionarray) )
-
-        # relocation type 3
-        t = relocationtype()
-        t.length = 4
-        t.write = lambda o, b: t._write(o+b)
-
-        for entry in self.getbysection(section):
-            for type,offset in entry.getrelocations(section):
-                if type != 3:
-                    raise NotImplementedError("Relocations other than type 3 aren't implemented because I couldn't find any to test with")
-                currentva = sectionvaLookup[sectionname]+offset
 
-                targetrva = t.read(data, offset)
-                targetva = targetrva-imagebase
-
-                try:
-                    targetsection = sectionarray.getsectionbyaddress(targetrva-imagebase)
-
-                except KeyError:
-                    currentrva = imagebase+currentva
-                    print "Relocation target at {:#x} to {:#x} lands outside section space".format(currentrva, targetrva)
-
-                    # XXX: is it possible to hack support for relocations to the
-                    #      'mz' header into this? that only fixes that case...but why else would you legitimately need something outside a section?
-                    continue
+        # sort each section by its address so that a target can be found by bisection
+        sections = sorted((n['VirtualAddress'].int(), n['VirtualAddress'].int() + n.getloadedsize(), n['Name'].str()) for n in sectionarray)
+        starts, deltas = [left for left, _, _ in sections], {}
+        def delta(rva):
+            index = bisect.bisect_right(starts, rva) - 1
+            if index < 0 or rva >= sections[index][1]:
+                return None
+            left, _, name = sections[index]
+            if name not in deltas:
+                deltas[name] = namespace[name] - left
+            return deltas[name]
+
+        # select the relocations within the section
+        rvas, types, adjustments = self.fixups()
+        va = section['VirtualAddress'].int()
+        lo, hi = bisect.bisect_left(rvas, va), bisect.bisect_left(rvas, va + section.getloadedsize())
+
+        groups = {}
+        for rva, type in zip(rvas[lo : hi], types[lo : hi]):
+            groups.setdefault(type, []).append(rva)
+
+        for type, items in sorted(groups.items()):
+            if type not in self.__sizes__:
+                raise NotImplementedError("Relocations of type {:d} are not implemented".format(type))
+            length = self.__sizes__[type]
+            items = [rva for rva in items if rva - va + length <= size]
+            if not items:
+                continue
 
-                targetsectionname = targetsection['Name'].str()
-                targetoffset = targetva - sectionvaLookup[targetsectionname]
+            # read every value with a single structure that skips the bytes between them
+            offsets = [rva - va for rva in items]
+            gaps = [b - (a + length) for a, b in zip(offsets[:-1], offsets[1:])]
+            code = {2 : 'H', 4 : 'I', 8 : 'Q'}[length]
+            if all(gap >= 0 for gap in gaps):
+                format = '<' + code + str().join('{:d}x{:s}'.format(gap, code) if gap else code for gap in gaps)
+                values = struct.unpack_from(format, data, offsets[0])
+            else:
+                values = [struct.unpack_from('<' + code, data, offset)[0] for offset in offsets]
+
+            # HIGHLOW and DIR64 contain their entire target
+            if type in {3, 10}:
+                mask = (1 << 8 * length) - 1
+                for rva, offset, value in zip(items, offsets, values):
+                    target = value - imagebase
+                    res = delta(target)
+                    if res is None:
+                        logging.warning("{:s} : Relocation target at {:#x} to {:#x} lands outside section space".format('.'.join((self.__class__.__module__, self.__class__.__name__)), imagebase + rva, value))
+                        continue
+                    struct.pack_into('<' + code, data, offset, (target + res) & mask)
+                continue
 
-#                relo = t.write(targetva, imagebase)
-                relo = t.write(targetoffset, namespace[targetsectionname])
-                data[offset : offset + len(relo)] = array.array('c',relo)
+            # everything else needs the same delta for every section
+            res = set(delta(left) for left, _, _ in sections)
+            if len(res) != 1:
+                raise NotImplementedError("Relocations of type {:d} can only be applied when every section is moved by the same amount".format(type))
+            res, = res
+            res -= imagebase
+            if type == 1:
+                values = [((value << 16) + res) >> 16 for value in values]
+            elif type == 2:
+                values = [value + res for value in values]
+            elif type == 4:
+                extend = lambda low: low - 0x10000 if low & 0x8000 else low
+                values = [((value << 16) + extend(adjustments[rva]) + res + 0x8000) >> 16 for rva, value in zip(items, values)]
+            for offset, value in zip(offsets, values):
+                struct.pack_into('<H', data, offset, value & 0xffff)
             continue
-
         return data
-
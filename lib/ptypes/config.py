@@ -219,6 +219,8 @@ class defaults:
 
     class pstruct:
         use_offset_on_duplicate = field.bool('use_offset_on_duplicate', 'If more than one field has the same name, then suffix the field by it\'s offset. Otherwise use the field\'s index.')
+        lazy = field.bool('lazy', 'Only load the fields of a structure when they are accessed. A structure\'s `lazy` attribute takes precedence over this.')
+        compiled = field.bool('compiled', 'Load a structure whose fields are all of a fixed size with a single read and only create each field when it is accessed. A structure\'s `compiled` attribute takes precedence over this.')
 
     class display:
         show_module_name = field.bool('show_module_name', 'include the full module name in the summary')
@@ -289,6 +291,8 @@ defaults.parray.max_count = six.MAXSIZE
 
 # structures
 defaults.pstruct.use_offset_on_duplicate = True
+defaults.pstruct.lazy = False
+defaults.pstruct.compiled = True
 
 # root types
 defaults.ptype.noncontiguous = False
@@ -308,7 +308,7 @@ class union(_union_generic):
         res = self._value_
         if res is None:
             # if the blocksize method is not modified, then allocate all fields and choose the largest
-            if getattr(self.blocksize, 'im_func', None) is ptype.container.blocksize.im_func:
+            if getattr(self.blocksize, 'im_func', None) is union.blocksize.im_func:
                 iterable = (self.new(t) for t in objects)
                 size = max(n.a.blocksize() for n in iterable)
                 return clone(ptype.block, length=size)
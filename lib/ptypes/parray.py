@@ -28,6 +28,9 @@ required to provide an array-type interface.
         def pop(self, index):
             '''Removes and returns the instance at the specified index of the array.'''
 
+        def columns(self, *names):
+            '''Returns the integers of the fields ``names`` from every structure in the array as columns.'''
+
 There are a couple of array types that can be used to describe the different data structures
 one may encounter. They are as following:
 
@@ -53,6 +56,11 @@ one may encounter. They are as following:
                     the array to read past it's .blocksize(), the sub-element
                     will remain partially uninitialized.
 
+    parray.packed -- An array of fixed-size integers (/self._object_/ must be
+                     a pint.type) that are stored within a single array.array.
+                     Elements are only instantiated when they are accessed,
+                     and .int() returns all of them at once.
+
 Example usage:
     # define a basic type
     from ptypes import parray
@@ -72,6 +80,11 @@ Example usage:
         def blocksize(self):
             return size-of-array
 
+    # define a packed array of integers
+    class packed(parray.packed):
+        _object_ = pint.uint32_t
+        length = count
+
     # instantiate and load a type
     instance = type()
     instance.load()
@@ -83,12 +96,27 @@ Example usage:
     print len(instance)
 """
 import six
+import sys,array,struct,collections
 import itertools,operator,functools
 
-from . import ptype,utils,error,config
+from . import ptype,pint,utils,error,config
 Config = config.defaults
 Log = Config.log.getChild(__name__[len(__package__)+1:])
-__all__ = 'type,terminated,infinite,block'.split(',')
+
+# numpy is optional, and is only used to return the columns of parray.type.columns
+try:
+    import numpy
+except ImportError:
+    numpy = None
+__all__ = 'type,terminated,infinite,block,packed'.split(',')
+
+# array typecodes that are available for storing the elements of a parray.packed
+__typecodes__ = {}
+for code in 'bBhHiIlLqQ':
+    try: __typecodes__[code] = array.array(code).itemsize
+    except ValueError: pass
+    continue
+del(code)
 
 class _parray_generic(ptype.container):
     '''provides the generic features expected out of an array'''
@@ -110,6 +138,7 @@ class _parray_generic(ptype.container):
         object.setoffset(offset, recurse=True)
         object.parent,object.source = self,None
         self.value.insert(index, object)
+        self.__invalidate__()
 
         for i in six.moves.range(index, len(self.value)):
             v = self.value[i]
@@ -145,6 +174,7 @@ class _parray_generic(ptype.container):
         # determine the correct index
         idx = self.value.index(self.value[index])
         res = self.value.pop(idx)
+        self.__invalidate__()
 
         offset = res.getoffset()
         for i,n in enumerate(self.value[idx:]):
@@ -161,6 +191,7 @@ class _parray_generic(ptype.container):
             for idx in six.moves.range(*slice(index.start or 0, index.stop, index.step or 1).indices(index.stop)):
                 realidx = self.__getindex__(idx)
                 self.value.pop( self.value.index(origvalue[realidx]) )
+            self.__invalidate__()
             return origvalue.__getitem__(index)
         return self.pop(index)
 
@@ -171,6 +202,7 @@ class _parray_generic(ptype.container):
             for idx in six.moves.range(*slice(index.start or 0, index.stop, index.step or 1).indices(index.stop)):
                 idx = self.__getindex__(idx)
                 self.value[idx] = six.next(ivalue)
+            self.__invalidate__()
             return res.__getitem__(index)
 
         idx = self.__getindex__(index)
@@ -343,6 +375,93 @@ class type(_parray_generic):
         result.length = len(self)
         return self
 
+    ## bulk access
+    def columns(self, *names):
+        """Return a column for each of the fields in ``names`` containing the integer of that field from every element.
+
+        The ._object_ of the array must be a pstruct.type with fields that are
+        all of a fixed size, and each field in ``names`` must be an integer.
+        The fields are decoded directly from the serialized array (or from the
+        source if the array hasn't been loaded) without creating any elements.
+        Each column is a numpy.ndarray if NumPy is available, otherwise it is
+        an array.array (or a list if there isn't a typecode of the right size).
+        """
+        from . import pstruct
+        obj = self._object_
+        layout = obj.__layout__() if ptype.istype(obj) and issubclass(obj, pstruct.type) else None
+        if layout is None:
+            raise error.TypeError(self, 'type.columns', message='{!r} is not a structure with fields that are all of a fixed size'.format(obj))
+        size, fields = sum(n for _, _, _, n in layout), {name.lower() : (t, offset) for t, name, offset, _ in layout}
+
+        # figure out how each of the requested fields is encoded
+        columns = []
+        for name in names:
+            if name.lower() not in fields:
+                raise KeyError(name)
+            t, offset = fields[name.lower()]
+            res = self.__column(t)
+            if res is None:
+                raise error.TypeError(self, 'type.columns', message='Field {!r} of {!r} is not an integer that is 1, 2, 4, or 8 bytes in length'.format(name, obj))
+            columns.append((offset,) + res)
+
+        # if we're not loaded, then read the elements from the source instead of creating them
+        if self.value is None:
+            if self.length is None:
+                raise error.InitializationError(self, 'type.columns')
+            try:
+                self.source.seek(self.getoffset())
+                data = self.source.consume(self.length * size)
+            except (StopIteration, error.ProviderError), e:
+                raise error.LoadError(self, consumed=self.length * size, exception=e)
+        else:
+            data = self.serialize()
+        count = len(data) // size if size else 0
+
+        # numpy can decode all of the columns at once with a structured dtype
+        if numpy is not None:
+            dtype = numpy.dtype({
+                'names' : ['f{:d}'.format(index) for index in six.moves.range(len(columns))],
+                'formats' : ['{:s}{:s}{:d}'.format(order, 'i' if signed else 'u', length) for _, order, signed, length in columns],
+                'offsets' : [offset for offset, _, _, _ in columns],
+                'itemsize' : size,
+            })
+            res = numpy.frombuffer(data, dtype=dtype, count=count)
+            return tuple(res[name].copy() for name in dtype.names)
+
+        # otherwise use struct to unpack the fields of each byteorder, and then split them into columns
+        result = {}
+        for order in sorted({order for _, order, _, _ in columns}):
+            unique = sorted({(offset, signed, length) for offset, o, signed, length in columns if o == order})
+            format, position = str(), 0
+            for offset, signed, length in unique:
+                format += ('{:d}x'.format(offset - position) if offset > position else '') + dict(zip((1, 2, 4, 8), 'bhiq' if signed else 'BHIQ'))[length]
+                position = offset + length
+            format += '{:d}x'.format(size - position) if size > position else ''
+
+            # unpack a number of elements at a time so that the format doesn't get too large
+            values, chunk = [[] for _ in unique], min(count, 0x1000)
+            for index in six.moves.range(0, count, chunk or 1):
+                total = min(chunk, count - index)
+                res = struct.unpack_from(order + format * total, data, index * size)
+                for item, column in enumerate(values):
+                    column.extend(res[item :: len(unique)])
+                continue
+
+            for (offset, signed, length), column in zip(unique, values):
+                codes = [ code for code in ('bhilq' if signed else 'BHILQ') if __typecodes__.get(code) == length ]
+                result[offset, order, signed, length] = array.array(codes[0], column) if codes else column
+            continue
+        return tuple(result[column] if columns.count(column) == 1 else result[column][:] for column in columns)
+
+    @staticmethod
+    def __column(t):
+        '''Return the (byteorder, signed, length) that the integer type ``t`` is encoded with, or None if it isn't an integer.'''
+        while ptype.istype(t) and issubclass(t, ptype.wrapper_t):
+            t = t._value_
+        if not (ptype.istype(t) and issubclass(t, pint.type)) or getattr(t, 'length', 0) not in (1, 2, 4, 8):
+            return None
+        return '>' if t.byteorder is config.byteorder.bigendian else '<', issubclass(t, pint.sinteger_t), t.length
+
     def __getstate__(self):
         return super(type, self).__getstate__(), self._object_, self.length
 
@@ -623,6 +742,372 @@ class block(uninitialized):
     def initializedQ(self):
         return super(block, self).initializedQ() and (self.size() >= self.blocksize() if self.length is None else len(self.value) == self.length)
 
+class packed(type):
+    '''
+    An array of fixed-size integers that are stored within a single array.array.
+
+    The ._object_ property must be a pint.type that is 1, 2, 4, or 8 bytes in
+    length. Each element is only instantiated when it is fetched through
+    .__getitem__ or .__iter__, and all of the elements can be accessed at once
+    by using the .int() method. Accessing the .value property will instantiate
+    every element in the array.
+
+    Settable properties:
+        _object_:pint.type<w>
+            The integer type of each element of the array
+        length:int<w>
+            The length of the array only used during initialization of the object
+    '''
+    __packed__ = None   # array.array or list of integers
+    __cache__ = None    # {index : element}
+
+    class __elements(collections.Sequence):
+        '''A sequence that instantiates the elements of a packed array as they are accessed'''
+        def __init__(self, array):
+            self.array = array
+        def __len__(self):
+            return len(self.array.__packed__)
+        def __getitem__(self, index):
+            if isinstance(index, slice):
+                return [ self[idx] for idx in six.moves.range(*index.indices(len(self))) ]
+            idx = index + len(self) if index < 0 else index
+            if not 0 <= idx < len(self):
+                raise IndexError(index)
+            return self.array.__getelement__(idx)
+
+    # the elements that compose .value are only instantiated when requested
+    @property
+    def value(self):
+        if self.__packed__ is None:
+            return None
+        return self.__elements(self)
+    @value.setter
+    def value(self, value):
+        if value is None:
+            self.__packed__, self.__cache__ = None, None
+            return
+        self.__packed__ = self.__decode(str().join(n.serialize() for n in value))
+        self.__cache__ = { index : n for index, n in enumerate(value) }
+
+    ## integer encoding
+    def __format(self):
+        '''Return the (typecode, structformat, swapped) used for encoding the elements of the array'''
+        obj = self._object_
+        if not (ptype.istype(obj) and issubclass(obj, pint.type)) or getattr(obj, 'length', 0) not in (1, 2, 4, 8):
+            raise error.TypeError(self, 'packed.__format', message='{!r} is not an integer that is 1, 2, 4, or 8 bytes in length'.format(obj))
+
+        signed = issubclass(obj, pint.sinteger_t)
+        codes = [ code for code in ('bhilq' if signed else 'BHILQ') if __typecodes__.get(code) == obj.length ]
+        order = '>' if obj.byteorder is config.byteorder.bigendian else '<'
+        native = '>' if sys.byteorder == 'big' else '<'
+        format = order + dict(zip((1, 2, 4, 8), 'bhiq' if signed else 'BHIQ'))[obj.length]
+        return codes[0] if codes else None, format, order != native
+
+    def __decode(self, data):
+        typecode, format, swapped = self.__format()
+        if typecode is None:
+            count = len(data) // struct.calcsize(format)
+            return list(struct.unpack(format[0] + format[1:] * count, data))
+        res = array.array(typecode, data)
+        if swapped: res.byteswap()
+        return res
+
+    def __encode(self, integers):
+        typecode, format, swapped = self.__format()
+        if typecode is None:
+            return struct.pack(format[0] + format[1:] * len(integers), *integers)
+        res = integers if isinstance(integers, array.array) else array.array(typecode, integers)
+        if swapped:
+            res = array.array(typecode, res)
+            res.byteswap()
+        return res.tostring()
+
+    def __integer(self, integer):
+        '''Clamp ``integer`` to the range of an element within the array'''
+        bits = 8 * self._object_.length
+        res = integer & ((1 << bits) - 1)
+        if issubclass(self._object_, pint.sinteger_t) and res & (1 << (bits - 1)):
+            return res - (1 << bits)
+        return res
+
+    ## element management
+    def __getelement__(self, index):
+        '''Return the element at ``index`` instantiating it if necessary'''
+        try:
+            return self.__cache__[index]
+        except KeyError:
+            pass
+        res = self.new(self._object_, __name__=str(index), offset=self.getoffset() + index * self._object_.length)
+        res.__deserialize_block__(self.__encode(self.__packed__[index : index + 1]))
+        return self.__cache__.setdefault(index, res)
+
+    def __flush(self):
+        '''Update the packed integers with the values of any elements that were instantiated'''
+        for index, n in six.iteritems(self.__cache__ or {}):
+            if n.initializedQ():
+                self.__packed__[index] = self.__integer(n.int())
+            continue
+        return
+
+    def __shift(self, index, count):
+        '''Move all the instantiated elements at or after ``index`` by ``count`` elements'''
+        size, cache = self._object_.length, {}
+        for i, n in six.iteritems(self.__cache__):
+            if i >= index:
+                i += count
+                n.__name__ = str(i)
+                n.setoffset(self.getoffset() + i * size)
+            cache[i] = n
+        self.__cache__ = cache
+
+    def __getindex__(self, index):
+        if not isinstance(index, six.integer_types):
+            raise error.UserError(self, 'packed.__getindex__', message='Element indices must be of an integral type.')
+        return index + len(self) if index < 0 else index
+
+    ## bulk access
+    def int(self):
+        '''Return a copy of all the elements in the array as integers'''
+        if self.__packed__ is None:
+            raise error.InitializationError(self, 'packed.int')
+        self.__flush()
+        return self.__packed__[:]
+
+    def __getvalue__(self):
+        return tuple(self.int())
+
+    def __setvalue__(self, *value):
+        """Update self with the integers in the first argument of ``value``.
+
+        If ``value`` is a dict, then only the elements at the specified indices are updated.
+        """
+        value, = value
+        if isinstance(value, dict):
+            if self.__packed__ is None:
+                self.alloc()
+            for index, integer in six.iteritems(value):
+                self[index] = integer
+            return self
+
+        typecode, _, _ = self.__format()
+        integers = [ self.__integer(n.int() if isinstance(n, ptype.generic) else n) for n in value ]
+
+        length, self.__cache__ = self.length, {}
+        self.__packed__ = integers if typecode is None else array.array(typecode, integers)
+
+        # output a warning if the length is already set to something and the user explicitly changed it to something different.
+        if length and length != len(integers):
+            Log.warn("packed.__setvalue__ : {:s} : Length of array was explicitly changed. : {:d} != {:d}".format(self.instance(), length, len(integers)))
+        self.length = len(integers)
+        return self
+
+    ## list interface
+    def __len__(self):
+        return self.length if self.__packed__ is None else len(self.__packed__)
+
+    def __contains__(self, v):
+        return any(n is v for n in six.itervalues(self.__cache__ or {}))
+
+    def __iter__(self):
+        if self.__packed__ is None:
+            raise error.InitializationError(self, 'packed.__iter__')
+        for index in six.moves.range(len(self.__packed__)):
+            yield self.__getelement__(index)
+        return
+
+    def __getitem__(self, index):
+        if self.__packed__ is None:
+            raise error.InitializationError(self, 'packed.__getitem__')
+
+        if isinstance(index, slice):
+            start, _, step = index.indices(len(self))
+            self.__flush()
+            res = self.new(ptype.clone(packed, _object_=self._object_), offset=self.getoffset() + start * self._object_.length)
+            return res.__setvalue__(self.__packed__[index])
+
+        idx = self.__getindex__(index)
+        if not 0 <= idx < len(self.__packed__):
+            raise IndexError(index)
+        return self.__getelement__(idx)
+
+    def __setitem__(self, index, value):
+        if self.__packed__ is None:
+            raise error.InitializationError(self, 'packed.__setitem__')
+
+        if isinstance(index, slice):
+            ivalue = itertools.repeat(value) if isinstance(value, (ptype.generic,) + six.integer_types) else iter(value)
+            res = self[index]
+            for idx in six.moves.range(*index.indices(len(self))):
+                self[idx] = six.next(ivalue)
+            return res
+
+        idx = self.__getindex__(index)
+        if not 0 <= idx < len(self.__packed__):
+            raise IndexError(index)
+
+        # if we were given an integer, then update the element in place
+        if isinstance(value, six.integer_types):
+            self.__packed__[idx] = res = self.__integer(value)
+            if idx in self.__cache__:
+                self.__cache__[idx].set(res)
+            return res
+
+        # otherwise we were given a type or an instance to store
+        if ptype.isresolveable(value) or ptype.istype(value):
+            value = self.new(value).a
+        if not isinstance(value, ptype.generic):
+            raise error.TypeError(self, 'packed.__setitem__', message='Unable to assign a {!r} to an element of the array'.format(value.__class__))
+
+        value.setoffset(self.getoffset() + idx * self._object_.length)
+        value.parent, value.source, value.__name__ = self, None, str(index)
+        self.__packed__[idx] = self.__integer(value.int())
+        self.__cache__[idx] = value
+        return value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            res = self[index]
+            for idx in sorted(six.moves.range(*index.indices(len(self))), reverse=True):
+                self.pop(idx)
+            return res
+        return self.pop(index)
+
+    def insert(self, index, object):
+        """Insert ``object`` into ``self`` at the specified ``index``."""
+        if self.__packed__ is None:
+            raise error.InitializationError(self, 'packed.insert')
+        idx = min(self.__getindex__(index), len(self.__packed__))
+        self.__flush()
+        self.__shift(idx, +1)
+        self.__packed__.insert(idx, 0)
+        self.length = len(self.__packed__)
+        self[idx] = object
+
+    def __append__(self, object):
+        if self.__packed__ is None:
+            self.__setvalue__(())
+        self.__flush()
+        self.__packed__.append(0)
+        self.length, idx = len(self.__packed__), len(self.__packed__) - 1
+        self[idx] = object
+        return idx
+
+    def pop(self, index=-1):
+        """Remove the element at ``index`` or the last element in the array."""
+        if self.__packed__ is None:
+            raise error.InitializationError(self, 'packed.pop')
+        idx = self.__getindex__(index)
+        res = self[idx]
+        self.__flush()
+        del(self.__cache__[idx])
+        self.__shift(idx + 1, -1)
+        self.__packed__.pop(idx)
+        self.length = len(self.__packed__)
+        return res
+
+    ## offsets
+    def getoffset(self, *field, **options):
+        if not len(field):
+            return super(packed, self).getoffset()
+        (field,) = field
+
+        # if a path is specified, then descend into the element
+        if isinstance(field, (tuple, list)):
+            (index, res) = (lambda hd,*tl:(hd,tl))(*field)
+            return self[index].getoffset(res) if len(res) > 0 else self.getoffset(index)
+        return self.getoffset() + self.__getindex__(field) * self._object_.length
+
+    def setposition(self, offset, recurse=False):
+        # skip ptype.container as it would instantiate every element
+        res = super(ptype.container, self).setposition(offset, recurse=recurse)
+        for index, n in six.iteritems(self.__cache__ or {}):
+            n.setoffset(offset[0] + index * self._object_.length)
+        return res
+
+    def at(self, offset, recurse=True, **kwds):
+        if not self.contains(offset):
+            raise error.NotFoundError(self, 'packed.at', 'offset {:#x} can not be located within container.'.format(offset))
+        index = (offset - self.getoffset()) // self._object_.length
+        if self.__packed__ is None or index >= len(self.__packed__):
+            raise error.NotFoundError(self, 'packed.at', 'offset {:#x} not found in a child element. returning encompassing parent.'.format(offset))
+        return self.__getelement__(index)
+
+    ## sizes
+    def initializedQ(self):
+        return self.__packed__ is not None and len(self.__packed__) >= self.length
+
+    def size(self):
+        return 0 if self.__packed__ is None else len(self.__packed__) * self._object_.length
+
+    def blocksize(self):
+        return self.length * self._object_.length
+
+    ## loading and storing
+    def __deserialize_block__(self, block):
+        if isinstance(block, memoryview):
+            block = block.tobytes()
+
+        bs, size = self.blocksize(), self._object_.length
+        data = block[:bs]
+        self.__packed__, self.__cache__ = self.__decode(data[: len(data) - len(data) % size]), {}
+        if len(data) < bs:
+            raise StopIteration(self.name(), len(data))
+        return self
+
+    def serialize(self):
+        bs = self.blocksize()
+        if self.__packed__ is None:
+            return utils.padding.fill(bs, self.padding)
+
+        self.__flush()
+        data = self.__encode(self.__packed__)
+        if len(data) < bs:
+            Log.debug('packed.serialize : {:s} : Padding data by {:+#x} bytes due to element being partially initialized during serialization.'.format(self.instance(), bs - len(data)))
+            data += utils.padding.fill(bs - len(data), self.padding)
+        return data
+
+    def load(self, **attrs):
+        # skip ptype.container as our elements are contiguous
+        try:
+            return super(ptype.container, self).load(**attrs)
+
+        # we failed out, so log what happened according to how much was read
+        except error.LoadError, e:
+            ofs, s, bs = self.getoffset(), self.size(), self.blocksize()
+            if s > 0 and s < bs:
+                Log.warning('packed.load : {:s} : Unable to complete read at {{{:x}:{:+x}}} : {!r}'.format(self.instance(), ofs, s, e))
+            else:
+                Log.debug('packed.load : {:s} : Cropped to {{{:x}:{:+x}}} : {!r}'.format(self.instance(), ofs, s, e))
+        return self
+
+    def commit(self, **attrs):
+        return super(ptype.container, self).commit(**attrs)
+
+    def alloc(self, fields=(), **attrs):
+        attrs.setdefault('source', ptype.provider.empty())
+        result = self.load(**attrs)
+        iterable = fields if len(fields) > 0 and isinstance(fields[0], tuple) else enumerate(fields)
+        for index, value in iterable:
+            result[index] = value
+        return result
+
+    def copy(self, **attrs):
+        attrs.setdefault('value', None)
+        result = super(ptype.container, self).copy(**attrs)
+        result._object_, result.length = self._object_, self.length
+        if self.__packed__ is not None:
+            self.__flush()
+            result.__packed__, result.__cache__ = self.__packed__[:], {}
+        return result
+
+    def __getstate__(self):
+        return super(packed, self).__getstate__(), self.int() if self.__packed__ is not None else None
+
+    def __setstate__(self, state):
+        state, self.__packed__ = state
+        self.__cache__ = None if self.__packed__ is None else {}
+        super(packed, self).__setstate__(state)
+
 if __name__ == '__main__':
     class Result(Exception): pass
     class Success(Result): pass
@@ -1132,6 +1617,127 @@ if __name__ == '__main__':
         if a.initializedQ() and a.serialize() == '':
             raise Success
 
+    @TestCase
+    def test_array_packed_load():
+        class blah(parray.packed):
+            _object_ = pint.uint32_t
+            length = 4
+        data = str().join(pint.uint32_t().set(i).serialize() for i in six.moves.range(4))
+        a = blah(source=provider.string(data)).l
+        if list(a.int()) == [0,1,2,3] and a.serialize() == data and a.size() == 16:
+            raise Success
+
+    @TestCase
+    def test_array_packed_lazy():
+        class blah(parray.packed):
+            _object_ = pint.uint16_t
+            length = 8
+        a = blah(offset=8, source=provider.string('\x00'*8 + 'AABBCCDDEEFFGGHH')).l
+        if len(a.__cache__) == 0 and a[3].serialize() == 'DD' and a[3].getoffset() == 14 and a[-1] is a[7] and len(a.__cache__) == 2:
+            raise Success
+
+    @TestCase
+    def test_array_packed_bigendian():
+        class blah(parray.packed):
+            _object_ = pint.bigendian(pint.sint16_t)
+            length = 2
+        a = blah(source=provider.string('\xff\xfe\x00\x01')).l
+        if tuple(a.get()) == (-2, 1) and a[0].int() == -2:
+            raise Success
+
+    @TestCase
+    def test_array_packed_set():
+        class blah(parray.packed):
+            _object_ = pint.uint8_t
+        a = blah().set((0x41,0x42,0x43,0x144))
+        if len(a) == 4 and a.serialize() == 'ABCD':
+            raise Success
+
+    @TestCase
+    def test_array_packed_element_set():
+        class blah(parray.packed):
+            _object_ = pint.uint8_t
+            length = 4
+        a = blah().a
+        a[1].set(0x41)
+        a[2] = 0x42
+        a[3] = pint.uint8_t().set(0x43)
+        if a.serialize() == '\x00ABC' and a[2].int() == 0x42:
+            raise Success
+
+    @TestCase
+    def test_array_packed_commit():
+        class blah(parray.packed):
+            _object_ = pint.uint16_t
+            length = 2
+        source = provider.string('\x00'*8)
+        a = blah(offset=2, source=source).l
+        a.set((0x4141, 0x4242))
+        a.commit()
+        if source.value == '\x00\x00AABB\x00\x00':
+            raise Success
+
+    @TestCase
+    def test_array_packed_partial():
+        class blah(parray.packed):
+            _object_ = pint.uint32_t
+            length = 4
+        a = blah(source=provider.string('A'*10)).l
+        if not a.initializedQ() and len(a) == 2 and a.serialize() == 'A'*8 + '\x00'*8:
+            raise Success
+
+    @TestCase
+    def test_array_packed_at():
+        class blah(parray.packed):
+            _object_ = pint.uint32_t
+            length = 16
+        a = blah(offset=0x100).a
+        if a.at(0x10a) is a[2] and a.getoffset(5) == 0x114:
+            raise Success
+
+    @TestCase
+    def test_array_packed_container():
+        class blah(parray.packed):
+            _object_ = pint.uint16_t
+            length = 2
+        class st(pstruct.type):
+            _fields_ = [(pint.uint8_t, 'a'), (blah, 'b'), (pint.uint8_t, 'c')]
+        a = st(source=provider.string('\x01AABB\x02')).l
+        if a['b'][1].serialize() == 'BB' and a['b'][1].getoffset() == 3 and a['c'].int() == 2 and a.serialize() == '\x01AABB\x02':
+            raise Success
+
+    @TestCase
+    def test_array_packed_insert_pop():
+        class blah(parray.packed):
+            _object_ = pint.uint8_t
+        a = blah().set((0x41,0x43))
+        c = a[1]
+        a.insert(1, 0x42)
+        a.append(0x44)
+        b = a.pop(0)
+        if a.serialize() == 'BCD' and b.int() == 0x41 and c.getoffset() == 1 and a[1] is c:
+            raise Success
+
+
+    @TestCase
+    def test_array_columns():
+        class st(pstruct.type):
+            _fields_ = [
+                (pint.littleendian(pint.uint16_t), 'a'),
+                (pint.uint8_t, 'b'),
+                (pint.bigendian(pint.int32_t), 'c'),
+            ]
+        class argh(parray.type):
+            _object_, length = st, 3
+        data = '\x01\x00A\xff\xff\xff\xff\x02\x00B\x00\x00\x00\x02\x03\x00C\x00\x00\x01\x00'
+        a, c = argh(source=provider.string(data)).columns('A', 'c')
+        if list(a) != [1, 2, 3] or list(c) != [-1, 2, 0x100]:
+            raise Failure
+        x = argh(source=provider.string(data)).l
+        x[1]['b'].set(ord('Z'))
+        b, = x.columns('b')
+        if list(b) == [ord('A'), ord('Z'), ord('C')]:
+            raise Success
 
 if __name__ == '__main__':
     import logging
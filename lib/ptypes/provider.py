@@ -52,8 +52,9 @@ Example usage:
 """
 import six
 import sys,os
-import itertools,operator,functools
+import itertools,operator,functools,collections
 import array,exceptions,random as _random
+import bisect,struct
 from six.moves import builtins
 
 from . import config,utils,error
@@ -431,6 +432,9 @@ class stream(base):
         return self.source.write(data)
 
     def __getattr__(self, name):
+        # the source's .view isn't forwarded since it would read from the source's offset instead of ours.
+        if name == 'view':
+            raise AttributeError(name)
         return getattr(self.source, name)
 
     ###
@@ -521,6 +525,103 @@ class iterable(stream):
         Log.info('iter._write : Tried to write {:+x} bytes to an iterator'.format(len(data)))
         return len(data)
 
+class cached(base):
+    """Provider that caches aligned pages read from another provider.
+
+    Reading from this provider will read entire pages of ``pagesize`` bytes
+    from the ``source`` provider and keep the ``maxpages`` most recently used
+    ones. Storing to this provider writes through to the ``source`` and discards
+    any pages that were modified. The number of times a page was found in
+    the cache, had to be read, or was evicted is kept in .hits, .misses,
+    and .evictions.
+    """
+    offset = 0
+    hits = misses = evictions = 0
+
+    def __init__(self, source, pagesize=0x1000, maxpages=0x100):
+        self.source, self.pagesize, self.maxpages = source, pagesize, maxpages
+        self.pages = collections.OrderedDict()
+        if pagesize <= 0 or maxpages <= 0:
+            raise error.UserError(self, '__init__', message='Invalid page size ({:+d}) or page count ({:+d}) specified.'.format(pagesize, maxpages))
+
+    def __getattr__(self, name):
+        # the source's .view isn't forwarded since it would read from the source's offset instead of ours.
+        if name == 'view':
+            raise AttributeError(name)
+        return getattr(self.source, name)
+
+    def seek(self, offset):
+        '''Seek to the specified ``offset``. Returns the last offset before it was modified.'''
+        res,self.offset = self.offset,offset
+        return res
+
+    def __page(self, index):
+        '''Return the data for the page at ``index``, reading it from the source if it isn't cached.'''
+        if index in self.pages:
+            self.hits += 1
+            res = self.pages[index] = self.pages.pop(index)
+            return res
+
+        self.misses += 1
+        self.source.seek(index * self.pagesize)
+        res = self.pages[index] = self.source.consume(self.pagesize)
+        while len(self.pages) > self.maxpages:
+            self.pages.popitem(last=False)
+            self.evictions += 1
+        return res
+
+    @utils.mapexception(any=error.ProviderError, ignored=(error.ConsumeError,error.UserError))
+    def consume(self, amount):
+        '''Consume ``amount`` bytes from the given provider.'''
+        if amount < 0:
+            raise error.UserError(self, 'consume', message='tried to consume a negative number of bytes ({:x}:{:+x}) from {:s}'.format(self.offset,amount,self))
+        if amount == 0: return ''
+        left, right = self.offset, self.offset + amount
+        first, last = left // self.pagesize, (right - 1) // self.pagesize
+
+        # collect the pages, and if any of them can't be read then fall back
+        # to the source so that it can decide what to do with the request.
+        try:
+            pages = [self.__page(index) for index in six.moves.range(first, last + 1)]
+        except error.ProviderError:
+            pages = []
+
+        # a short page that's followed by more data would shift the pages after it
+        for index, page in enumerate(pages[:-1]):
+            if len(page) < self.pagesize and any(pages[index + 1:]):
+                available = (first + index) * self.pagesize + len(page) - left
+                raise error.ConsumeError(self, left, amount, max(0, available))
+            continue
+        data = str().join(pages)
+
+        res = data[left - first * self.pagesize : right - first * self.pagesize]
+        if len(res) < amount:
+            self.source.seek(left)
+            res = self.source.consume(amount)
+
+        if len(res) == amount:
+            self.offset = right
+        return res
+
+    @utils.mapexception(any=error.ProviderError, ignored=(error.StoreError,))
+    def store(self, data):
+        '''Store ``data`` at the current offset. Returns the number of bytes successfully written.'''
+        left, right = self.offset, self.offset + len(data)
+        for index in six.moves.range(left // self.pagesize, (right - 1) // self.pagesize + 1):
+            self.pages.pop(index, None)
+
+        self.source.seek(left)
+        res = self.source.store(data)
+        self.offset = right
+        return res
+
+    def invalidate(self):
+        '''Discard all of the pages that have been cached.'''
+        self.pages.clear()
+
+    def __repr__(self):
+        return '{:s}[pagesize={:#x},pages={:d}/{:d},hits={:d},misses={:d}] -> {!r}'.format(type(self), self.pagesize, len(self.pages), self.maxpages, self.hits, self.misses, self.source)
+
 class posixfile(fileobj):
     '''Basic posix file provider.'''
     def __init__(self, *args, **kwds):
@@ -636,6 +737,271 @@ try:
 except ImportError:
     Log.warning("__module__ : Unable to import the 'tempfile' module. Failed to load the `filecopy` provider.")
 
+try:
+    import mmap as _mmap
+    class mmap(base):
+        """A read-only provider that maps the specified file into memory.
+
+        Seeking only updates the offset, and consuming slices the data out of
+        the mapping. The .view method returns a memoryview of the mapping
+        so that containers can be deserialized without copying their data.
+        """
+        offset = 0
+        file = map = buffer = None
+        def __init__(self, filename):
+            self.file = builtins.open(filename, 'rb')
+
+            # empty files can't be mapped, so use an empty string for them instead
+            try:
+                self.map = _mmap.mmap(self.file.fileno(), 0, access=_mmap.ACCESS_READ)
+            except ValueError:
+                self.map = ''
+            self.buffer = memoryview(builtins.buffer(self.map) if six.PY2 else self.map)
+
+        def seek(self, offset):
+            '''Seek to the specified ``offset``. Returns the last offset before it was modified.'''
+            res,self.offset = self.offset,offset
+            return res
+
+        @utils.mapexception(any=error.ProviderError, ignored=(error.ConsumeError,error.UserError))
+        def consume(self, amount):
+            '''Consume ``amount`` bytes from the given provider.'''
+            left, right = self.__range(amount)
+            res = self.map[left : right]
+            if len(res) == amount:
+                self.offset = right
+            return res
+
+        @utils.mapexception(any=error.ProviderError, ignored=(error.ConsumeError,error.UserError))
+        def view(self, amount):
+            '''Consume ``amount`` bytes from the given provider as a memoryview of the mapping.'''
+            left, right = self.__range(amount)
+            res = self.buffer[left : right]
+            if len(res) == amount:
+                self.offset = right
+            return res
+
+        def __range(self, amount):
+            offset = self.offset
+            if amount < 0:
+                raise error.UserError(self, 'consume', message='tried to consume a negative number of bytes ({:x}:{:+x}) from {:s}'.format(offset,amount,self))
+            if amount > 0 and not (0 <= offset < len(self.map)):
+                raise error.ConsumeError(self,offset,amount)
+            return offset, offset + amount
+
+        @utils.mapexception(any=error.ProviderError, ignored=(error.StoreError,))
+        def store(self, data):
+            '''The mapping is read-only, so storing ``data`` will always raise an exception.'''
+            raise error.StoreError(self, self.offset, len(data), exception=IOError('mmap.store : Unable to store to a read-only mapping'))
+
+        @utils.mapexception(any=error.ProviderError)
+        def close(self):
+            self.buffer = None
+            if builtins.isinstance(self.map, _mmap.mmap):
+                self.map.close()
+            return self.file.close()
+
+        @utils.mapexception(any=error.ProviderError)
+        def size(self):
+            return len(self.map)
+
+        def __repr__(self):
+            return '{:s} -> {!r}'.format(super(mmap, self).__repr__(), self.file)
+
+        def __del__(self):
+            try: self.close()
+            except: pass
+            return
+
+except ImportError:
+    Log.warning("__module__ : Unable to import the 'mmap' module. Failed to load the `mmap` provider.")
+
+class snapshot(base):
+    """A read-only provider that serves reads from a snapshot of some memory regions.
+
+    The snapshot is constructed from a list of (base, data) tuples and keeps
+    the regions sorted by their base address so that the region containing an
+    address can be found with a bisection. Consuming from the snapshot slices
+    the data out of the region without copying it until the result is
+    returned, and a read is allowed to continue into the following region only
+    if that region is contiguous with the current one. The .view method returns
+    a memoryview of a region so that containers can be deserialized from it.
+
+    The .minidump and .directory classmethods can be used to construct a
+    snapshot from the memory streams of a minidump or from a directory of raw
+    region dumps that are each named by their hexadecimal base address.
+    """
+    offset = 0
+    bases = regions = None
+    __resources = ()
+    def __init__(self, regions, resources=()):
+        items = sorted(((base, memoryview(builtins.buffer(data) if six.PY2 and not builtins.isinstance(data, memoryview) else data)) for base, data in regions), key=operator.itemgetter(0))
+
+        # check that none of the regions overlap with one another
+        for (left, data), (right, _) in zip(items[:-1], items[1:]):
+            if left + len(data) > right:
+                raise error.UserError(self, '__init__', message='region {:#x}:{:+#x} overlaps with the region at {:#x}'.format(left, len(data), right))
+            continue
+
+        self.bases = [base for base, _ in items]
+        self.regions = [data for _, data in items]
+        self.__resources = builtins.list(resources)
+
+    def seek(self, offset):
+        '''Seek to the specified ``offset``. Returns the last offset before it was modified.'''
+        res,self.offset = self.offset,offset
+        return res
+
+    def __region(self, offset):
+        '''Return the index of the region containing ``offset`` and the offset into it, or None if it isn't mapped.'''
+        index = bisect.bisect_right(self.bases, offset) - 1
+        if index < 0:
+            return None
+        res = offset - self.bases[index]
+        return (index, res) if res < len(self.regions[index]) else None
+
+    @utils.mapexception(any=error.ProviderError, ignored=(error.ConsumeError,error.UserError))
+    def consume(self, amount):
+        '''Consume ``amount`` bytes from the given provider.'''
+        offset = self.offset
+        if amount < 0:
+            raise error.UserError(self, 'consume', message='tried to consume a negative number of bytes ({:x}:{:+x}) from {:s}'.format(offset,amount,self))
+        elif amount == 0:
+            return b''
+
+        location = self.__region(offset)
+        if location is None:
+            raise error.ConsumeError(self,offset,amount)
+        index, left = location
+
+        # the common case is a read that's entirely within a single region
+        data = self.regions[index]
+        if left + amount <= len(data):
+            self.offset = offset + amount
+            return data[left : left + amount].tobytes()
+
+        # otherwise collect the pieces from each contiguous region that follows
+        res, left = [data[left:]], self.bases[index] + len(data)
+        count = len(res[0])
+        for base, data in zip(self.bases[index + 1:], self.regions[index + 1:]):
+            if base != left or count >= amount:
+                break
+            res.append(data[: amount - count])
+            count, left = count + len(res[-1]), base + len(data)
+
+        res = b''.join(item.tobytes() for item in res)
+        if len(res) == amount:
+            self.offset = offset + amount
+        return res
+
+    @utils.mapexception(any=error.ProviderError, ignored=(error.ConsumeError,error.UserError))
+    def view(self, amount):
+        '''Consume ``amount`` bytes from the given provider as a memoryview of the region containing them.'''
+        offset = self.offset
+        if amount < 0:
+            raise error.UserError(self, 'consume', message='tried to consume a negative number of bytes ({:x}:{:+x}) from {:s}'.format(offset,amount,self))
+
+        # a memoryview can't span multiple regions, so fall back to copying them
+        location = self.__region(offset)
+        if location is None:
+            if amount > 0:
+                raise error.ConsumeError(self,offset,amount)
+            return memoryview(b'')
+        index, left = location
+        data = self.regions[index]
+        if left + amount > len(data):
+            return memoryview(self.consume(amount))
+        self.offset = offset + amount
+        return data[left : left + amount]
+
+    @utils.mapexception(any=error.ProviderError, ignored=(error.StoreError,))
+    def store(self, data):
+        '''The snapshot is read-only, so storing ``data`` will always raise an exception.'''
+        raise error.StoreError(self, self.offset, len(data), exception=IOError('snapshot.store : Unable to store to a read-only snapshot'))
+
+    def contains(self, offset):
+        '''Return whether the specified ``offset`` is within one of the regions of the snapshot.'''
+        return self.__region(offset) is not None
+
+    def list(self):
+        '''Return a list of the (base, size) of each region in the snapshot.'''
+        return [(base, len(data)) for base, data in zip(self.bases, self.regions)]
+
+    @utils.mapexception(any=error.ProviderError)
+    def close(self):
+        self.bases, self.regions = [], []
+        while self.__resources:
+            self.__resources.pop().close()
+        return
+
+    @classmethod
+    def minidump(cls, filename):
+        '''Return a snapshot of the memory regions from the Memory64ListStream or MemoryListStream of the minidump at ``filename``.'''
+        source = mmap(filename)
+        data = source.map
+
+        signature, version, count, rva = struct.unpack_from('<4sLLL', data, 0)
+        if signature != b'MDMP':
+            source.close()
+            raise error.UserError(cls, 'minidump', message='file {!r} is not a minidump ({!r})'.format(filename, signature))
+
+        # collect the regions from each memory stream in the stream directory
+        regions = []
+        for stream, _, location in (struct.unpack_from('<LLL', data, rva + 12 * index) for index in six.moves.range(count)):
+
+            # Memory64ListStream: the data for each range is contiguous starting at BaseRva
+            if stream == 9:
+                number, offset = struct.unpack_from('<QQ', data, location)
+                for index in six.moves.range(number):
+                    start, size = struct.unpack_from('<QQ', data, location + 16 + 16 * index)
+                    regions.append((start, source.buffer[offset : offset + size]))
+                    offset += size
+                continue
+
+            # MemoryListStream: each descriptor contains the location of its own data
+            elif stream == 5:
+                number, = struct.unpack_from('<L', data, location)
+                for index in six.moves.range(number):
+                    start, size, offset = struct.unpack_from('<QLL', data, location + 4 + 16 * index)
+                    regions.append((start, source.buffer[offset : offset + size]))
+                continue
+            continue
+
+        # both streams can describe the same memory, so keep the first one for each address
+        regions, filtered = sorted(regions, key=operator.itemgetter(0)), []
+        for base, region in regions:
+            if filtered and base < filtered[-1][0] + len(filtered[-1][1]):
+                continue
+            filtered.append((base, region))
+        return cls(filtered, resources=[source])
+
+    @classmethod
+    def directory(cls, path):
+        '''Return a snapshot of the raw region dumps within the directory at ``path`` that are named by their hexadecimal base address.'''
+        regions, resources = [], []
+        for name in sorted(os.listdir(path)):
+            res, _ = os.path.splitext(name)
+            try:
+                base = int(res, 16)
+            except ValueError:
+                Log.info("{:s}.directory : Skipping file {!r} as its name is not a base address.".format('.'.join((cls.__module__, cls.__name__)), name))
+                continue
+
+            source = mmap(os.path.join(path, name))
+            resources.append(source)
+            if source.size():
+                regions.append((base, source.buffer))
+            continue
+        return cls(regions, resources=resources)
+
+    def __repr__(self):
+        return '{:s} -> {:d} regions'.format(super(snapshot, self).__repr__(), len(self.regions or []))
+
+    def __del__(self):
+        try: self.close()
+        except: pass
+        return
+
 ## platform-specific providers
 DEFAULT = []
 try:
@@ -1288,6 +1654,169 @@ if __name__ == '__main__':
                 raise Success
         return
 
+    @TestCase
+    def test_mmap_read():
+        data = 'ABCD'*0x80
+        with temporaryname() as filename:
+            f = open(filename, 'wb')
+            f.write(data)
+            f.close()
+
+            z = provider.mmap(filename)
+            try:
+                z.seek(len(data) - 4)
+                if z.consume(8) != 'ABCD' or z.consume(4) != 'ABCD':
+                    raise Failure
+                z.store('nope')
+            except error.StoreError:
+                raise Success
+            finally:
+                z.close()
+        return
+
+    @TestCase
+    def test_mmap_container():
+        data = ''.join(map(chr, range(0x100)))
+        with temporaryname() as filename:
+            f = open(filename, 'wb')
+            f.write(data)
+            f.close()
+
+            z = provider.mmap(filename)
+            a = parray.type(_object_=pint.uint32_t, length=0x40, source=z).l
+            z.close()
+            if a.serialize() == data and a[1].int() == 0x07060504:
+                raise Success
+        return
+
+    @TestCase
+    def test_snapshot_read():
+        z = provider.snapshot([(0x2000, 'EFGH'), (0x1000, 'ABCD'), (0x1004, 'abcd')])
+        z.seek(0x1002)
+        if z.consume(4) != 'CDab' or z.consume(2) != 'cd':
+            raise Failure
+        if z.offset != 0x1008:
+            raise Failure
+        z.seek(0x1006)
+        try:
+            z.consume(4)
+        except error.ConsumeError:
+            raise Failure
+        if z.offset != 0x1006:
+            raise Failure
+        z.seek(0x2001)
+        if z.view(2).tobytes() == 'FG':
+            raise Success
+
+    @TestCase
+    def test_snapshot_unmapped():
+        z = provider.snapshot([(0x1000, 'ABCD')])
+        z.seek(0xfff)
+        try:
+            z.consume(1)
+        except error.ConsumeError:
+            raise Success
+
+    @TestCase
+    def test_snapshot_minidump():
+        import struct
+        regions = [(0x7ffe0000, 'A'*0x10), (0x10000, 'B'*0x20)]
+        header = struct.pack('<4sLLL', 'MDMP', 0xa793, 1, 16)
+        directory = struct.pack('<LLL', 9, 16 + 16 * len(regions), 28)
+        stream = struct.pack('<QQ', len(regions), 28 + 16 + 16 * len(regions))
+        stream += ''.join(struct.pack('<QQ', base, len(data)) for base, data in regions)
+        with temporaryname() as filename:
+            f = open(filename, 'wb')
+            f.write(header + directory + stream + ''.join(data for _, data in regions))
+            f.close()
+
+            z = provider.snapshot.minidump(filename)
+            a = parray.type(_object_=pint.uint32_t, length=4, source=z)
+            a.setoffset(0x10000)
+            res = a.l.serialize(), z.list()
+            z.close()
+            if res == ('B'*0x10, [(0x10000, 0x20), (0x7ffe0000, 0x10)]):
+                raise Success
+
+    @TestCase
+    def test_snapshot_directory():
+        path = tempfile.mkdtemp()
+        try:
+            for name, data in [('401000.bin', 'code'), ('402000', 'data'), ('README', 'skip')]:
+                f = open(os.path.join(path, name), 'wb')
+                f.write(data)
+                f.close()
+            z = provider.snapshot.directory(path)
+            z.seek(0x402000)
+            res = z.consume(4), z.list()
+            z.close()
+        finally:
+            for name in os.listdir(path):
+                os.unlink(os.path.join(path, name))
+            os.rmdir(path)
+        if res == ('data', [(0x401000, 4), (0x402000, 4)]):
+            raise Success
+
+    @TestCase
+    def test_cached_read():
+        data = ''.join(map(chr, range(0x100)))
+        z = provider.cached(provider.string(data), pagesize=0x10, maxpages=2)
+        z.seek(0x0e)
+        if z.consume(4) != '\x0e\x0f\x10\x11' or (z.hits, z.misses) != (0, 2):
+            raise Failure
+        z.seek(0x12)
+        if z.consume(2) != '\x12\x13' or (z.hits, z.misses) != (1, 2):
+            raise Failure
+        z.seek(0x20), z.consume(1)
+        if z.evictions == 1 and 0 not in z.pages and len(z.pages) == 2:
+            raise Success
+
+    @TestCase
+    def test_cached_store():
+        data = 'A'*0x40
+        source = provider.string(data)
+        z = provider.cached(source, pagesize=0x10)
+        z.seek(0x1e), z.consume(4)
+        z.seek(0x1f), z.store('BB')
+        z.seek(0x1e)
+        if z.consume(4) == 'ABBA' and source.value[0x1e:0x22] == 'ABBA':
+            raise Success
+
+    @TestCase
+    def test_cached_mmap_container():
+        data = ''.join(map(chr, range(0x100)))
+        with temporaryname() as filename:
+            f = open(filename, 'wb')
+            f.write(data)
+            f.close()
+
+            # the offset of the mapping must not be used in place of the cache's
+            source = provider.mmap(filename)
+            z = provider.cached(source, pagesize=0x10)
+            pint.uint32_t(offset=0x40, source=z).l
+            a = parray.type(_object_=pint.uint8_t, length=4, offset=0x80, source=z).l
+            res = a.serialize()
+            source.close()
+            if not hasattr(z, 'view') and res == '\x80\x81\x82\x83':
+                raise Success
+
+    @TestCase
+    def test_cached_forward_attributes():
+        source = provider.string('A'*0x20)
+        source.custom = 'custom'
+        z = provider.cached(source, pagesize=0x10)
+        if z.custom == 'custom' and z.size() == 0x20 and not hasattr(z, 'view'):
+            raise Success
+
+    @TestCase
+    def test_cached_short_page():
+        z = provider.cached(provider.snapshot([(0, 'A'*0x18), (0x20, 'B'*0x10)]), pagesize=0x10)
+        z.seek(0x10)
+        try:
+            z.consume(0x20)
+        except error.ConsumeError:
+            raise Success
+
     try:
         import ctypes
         @TestCase
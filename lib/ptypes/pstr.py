@@ -257,6 +257,7 @@ class string(ptype.type):
         if not isinstance(object, self._object_):
             raise error.TypeError(self, 'string.append', message='expected value of type {!r}. received {!r}'.format(self._object_,object.__class__))
         self.value += object.serialize()
+        self.__invalidate__()
 
     def extend(self, iterable):
         '''Extend the string ``self`` with the characters provided by ``iterable``.'''
@@ -45,10 +45,10 @@ Example usage:
     # remove an alias
     instance.unalias('alternative-name')
 """
-import itertools,operator,functools
+import itertools,operator,functools,struct
 import six
 
-from . import ptype,utils,config,pbinary,error
+from . import ptype,utils,config,pbinary,pint,error
 Config = config.defaults
 Log = Config.log.getChild(__name__[len(__package__)+1:])
 __all__ = 'type,make'.split(',')
@@ -165,12 +165,40 @@ class type(_pstruct_generic):
     Settable properties:
         _fields_:array( tuple( ptype, name ), ... )<w>
             This contains which elements the structure is composed of
+        lazy:bool<w>
+            If True, only load each field when it (or a field after it) is
+            first accessed. If None, then use Config.pstruct.lazy.
+        compiled:bool<w>
+            If True and every field is of a fixed size, then read the entire
+            structure at once and only create each field when it is accessed.
+            If None, then use Config.pstruct.compiled.
     '''
     _fields_ = None     # list of (type,name) tuples
+    lazy = None         # load fields on demand. None uses Config.pstruct.lazy
+    compiled = None     # load fixed-size fields with a single read. None uses Config.pstruct.compiled
     ignored = ptype.container.ignored.union(('_fields_',))
 
+    __lazy = None       # (attributes, offset of the first field) to load the remaining fields with
+    __packed = None     # data for all of the fields when loaded with the codec. fields that haven't been created are None in .__value
+    __codec = None      # (class, _fields_, codec) that was compiled for the class
+    __value = None
+
+    @property
+    def value(self):
+        if self.__lazy is not None:
+            self.__resolve__(len(self._fields_))
+        if self.__packed is not None:
+            self.__unpack__()
+        return self.__value
+    @value.setter
+    def value(self, value):
+        self.__lazy, self.__packed, self.__value = None, None, value
+
     def initializedQ(self):
-        if getattr(self.blocksize, 'im_func', None) is ptype.container.blocksize.im_func:
+        if self.__packed is not None:
+            return all(n.initializedQ() for n in self.__value if n is not None)
+
+        if getattr(self.blocksize, 'im_func', None) is type.blocksize.im_func:
             return super(type, self).initializedQ()
 
         res = False
@@ -207,8 +235,31 @@ class type(_pstruct_generic):
         return result
 
     def load(self, **attrs):
+        codec = self.__compiled()
+
+        # if all of our fields are of a fixed size, then read them all at once and create each one when it's needed
+        if codec is not None:
+            try:
+                with utils.assign(self, **attrs):
+                    self.__lazy, self.__value, self.__packed = None, [None] * len(self._fields_), ()
+                    return super(ptype.container, self).load()
+
+            # if we couldn't read everything, then load each field so that we keep as much as we can
+            except error.LoadError, e:
+                Log.debug("type.load : {:s} : Unable to read the structure in its entirety. Loading each field individually : {!r}".format(self.instance(), e))
+                self.value = None
+
+        lazy = Config.pstruct.lazy if self.lazy is None else self.lazy
+
+        # if our fields are loaded on demand, then only record where the first one is
+        if lazy and getattr(self.blocksize, 'im_func', None) is type.blocksize.im_func:
+            with utils.assign(self, **attrs):
+                self.value = []
+                self.__lazy = attrs, self.getoffset()
+            return self
+
         with utils.assign(self, **attrs):
-            self.value, path, n = [], " -> ".join(self.backtrace()), None
+            self.value, n = [], None
             self.__fastindex = {}
 
             try:
@@ -217,7 +268,7 @@ class type(_pstruct_generic):
                 for i,(t,name) in enumerate(self._fields_):
                     if name in self.__fastindex:
                         _,name = name,u"{:s}_{:x}".format(name, (ofs - self.getoffset()) if Config.pstruct.use_offset_on_duplicate else len(self.value))
-                        Log.warn("type.load : {:s} : Duplicate element name {!r}. Using generated name {!r} : {:s}".format(self.instance(), _, name, path))
+                        Log.warn("type.load : {:s} : Duplicate element name {!r}. Using generated name {!r} : {:s}".format(self.instance(), _, name, " -> ".join(self.backtrace())))
 
                     # create each element
                     n = self.new(t, __name__=name, offset=ofs)
@@ -227,7 +278,7 @@ class type(_pstruct_generic):
                     bs = n.blocksize()
                     if current is not None:
                         try: res = self.blocksize()
-                        except Exception, e: Log.debug("type.load : {:s} : Custom blocksize raised an exception at offset {:#x}, field {!r} : {:s}".format(self.instance(), current, n.instance(), path), exc_info=True)
+                        except Exception, e: Log.debug("type.load : {:s} : Custom blocksize raised an exception at offset {:#x}, field {!r} : {:s}".format(self.instance(), current, n.instance(), " -> ".join(self.backtrace())), exc_info=True)
                         else:
                             if current + bs >= res:
                                 path = " -> ".join(self.backtrace())
@@ -249,6 +300,245 @@ class type(_pstruct_generic):
             result = super(type, self).load()
         return result
 
+    def __resolve__(self, count):
+        """Load each of the fields that are being loaded on demand until there are ``count`` of them.
+
+        Each field is loaded individually, so fields that depend on the ones
+        before it are resolved in order. The size of a field is only needed
+        once the field after it is loaded.
+        """
+        (attrs, ofs), self.__lazy = self.__lazy, None
+        value = self.__value
+        with utils.assign(self, **attrs):
+            while len(value) < min(count, len(self._fields_)):
+                t, name = self._fields_[len(value)]
+                ofs = value[-1].getoffset() + value[-1].blocksize() if value else ofs
+                n = self.new(t, __name__=name, offset=ofs)
+                value.append(n)
+
+                # a field that couldn't be read is left partially loaded, just like ptype.container.load
+                try:
+                    n.load()
+                except error.LoadError, e:
+                    Log.debug("type.__resolve__ : {:s} : Unable to complete read of field {:s} : {!r}".format(self.instance(), n.instance(), e))
+                continue
+
+        # if there's still some fields left, then continue from where we stopped
+        self.__lazy = (attrs, ofs) if len(value) < len(self._fields_) else None
+        return value
+
+    def __field__(self, key):
+        if self.__lazy is not None:
+            index = self.__getindex__(key)
+            return self.__resolve__(index + 1)[index]
+        elif self.__packed is None:
+            return super(type, self).__field__(key)
+        index = self.__getindex__(key)
+        res = self.__value[index]
+        return self.__create__(index) if res is None else res
+
+    ## fields of a fixed size
+    @staticmethod
+    def __staticsize(t):
+        """Return the number of bytes that an instance of the type ``t`` will always occupy, or None if it can vary."""
+        from . import pstr
+        if not ptype.istype(t):
+            return None
+
+        # a structure that can be compiled is the size of all of its fields
+        elif issubclass(t, type):
+            codec = t.__compile() if t.blocksize.im_func is type.blocksize.im_func and t.__deserialize_block__.im_func is type.__deserialize_block__.im_func else None
+            return None if codec is None else codec[0].size
+
+        # a binary type is fixed if each of its fields are a number of bits that add up to a number of bytes
+        elif issubclass(t, pbinary.partial):
+            res = t._object_
+            if t.blocksize.im_func is not pbinary.partial.blocksize.im_func or not (pbinary.istype(res) and issubclass(res, pbinary.struct)):
+                return None
+            elif not all(isinstance(width, six.integer_types) for width, _ in res._fields_ or []):
+                return None
+            bits = sum(abs(width) for width, _ in res._fields_ or [])
+            return None if bits % 8 else bits // 8
+
+        # any other container can have a variable number of elements
+        elif issubclass(t, ptype.container):
+            return None
+
+        # a wrapper is the size of the type that it wraps
+        elif issubclass(t, ptype.wrapper_t):
+            return type.__staticsize(t._value_) if t.blocksize.im_func is ptype.wrapper_t.blocksize.im_func else None
+
+        # an atomic type uses its length, which might be calculated when it is instantiated
+        elif t.blocksize.im_func not in {ptype.type.blocksize.im_func, pstr.string.blocksize.im_func}:
+            return None
+        try:
+            res = t().blocksize()
+        except Exception:
+            return None
+        return res if isinstance(res, six.integer_types) else None
+
+    @staticmethod
+    def __integers(fields):
+        """Return a struct.Struct that can pack each of the integer types in ``fields``, or None if one of them isn't a plain integer."""
+        codes, methods = {1 : 'B', 2 : 'H', 4 : 'I', 8 : 'Q'}, {pint.uinteger_t.__setvalue__.im_func, pint.sinteger_t.__setvalue__.im_func}
+        if not fields or not all(issubclass(t, pint.type) and t.length in codes and t.__setvalue__.im_func in methods for t in fields):
+            return None
+
+        orders = {t.byteorder for t in fields}
+        if len(orders) > 1:
+            return None
+        order, = orders
+        return struct.Struct(('<' if order is config.byteorder.littleendian else '>') + str().join(codes[t.length] for t in fields))
+
+    @classmethod
+    def __compile(cls):
+        """Return the codec for the fields of the class, or None if they're not all of a fixed size.
+
+        The codec is a tuple containing a struct.Struct that splits the data for
+        the structure into the data for each field, the offset and the size of
+        each field, and a struct.Struct that can pack all of the fields at once
+        if they're all integers. There's no metaclass for this to be done when
+        the class is defined, so it's done the first time it is needed.
+        """
+        fields, res = cls._fields_, cls.__codec
+        if res is not None and res[0] is cls and res[1] is fields:
+            return res[2]
+
+        sizes = [cls.__staticsize(t) for t, _ in fields] if isinstance(fields, (list, tuple)) else [None]
+        if any(size is None for size in sizes):
+            codec = None
+        else:
+            offsets = [0]
+            for size in sizes:
+                offsets.append(offsets[-1] + size)
+            layout = struct.Struct('<' + str().join("{:d}s".format(size) for size in sizes))
+            codec = layout, offsets, sizes, cls.__integers([t for t, _ in fields])
+        cls.__codec = cls, fields, codec
+        return codec
+
+    @classmethod
+    def __layout__(cls):
+        """Return a list of (type, name, offset, size) for each field of the class, or None if they're not all of a fixed size."""
+        codec = cls.__compile()
+        if codec is None:
+            return None
+        _, offsets, sizes, _ = codec
+        return [(t, name, offset, size) for (t, name), offset, size in zip(cls._fields_, offsets, sizes)]
+
+    def __compiled(self):
+        """Return the codec that the instance can be loaded with, or None if each field needs to be loaded individually."""
+        compiled = Config.pstruct.compiled if self.compiled is None else self.compiled
+        if not compiled or Config.ptype.noncontiguous or '_fields_' in self.__dict__:
+            return None
+        elif getattr(self.blocksize, 'im_func', None) is not type.blocksize.im_func:
+            return None
+        elif getattr(self.__deserialize_block__, 'im_func', None) is not type.__deserialize_block__.im_func:
+            return None
+        return self.__compile()
+
+    def __create__(self, index):
+        """Create the field at ``index`` from the data that was read for the structure."""
+        _, offsets, sizes, _ = self.__compile()
+        t, name = self._fields_[index]
+        res = self.__value[index] = self.new(t, __name__=name, offset=self.getoffset() + self.__getoffsets__(index))
+        if self.__packed != ():
+            offset = offsets[index]
+            res.__deserialize_block__(self.__packed[offset : offset + sizes[index]])
+        return res
+
+    def __unpack__(self):
+        """Create all of the fields that haven't been created yet, and stop using the data that was read for the structure."""
+        for index, n in enumerate(self.__value):
+            if n is None:
+                self.__create__(index)
+            continue
+        self.__packed = None
+
+    def __pack__(self, values, fields):
+        """Assign the integers in ``values`` or ``fields`` by packing them directly into the data for the structure.
+
+        None is returned if the structure can't be assigned this way.
+        """
+        _, _, sizes, integers = self.__compile()
+        if integers is None:
+            return None
+
+        res = list(values) if values else list(integers.unpack(self.__packed))
+        if len(res) != len(sizes):
+            return None
+        for k, v in fields.iteritems():
+            res[self.__getindex__(k)] = v
+        if not all(isinstance(v, six.integer_types) for v in res):
+            return None
+
+        # integers are truncated to the size of their field just like pint.type
+        self.__value, self.__packed = [None] * len(sizes), integers.pack(*(v & ((1 << 8 * size) - 1) for v, size in zip(res, sizes)))
+        self.__invalidate__()
+        return self
+
+    def __getoffsets__(self, index):
+        if self.__packed is None:
+            return super(type, self).__getoffsets__(index)
+        _, _, sizes, _ = self.__compile()
+        value = self.__value
+        index = max(0, min(len(value), index + len(value) if index < 0 else index))
+        return sum(size if n is None else n.size() for n, size in zip(value[:index], sizes))
+
+    def __elements__(self):
+        if self.__packed is None:
+            return self.__value
+        return [n for n in self.__value if n is not None]
+
+    def __summed__(self):
+        return getattr(self.blocksize, 'im_func', None) is type.blocksize.im_func
+
+    def blocksize(self):
+        if self.__packed is None:
+            return super(type, self).blocksize()
+        _, _, sizes, _ = self.__compile()
+        return sum(size if n is None else n.blocksize() for n, size in zip(self.__value, sizes))
+
+    def size(self):
+        if self.__packed is None:
+            return super(type, self).size()
+        _, _, sizes, _ = self.__compile()
+        return sum(size if n is None else n.size() for n, size in zip(self.__value, sizes))
+
+    def setposition(self, offset, recurse=False):
+        if self.__packed is None:
+            return super(type, self).setposition(offset, recurse=recurse)
+
+        # only the fields that have been created need to be moved
+        res = super(ptype.container, self).setposition(offset, recurse=recurse)
+        if recurse:
+            for index, n in enumerate(self.__value):
+                n is None or n.setposition((offset[0] + self.__getoffsets__(index),), recurse=recurse)
+            return res
+        return res
+
+    def __deserialize_block__(self, block):
+        codec = self.__compiled() if self.__packed is not None or self.__value is None else None
+        if codec is None:
+            return super(type, self).__deserialize_block__(block)
+        layout, offsets, _, _ = codec
+        data = block.tobytes() if isinstance(block, memoryview) else block
+
+        # if there isn't enough data, then create each field so that ptype.container can fill in what's available
+        if len(data) < layout.size:
+            self.value = [self.new(t, __name__=name, offset=self.getoffset() + offset) for (t, name), offset in zip(self._fields_, offsets)]
+            return super(type, self).__deserialize_block__(block)
+        self.__lazy, self.__value, self.__packed = None, [None] * len(self._fields_), data[:layout.size]
+        return self
+
+    def serialize(self):
+        if self.__packed is None or self.__packed == ():
+            return super(type, self).serialize()
+        value, data = self.__value, self.__packed
+        if all(n is None for n in value):
+            return data
+        _, offsets, sizes, _ = self.__compile()
+        return str().join(data[offset : offset + size] if n is None else n.serialize() for n, offset, size in zip(value, offsets, sizes))
+
     def repr(self, **options):
         return self.details(**options) + '\n'
 
@@ -283,6 +573,12 @@ class type(_pstruct_generic):
         result = self
         value, = _ or ((),)
 
+        # if none of our fields have been created yet, then try and pack them all at once
+        if self.__packed and not isinstance(value, dict) and all(n is None for n in self.__value):
+            res = self.__pack__(value, individual)
+            if res is not None:
+                return res
+
         if result.initializedQ():
             if isinstance(value, dict):
                 value = individual.update(value)
@@ -594,6 +890,81 @@ if __name__ == '__main__':
         if a['a'].int() == 5:
             raise Success
 
+    @TestCase
+    def test_structure_lazy_chain():
+        class st(pstruct.type):
+            lazy = True
+            _fields_ = [
+                (pint.uint8_t, 'size'),
+                (lambda s: ptype.clone(ptype.block, length=s['size'].li.int()), 'data'),
+                (pint.uint8_t, 'end'),
+            ]
+        a = st(source=provider.string('\x03ABCZ')).l
+        if len(a._type__value) != 0:
+            raise Failure
+        if a['data'].serialize() != 'ABC' or len(a._type__value) != 2:
+            raise Failure
+        if a['end'].int() == ord('Z') and a.size() == 5:
+            raise Success
+
+    @TestCase
+    def test_structure_lazy_config():
+        class st(pstruct.type):
+            _fields_ = [
+                (pint.uint32_t, 'a'),
+                (pint.uint32_t, 'b'),
+            ]
+        lazy, ptypes.Config.pstruct.lazy = ptypes.Config.pstruct.lazy, True
+        try:
+            a = st(source=provider.string('AAAABBB')).l
+        finally:
+            ptypes.Config.pstruct.lazy = lazy
+        if len(a._type__value) == 0 and a['b'].size() == 3 and not a.initializedQ():
+            raise Success
+
+    @TestCase
+    def test_structure_compiled_load():
+        class st(pstruct.type):
+            _fields_ = [
+                (pint.uint32_t, 'a'),
+                (uint16, 'b'),
+                (pint.uint8_t, 'c'),
+            ]
+        a = st(source=provider.string('AAAABBCD')).l
+        if any(n is not None for n in a._type__value):
+            raise Failure
+        if a['b'].serialize() != 'BB' or a['b'].getoffset() != 4 or a._type__value.count(None) != 2:
+            raise Failure
+        if a.serialize() == 'AAAABBC' and a.size() == 7 and a['c'].int() == ord('C'):
+            raise Success
+
+    @TestCase
+    def test_structure_compiled_serialize():
+        class st(pstruct.type):
+            _fields_ = [
+                (pint.uint8_t, 'a'),
+                (pint.uint16_t, 'b'),
+                (pint.uint8_t, 'c'),
+            ]
+        a = st(source=provider.string('ABCD')).l
+        a['b'].set(0x4142)
+        if a.serialize() == 'A' + a['b'].serialize() + 'D' and a.v[2].int() == ord('D') and a._type__packed is None:
+            raise Success
+
+    @TestCase
+    def test_structure_compiled_set():
+        class st(pstruct.type):
+            _fields_ = [
+                (pint.littleendian(pint.uint16_t), 'a'),
+                (pint.littleendian(pint.int32_t), 'b'),
+            ]
+        a = st().a.set((0x4142, -1))
+        if a.serialize() != 'BA\xff\xff\xff\xff' or a._type__packed is None:
+            raise Failure
+        a.set(a=0x4344)
+        if a['a'].int() == 0x4344 and a['b'].int() == -1:
+            raise Success
+
 if __name__ == '__main__':
     import logging
     ptypes.config.defaults.log.setLevel(logging.DEBUG)
@@ -231,7 +231,7 @@ Example pointer_t usage:
             return number + 0x100
 """
 import six
-import functools,operator,itertools,types
+import functools,operator,itertools,types,bisect
 import sys,inspect,time,traceback
 from six.moves import builtins
 
@@ -771,6 +771,20 @@ class generic(_base_generic):
 class base(generic):
     padding = utils.padding.source.zero()
 
+    class __value(object):
+        """Descriptor for .value that discards the offsets that the parents of an instance have cached whenever it's assigned.
+
+        Only __set__ is defined so that reading .value still comes straight out of the instance.
+        """
+        def __set__(self, instance, value):
+            instance.__dict__['value'] = value
+            instance.parent is None or instance.parent.__invalidate__()
+    value = __value()
+
+    def __init__(self, **attrs):
+        self.__dict__['value'] = None
+        super(base, self).__init__(**attrs)
+
     def setoffset(self, offset, **options):
         """Changes the current offset to ``offset``"""
         return self.setposition((offset,), **options)[0]
@@ -791,6 +805,18 @@ class base(generic):
         nmax = nmin + self.blocksize()
         return (offset >= nmin) and (offset < nmax)
 
+    def __invalidate__(self):
+        """Discard the offsets that ``self`` and its parents have cached for their elements.
+
+        This needs to be called whenever the size of ``self`` might've changed.
+        """
+        node = self
+        while node is not None:
+            if builtins.isinstance(node, container):
+                node.__offsets__ = node.__positions__ = None
+            node = node.parent
+        return
+
     def copy(self, **attrs):
         """Return a duplicate instance of the current one."""
         result = self.new(self.__class__, position=self.getposition())
@@ -883,13 +909,18 @@ class base(generic):
         with utils.assign(self, **attrs):
             ofs,bs = self.getoffset(),self.blocksize()
 
+            # containers can deserialize directly from a provider that can return a view of its data
+            view = getattr(self.source, 'view', None) if getattr(self.__deserialize_block__, 'im_func', None) is container.__deserialize_block__.im_func else None
+
             try:
                 self.source.seek(ofs)
-                block = self.source.consume(bs)
+                block = self.source.consume(bs) if view is None else view(bs)
                 self = self.__deserialize_block__(block)
             except (StopIteration, error.ProviderError), e:
                 self.source.seek(ofs + bs)
                 raise error.LoadError(self, consumed=bs, exception=e)
+            finally:
+                self.parent is None or self.parent.__invalidate__()
         return self
 
     def commit(self, **attrs):
@@ -974,6 +1005,11 @@ class type(base):
     def __deserialize_block__(self, block):
         """Load type using the string provided by ``block``"""
         bs = self.blocksize()
+
+        # leaves are where a view of the block actually gets materialized
+        if builtins.isinstance(block, memoryview):
+            block = block[:bs].tobytes()
+
         if len(block) < bs:
             self.value = block[:bs]
             raise StopIteration(self.name(), len(block))
@@ -1041,6 +1077,7 @@ class type(base):
         res, self.value = self.value, value
         if hasattr(self, 'length'):
             self.length = len(self.value)
+        self.__invalidate__()
         return self
 
     def __getvalue__(self):
@@ -1087,6 +1124,8 @@ class container(base):
         value:str<r>
             list of all elements that are being contained
     '''
+    __offsets__ = None      # (.value, [sum of the sizes of the elements before each index, ...])
+    __positions__ = None    # (.value, [relative offset of each element, ...], [blocksize of each element, ...])
 
     def initializedQ(self):
         """True if the type is fully initialized"""
@@ -1121,7 +1160,26 @@ class container(base):
             return self[name].getoffset(res) if len(res) > 0 else self.getoffset(name)
 
         index = self.__getindex__(field)
-        return self.getoffset() + sum(map(operator.methodcaller('size'), self.value[:index]))
+        return self.getoffset() + self.__getoffsets__(index)
+
+    def __getoffsets__(self, index):
+        """Return the sum of the sizes of all the elements before ``index``
+
+        The sums are cached as they're calculated, and are discarded whenever
+        .__invalidate__ is called by an element that might have changed size.
+        """
+        value, cache = self.value, self.__offsets__
+        index = max(0, min(len(value), index + len(value) if index < 0 else index))
+
+        # if .value was replaced or shrunk, then we need to start over
+        if cache is None or cache[0] is not value or len(cache[1]) > len(value) + 1:
+            cache = self.__offsets__ = value, [0]
+        _, offsets = cache
+
+        # extend the sums up to the requested index
+        for n in value[len(offsets) - 1 : index]:
+            offsets.append(offsets[-1] + n.size())
+        return offsets[index]
 
     def __getindex__(self, name):
         """Searches the .value attribute for an element with the provided ``name``
@@ -1148,6 +1206,7 @@ class container(base):
         value.setoffset(offset, recurse=True)
         value.parent,value.source = self,None
         self.value[index] = value
+        self.__invalidate__()
         return value
 
     def at(self, offset, recurse=True, **kwds):
@@ -1156,11 +1215,18 @@ class container(base):
         If ``recurse`` is True, then recursively descend into all sub-elements
         until an atomic type (such as ptype.type, or pbinary.partial) is encountered.
         """
-        if not self.contains(offset):
-            raise error.NotFoundError(self, 'container.at', 'offset {:#x} can not be located within container.'.format(offset))
+        res = self.__getposition__(offset)
+
+        # if our blocksize is the sum of our elements, then finding the element
+        # also means that we contain the offset and we can avoid calculating it.
+        if res is None or not self.__summed__():
+            if not self.contains(offset):
+                raise error.NotFoundError(self, 'container.at', 'offset {:#x} can not be located within container.'.format(offset))
 
         # if we weren't asked to recurse, then figure out which sub-element contains the offset
         if not recurse:
+            if res is not None:
+                return res
             for n in self.value:
                 if n.contains(offset):
                     return n
@@ -1169,7 +1235,7 @@ class container(base):
 
         # descend into the trie a single level
         try:
-            res = self.at(offset, recurse=False, **kwds)
+            res = self.at(offset, recurse=False, **kwds) if res is None else res
 
         except ValueError, msg:
             Log.info('container.at : {:s} : Non-fatal exception raised : {!r}'.format(self.instance(), ValueError(msg)), exc_info=True)
@@ -1186,6 +1252,49 @@ class container(base):
             pass
         return res
 
+    def __elements__(self):
+        """Returns a list of the elements that have been created so far
+
+        This is intended to be overloaded by any type that inherits from
+        ptype.container and creates its elements only when they're accessed.
+        """
+        return self.value
+
+    def __summed__(self):
+        """Returns whether .blocksize() is the sum of the blocksize of each element
+
+        This is intended to be overloaded by any type that inherits from
+        ptype.container and implements .blocksize in terms of its elements.
+        """
+        return getattr(self.blocksize, 'im_func', None) is container.blocksize.im_func
+
+    def __getposition__(self, offset):
+        """Bisect the offsets of the elements for the one that contains ``offset``
+
+        The offsets are recorded by .__deserialize_block__ and .setposition. If
+        they haven't been recorded yet, then they're collected from the elements
+        themselves. None is returned if the elements aren't laid out in order,
+        or if none of them contain ``offset``.
+        """
+        value, cache = self.value, self.__positions__
+        if value is None:
+            return None
+        elif cache is None or cache[0] is not value or (cache[1] is not None and len(cache[1]) != len(value)):
+            base = self.getoffset()
+            positions, sizes = [n.getoffset() - base for n in value], [n.blocksize() for n in value]
+            ordered = all(a + size <= b for a, b, size in zip(positions[:-1], positions[1:], sizes[:-1]))
+            cache = self.__positions__ = (value, positions, sizes) if ordered else (value, None, None)
+        _, positions, sizes = cache
+        if positions is None:
+            return None
+
+        # find the last element that starts at or before the offset
+        offset -= self.getoffset()
+        index = bisect.bisect_right(positions, offset) - 1
+        if index < 0 or offset >= positions[index] + sizes[index]:
+            return None
+        return value[index]
+
     def field(self, offset, recurse=False):
         """Returns the field at the specified offset relative to the structure"""
         return self.at(self.getoffset()+offset, recurse=recurse)
@@ -1200,10 +1309,13 @@ class container(base):
     def setposition(self, offset, recurse=False):
         res = super(container, self).setposition(offset, recurse=recurse)
         if recurse and self.value is not None:
-            o = offset[0]
+            self.__offsets__, o, positions, sizes = None, offset[0], [], []
             for n in self.value:
                 n.setposition((o,), recurse=recurse)
-                o += n.size() if n.initializedQ() else n.blocksize()
+                bs = n.blocksize()
+                positions.append(o - offset[0]), sizes.append(bs)
+                o += n.size() if n.initializedQ() else bs
+            self.__positions__ = self.value, positions, sizes
             return res
         return res
 
@@ -1212,21 +1324,32 @@ class container(base):
         if self.value is None:
             raise error.SyntaxError(self, 'container.__deserialize_block__', message='caller is responsible for allocation of elements in self.value')
 
-        # read everything up to the blocksize
-        value, expected, bs, total = self.value[:], self.blocksize(), 0, 0
-        while value and total < expected:
-            res = value.pop(0)
+        # walk through all of our elements with a running offset into the block.
+        # leaves slice their bytes out of a single copy of it, and any nested
+        # containers are given a view so that they can do the same.
+        data = block.tobytes() if builtins.isinstance(block, memoryview) else block
+        view, containers = memoryview(data), {}
+        value, expected, total = self.value, self.blocksize(), 0
+
+        # read everything up to the blocksize while recording where each element was
+        index, positions, sizes = 0, [], []
+        while index < len(value) and total < expected:
+            res = value[index]
             bs = res.blocksize()
-            res.__deserialize_block__(block[:bs])
-            block = block[bs:]
+            res.__deserialize_block__(self.__deserialize_view__(res, containers, data, view, total, bs))
+            positions.append(total), sizes.append(bs)
             total += bs
+            index += 1
 
         # ..and then fill out any zero sized elements to update any state
-        while value:
-            res = value.pop(0)
+        while index < len(value):
+            res = value[index]
             bs = res.blocksize()
             if bs > 0: break
-            res.__deserialize_block__(block[:bs])
+            res.__deserialize_block__(self.__deserialize_view__(res, containers, data, view, total, bs))
+            positions.append(total), sizes.append(bs)
+            index += 1
+        self.__offsets__, self.__positions__ = None, (value, positions, sizes) if index == len(value) else None
 
         # log any information about deserialization errors
         if total < expected:
@@ -1239,6 +1362,21 @@ class container(base):
             raise error.LoadError(self, consumed=total) # XXX
         return self
 
+    @staticmethod
+    def __deserialize_view__(element, containers, data, view, offset, size):
+        """Return the slice of the block at ``offset`` that ``element`` should be deserialized from.
+
+        Only elements that are deserialized by ptype.container will receive a
+        slice of ``view``. Anything else receives a slice of the bytes in ``data``.
+        Whether each class is a container is remembered in ``containers``.
+        """
+        cls = element.__class__
+        if cls not in containers:
+            containers[cls] = getattr(cls.__deserialize_block__, 'im_func', None) is container.__deserialize_block__.im_func
+        if containers[cls]:
+            return view[offset : offset + size]
+        return data[offset : offset + size]
+
     def serialize(self):
         """Return contents of all sub-elements concatenated as a string"""
         # check the blocksize(), if it's invalid then return what we have since we can't figure out the padding anyways
@@ -1259,7 +1397,8 @@ class container(base):
             parent = self.getparent(None)
 
             # check to see if we should validate ourselves according to parent's boundaries
-            if parent is None or not builtins.isinstance(parent.value, list) or self not in parent.value:
+            elements = None if parent is None else parent.__elements__() if builtins.isinstance(parent, container) else parent.value
+            if not builtins.isinstance(elements, list) or self not in elements:
                 return data
 
         # check if child element is child of encoded_t which doesn't get checked since encoded types can have their sizes changed.
@@ -1456,6 +1595,7 @@ class container(base):
 
         current = len(self.value)
         self.value.append(object if object.initializedQ() else object.a)
+        self.__invalidate__()
         return current
 
     def __len__(self):
@@ -1547,6 +1687,7 @@ class block(type):
         return super(block, self).__setvalue__(value, **attrs)
     def __setitem__(self, index, value):
         self.value = self.value[:index] + value + self.value[index+1:]
+        self.__invalidate__()
     def __setslice__(self, i, j, value):
         v = self.value
         if len(value) != j-i:
@@ -1859,6 +2000,7 @@ class wrapper_t(type):
     def __setvalue__(self, value):
         res = self.object.set(value)
         self.object.commit(offset=0, source=provider.proxy(self))
+        self.__invalidate__()
         return self
 
     def commit(self, **attrs):
@@ -2660,6 +2802,66 @@ if __name__ == '__main__':
         if a.getoffset((1,2)) == 6:
             raise Success
 
+    @TestCase
+    def test_container_deserialize_nested():
+        class bah(ptype.type): length=2
+        class cont(ptype.container): __getindex__ = lambda s,i: i
+
+        a,b = cont(),cont()
+        b.set(bah,bah)
+        a.set(bah, b, bah)
+        a.__deserialize_block__('aabbccdd')
+        if a.v[1].serialize() == 'bbcc' and a.v[1].v[1].value == 'cc' and a.v[2].value == 'dd':
+            raise Success
+
+    @TestCase
+    def test_container_getoffset_cached():
+        class cont(ptype.container): __getindex__ = lambda s,i: i
+
+        a,b = cont(),cont()
+        b.set(ptype.block(length=2).a, ptype.block(length=2).a)
+        a.set(ptype.block(length=4).a, b, ptype.block(length=1).a)
+        if a.getoffset(2) != 8 or a.getoffset(-1) != 8:
+            raise Failure
+
+        # resizing a nested element should discard the sums of its parents
+        b.v[0].set('xxxxxx')
+        if a.getoffset(2) == 12:
+            raise Success
+
+    @TestCase
+    def test_container_getoffset_cached_load():
+        class cont(pstruct.type):
+            _fields_ = [(pstr.szstring,'a'), (pint.uint8_t,'b')]
+
+        a = cont(source=provider.string('AB\x00CDEFG')).l
+        if a.getoffset('b') != 3:
+            raise Failure
+
+        # loading a variable-sized field assigns its value directly
+        a['a'].load(source=provider.string('ABCDEF\x00'), offset=0)
+        if a.getoffset('b') != 7 or a.blocksize() != 8:
+            raise Failure
+
+        a['a'].set('A')
+        if a.getoffset('b') == 2 and a.blocksize() == 3:
+            raise Success
+
+    @TestCase
+    def test_container_at_bisect():
+        class cont(ptype.container): __getindex__ = lambda s,i: i
+
+        a = cont()
+        a.set(*(ptype.block(length=n).a for n in (4,0,2,6)))
+        a.setoffset(0x10, recurse=True)
+        if [a.at(o, recurse=False) for o in (0x10, 0x13, 0x14, 0x15, 0x16, 0x1b)] != [a.v[0], a.v[0], a.v[2], a.v[2], a.v[3], a.v[3]]:
+            raise Failure
+
+        # moving an element out from under the index should still find it
+        a.v[3].setoffset(0x18)
+        if a.at(0x1b, recurse=False) is a.v[3] and a.field(4, recurse=False) is a.v[2]:
+            raise Success
+
     @TestCase
     def test_decompression_block():
         class cblock(pstruct.type):
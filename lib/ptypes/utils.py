@@ -1,4 +1,4 @@
-import sys,math,random
+import sys,math,random,bisect
 import itertools,functools
 import six
 
@@ -328,6 +328,62 @@ def memoize(*kargs,**kattrs):
         return callee if isinstance(callee,functiontype) else functiontype(callee)
     return prepare_callable(kargs.pop(0)) if not kattrs and len(kargs) == 1 and callable(kargs[0]) else prepare_callable
 
+class intervals(object):
+    """
+    An index of half-open [start, stop) intervals sorted by their start so that
+    the ones containing an address, or overlapping a range, can be located by
+    bisection rather than by visiting each of them.
+
+    Matches are always returned in the order that their intervals were given.
+    """
+    def __init__(self, iterable=()):
+        items = [(start, stop, index, value) for index, (start, stop, value) in enumerate(iterable) if start < stop]
+        self.__items = sorted(items, key=lambda item: item[:3])
+        self.__starts = [start for start, _, _, _ in self.__items]
+
+        # the highest address reached by any interval up to each index
+        self.__reach, res = [], None
+        for _, stop, _, _ in self.__items:
+            res = stop if res is None else max(res, stop)
+            self.__reach.append(res)
+        return
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __iter__(self):
+        for start, stop, _, value in sorted(self.__items, key=lambda item: item[2]):
+            yield start, stop, value
+        return
+
+    def __search(self, start, stop):
+        index = bisect.bisect_left(self.__starts, stop) - 1
+        res = []
+        while index >= 0 and self.__reach[index] > start:
+            lo, hi, order, value = self.__items[index]
+            if hi > start:
+                res.append((order, value))
+            index -= 1
+        return [value for _, value in sorted(res, key=lambda item: item[0])]
+
+    def find(self, address):
+        '''Return a list of the values whose interval contains `address`.'''
+        return self.__search(address, address + 1)
+
+    def overlaps(self, start, stop):
+        '''Return a list of the values whose interval overlaps [`start`, `stop`).'''
+        return self.__search(start, stop) if start < stop else []
+
+    def get(self, address):
+        '''Return the first value whose interval contains `address`, or raise a KeyError.'''
+        res = self.find(address)
+        if res:
+            return res[0]
+        raise KeyError(address)
+
+    def __contains__(self, address):
+        return len(self.find(address)) > 0
+
 if __name__ == '__main__':
     class Result(Exception): pass
     class Success(Result): pass
@@ -509,6 +565,32 @@ if __name__ == '__main__':
         if x.counter == 2 and y.counter == 1 and res == 100:
             raise Success
 
+    @TestCase
+    def test_intervals_find():
+        res = utils.intervals([(0x1000, 0x2000, 'a'), (0x2000, 0x3000, 'b'), (0x1800, 0x2800, 'c')])
+        if res.find(0x1fff) == ['a','c'] and res.find(0x2000) == ['b','c'] and res.get(0x2900) == 'b' and 0x3000 not in res:
+            raise Success
+
+    @TestCase
+    def test_intervals_order():
+        res = utils.intervals([(0x1800, 0x1900, 'inner'), (0, 0x10000, 'outer'), (0x20, 0x20, 'empty')])
+        if res.find(0x1880) == ['inner','outer'] and res.get(0x20) == 'outer' and len(res) == 2:
+            raise Success
+
+    @TestCase
+    def test_intervals_overlaps():
+        res = utils.intervals([(0, 0x10, 'a'), (0x10, 0x20, 'b'), (0x30, 0x40, 'c')])
+        if res.overlaps(0x8, 0x31) == ['a','b','c'] and res.overlaps(0x20, 0x30) == [] and res.overlaps(0x40, 0x40) == []:
+            raise Success
+
+    @TestCase
+    def test_intervals_missing():
+        res = utils.intervals([(0x1000, 0x2000, 'a')])
+        try:
+            res.get(0xfff)
+        except KeyError:
+            raise Success
+
 if __name__ == '__main__':
     import logging
     ptypes.config.defaults.log.setLevel(logging.DEBUG)
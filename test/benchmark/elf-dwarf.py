@@ -0,0 +1,59 @@
+'''
+Walk every entry in the .debug_info section of an ELF file with
+elf.dwarf.DebugInfo, build the index of its functions, and then look up
+random addresses with the index and by scanning each function.
+
+Scanning is slow enough that it is only measured for the first `scan`
+addresses.
+
+usage: python elf-dwarf.py [path] [count] [scan]
+'''
+import sys,os,time,random
+import ptypes,elf
+from elf import dwarf
+
+def measure(f, addresses):
+    start, res = time.time(), []
+    for address in addresses:
+        try:
+            res.append(f(address))
+        except KeyError:
+            res.append(None)
+        continue
+    return res, time.time() - start
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(sys.prefix, 'lib', 'libpython2.7.so.1.0')
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    scan = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    f = elf.File(source=ptypes.prov.file(path, mode='r')).l
+
+    info, start = dwarf.DebugInfo(f), time.time()
+    units = entries = 0
+    for unit in info.units():
+        units, entries = units + 1, entries + sum(1 for _ in unit.entries())
+    elapsed = time.time() - start
+    print '{:>8s} {:8d} entries {:11.3f}s {:11.2f}us/entry ({:d} units, {:d} pages read)'.format('entries', entries, elapsed, 1e6 * elapsed / entries, units, info.source.misses)
+
+    info, start = dwarf.DebugInfo(f), time.time()
+    index = info.index()
+    elapsed = time.time() - start
+    print '{:>8s} {:8d} functions {:9.3f}s'.format('index', len(index), elapsed)
+
+    random.seed(0)
+    addresses = [random.randrange(index.starts[0], index.reach[-1]) for _ in xrange(count)]
+
+    indexed, elapsed = measure(index.lookup, addresses)
+    print '{:>8s} {:8d} lookups {:11.3f}s {:11.2f}us/lookup'.format('indexed', len(indexed), elapsed, 1e6 * elapsed / len(indexed))
+
+    def linear(address):
+        res = [item for item in index if item.low <= address < item.high]
+        if not res:
+            raise KeyError(address)
+        return max(res)
+    scanned, elapsed = measure(linear, addresses[:scan])
+    print '{:>8s} {:8d} lookups {:11.3f}s {:11.2f}us/lookup'.format('scanned', len(scanned), elapsed, 1e6 * elapsed / len(scanned))
+
+    if indexed[:len(scanned)] != scanned:
+        raise AssertionError('indexed and scanned lookups found different functions')
@@ -0,0 +1,72 @@
+'''
+Decode random LEB128 integers with elf.base.ULEB128 and elf.base.SLEB128,
+the bulk decoder from their `iterate` method, and the terminatedarray of
+septets that was previously used for them.
+
+The terminatedarray is slow enough that it is only measured for the first
+`scan` integers.
+
+usage: python elf-leb128.py [count] [scan]
+'''
+import sys,time,random
+import ptypes
+from ptypes import pbinary,prov
+from elf import base
+
+class _septets(pbinary.terminatedarray):
+    class septet(pbinary.struct):
+        _fields_ = [
+            (1, 'more'),
+            (7, 'value'),
+        ]
+    _object_ = septet
+    def isTerminator(self, value):
+        return not bool(value['more'])
+    def int(self):
+        res = 0
+        for n in reversed(self):
+            res = (res << 7) | n['value']
+        return res
+
+class septets(pbinary.partial):
+    _object_ = _septets
+    def int(self):
+        return self.object.int()
+
+def instances(t, data, count):
+    start, source, offset, res = time.time(), prov.string(data), 0, []
+    for _ in xrange(count):
+        n = t(offset=offset, source=source).l
+        res.append(n.int())
+        offset += n.size()
+    return res, time.time() - start
+
+def bulk(t, data):
+    start = time.time()
+    res = list(t.iterate(data))
+    return res, time.time() - start
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    scan = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    random.seed(0)
+    values = [random.choice([0x7f, 0x3fff, 0x1fffff, 0xffffffff, 2**64 - 1]) & random.getrandbits(64) for _ in xrange(count)]
+    data = ''.join(base.ULEB128().set(n).serialize() for n in values)
+    print 'encoded {:d} integers into {:d} bytes'.format(count, len(data))
+
+    results = []
+    for name, f in [('ULEB128', lambda: instances(base.ULEB128, data, count)), ('iterate', lambda: bulk(base.ULEB128, data)), ('septets', lambda: instances(septets, data, scan))]:
+        res, elapsed = f()
+        print '{:>8s} {:8d} integers {:11.3f}s {:11.2f}us/integer'.format(name, len(res), elapsed, 1e6 * elapsed / len(res))
+        results.append(res)
+
+    if any(res != values[:len(res)] for res in results):
+        raise AssertionError('decoders returned different integers')
+
+    signed = [n - 2**63 for n in values]
+    data = ''.join(base.SLEB128().set(n).serialize() for n in signed)
+    res, elapsed = bulk(base.SLEB128, data)
+    print '{:>8s} {:8d} integers {:11.3f}s {:11.2f}us/integer'.format('signed', len(res), elapsed, 1e6 * elapsed / len(res))
+    if res != signed:
+        raise AssertionError('signed decoder returned different integers')
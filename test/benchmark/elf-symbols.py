@@ -0,0 +1,41 @@
+'''
+Name every symbol in the symbol tables of an ELF file using the string tables
+that are cached by elf.File, and then by reading each name out of the
+SHT_STRTAB section with ptypes like before.
+
+Reading with ptypes is slow enough that it is only measured for the first
+`scan` symbols of each table.
+
+usage: python elf-symbols.py [path] [scan]
+'''
+import sys,os,time
+import ptypes,elf
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(sys.prefix, 'lib', 'libpython2.7.so.1.0')
+    scan = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    f = elf.File(source=ptypes.prov.file(path, mode='r')).l
+    sections = f['e_data']['e_shoff'].d.li
+    for index in f.symboltables():
+        start = time.time()
+        names = [symbol.name for symbol in f.symbols(index)]
+        elapsed = time.time() - start
+        print '{:>12s} {:8d} symbols {:11.3f}s {:11.2f}us/symbol'.format(sections[index]['sh_name'].str(), len(names), elapsed, 1e6 * elapsed / max(1, len(names)))
+
+        symbols = f.symbols(index)
+        offsets = [symbols.codec.unpack_from(symbols.data, i * symbols.entsize)[0] for i in xrange(min(scan, len(symbols)))]
+        table, start = sections[sections[index]['sh_link'].int()]['sh_offset'].d.li, time.time()
+        scanned = [table.read(offset).str() for offset in offsets]
+        elapsed = time.time() - start
+        print '{:>12s} {:8d} symbols {:11.3f}s {:11.2f}us/symbol'.format('(ptypes)', len(scanned), elapsed, 1e6 * elapsed / max(1, len(scanned)))
+
+        # SHT_STRTAB.read returns the whole string containing an offset, so a
+        # name that shares its suffix with another will only end the result
+        if not all(res.endswith(name) for res, name in zip(scanned, names)):
+            raise AssertionError('cached and ptypes string tables returned different names')
+
+        start = time.time()
+        found = [f.symbol(name, index) for name in names if name]
+        elapsed = time.time() - start
+        print '{:>12s} {:8d} lookups {:11.3f}s {:11.2f}us/lookup'.format('(by name)', len(found), elapsed, 1e6 * elapsed / max(1, len(found)))
@@ -0,0 +1,111 @@
+'''
+Read the sections and symbols of an ELF file into a store, and then restore
+the same store from the cache written by linker.cache. The file is then touched
+to check that it is restored by its sha1 and that its key is updated.
+
+linker.coff can't currently be imported, so this uses elfstore which is only
+defined here. By default, the file is the libpython2.7 of the interpreter.
+
+usage: python linker-cache.py [path] [directory]
+'''
+import sys,os,time,shutil,marshal,tempfile,logging
+import ptypes,elf
+from linker import store,cache
+
+class elfstore(store.base):
+    '''A store containing the allocated sections of an ELF file as its segments'''
+    @classmethod
+    def open(cls, path):
+        result = cls()
+        result.modulename = os.path.basename(path)
+        result.value = elf.File(source=ptypes.prov.file(path, mode='r')).l
+        return result
+
+    def do(self):
+        self.sections = [n for n in self.value['e_data']['e_shoff'].d.li]
+        self.allocated = dict((n['sh_name'].str(), n) for n in self.sections if n['sh_flags']['SHF_ALLOC'] and n['sh_type'].int() != elf.section.SHT_NOBITS.type)
+        for name in self.listsegments():
+            self.add((None, name), self.allocated[name]['sh_addr'].int(), store.LocalScope, name)
+
+        # globals are defined within a segment, and everything else is external
+        self.offsets = dict((name, {}) for name in self.allocated)
+        for index in self.value.symboltables():
+            for symbol in self.value.symbols(index):
+                if not symbol.name or (None, symbol.name) in self.aliases:
+                    continue
+                section = self.sections[symbol.shndx] if 0 < symbol.shndx < len(self.sections) else None
+                segmentname = section['sh_name'].str() if section is not None else None
+                if segmentname in self.allocated:
+                    self.offsets[segmentname][None, symbol.name] = symbol.value - section['sh_addr'].int()
+                    self.add((None, symbol.name), symbol.value, store.GlobalScope, segmentname)
+                elif symbol.shndx == 0:
+                    self.add((None, symbol.name), None, store.ExternalScope, None)
+                continue
+            continue
+        return super(elfstore, self).do()
+
+    def listsegments(self):
+        return sorted(self.allocated, key=lambda name: self.allocated[name]['sh_addr'].int())
+    def getsegmentlength(self, name):
+        return self.allocated[name]['sh_size'].int()
+    def getsegmentprotection(self, name):
+        flags = self.allocated[name]['sh_flags']
+        return 4 | (2 if flags['SHF_WRITE'] else 0) | (1 if flags['SHF_EXECINSTR'] else 0)
+    def getsegment(self, name):
+        section = self.allocated[name]
+        self.value.source.seek(section['sh_offset'].int())
+        return self.value.source.consume(section['sh_size'].int())
+    def loadsymbols(self, name):
+        for symbol, offset in self.offsets[name].iteritems():
+            self[symbol] = offset
+        return set(self.offsets[name])
+
+def contents(st):
+    segments = [(name, st.getsegmentlength(name), st.getsegmentprotection(name), st.getsegment(name)) for name in st.listsegments()]
+    return segments, dict(st.iteritems()), dict((scope, set(names)) for scope, names in st.scope.iteritems())
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(sys.prefix, 'lib', 'libpython2.7.so.1.0')
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp()
+    logging.root.setLevel(logging.WARNING)
+
+    # work on a copy so that it can be touched
+    path = os.path.join(directory, os.path.basename(source))
+    shutil.copyfile(source, path)
+
+    start = time.time()
+    original = cache.fetch(path, directory, lambda: elfstore.open(path).do())
+    ta = time.time() - start
+
+    start = time.time()
+    restored = cache.fetch(path, directory, lambda: elfstore.open(path).do())
+    tb = time.time() - start
+
+    print '{:>8s} {:>12s} {:>12s}'.format('symbols', 'file', 'cache')
+    print '{:8d} {:11.3f}s {:11.3f}s'.format(len(original.aliases), ta, tb)
+    if not isinstance(restored, cache.restored):
+        raise AssertionError('store was not restored from the cache')
+    if contents(original) != contents(restored):
+        raise AssertionError('restored store is different')
+
+    # moving a segment should move the same symbols
+    name = original.listsegments()[-1]
+    original[name] = restored[name] = 0x10000000
+    if dict(original.iteritems()) != dict(restored.iteritems()):
+        raise AssertionError('restored store relocated its symbols differently')
+
+    # touching the file should restore it by its sha1 and then update its key
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 1))
+    start = time.time()
+    touched = cache.fetch(path, directory, lambda: elfstore.open(path).do())
+    tc = time.time() - start
+
+    with open(cache.location(path, directory), 'rb') as f:
+        _, current = marshal.load(f)[:2]
+    print '{:>8s} {:>12s}'.format('', 'touched')
+    print '{:8s} {:11.3f}s'.format('', tc)
+    if not isinstance(touched, cache.restored):
+        raise AssertionError('touched store was not restored from the cache')
+    if current != cache.key(path, current) or current[2] != os.stat(path).st_mtime:
+        raise AssertionError('key of the touched store was not updated')
@@ -0,0 +1,101 @@
+'''
+Link a synthetic library of many objects by relocating each segment with
+container.relocatesegment, and then with container.link within the current
+process. If a number of processes is given, container.link is also measured
+with a pool of that many workers.
+
+The objects are store.base members with a plain 32-bit fixup relocator rather
+than real COFF objects. Each of these relocations is cheap compared to pickling
+a segment for a worker, so the pool is expected to be slower here.
+
+usage: python linker-link.py [objects] [relocations] [processes]
+'''
+import sys,time,random,struct,array,logging
+import linker
+from linker import store
+
+class fixups(object):
+    '''Relocate each 32-bit field by the value of the symbol that it references'''
+    def __init__(self, relocations):
+        self.relocations = relocations
+        self.symbols = sorted(set(name for _, name in relocations))
+
+    def __call__(self, data, namespace):
+        data = array.array('c', data)
+        for offset, name in self.relocations:
+            value, = struct.unpack_from('<L', data, offset)
+            struct.pack_into('<L', data, offset, (value + namespace[name]) & 0xffffffff)
+        return data.tostring()
+
+class member(store.base):
+    '''An object with a .text segment that exports functions and references the functions of the other objects'''
+    def __init__(self, index, count, relocations, size):
+        super(member, self).__init__()
+        self.modulename = 'object{:d}.obj'.format(index)
+        self.size, rng = size, random.Random(index)
+        self.data = ''.join(chr(rng.randrange(0x100)) for _ in xrange(size))
+        self.functions = dict(((None, 'function{:d}_{:d}'.format(index, i)), rng.randrange(0, size, 0x10)) for i in xrange(8))
+        externals = [(None, 'function{:d}_{:d}'.format(rng.randrange(count), rng.randrange(8))) for _ in xrange(16)]
+        externals = [name for name in externals if name not in self.functions]
+        self.relocations = [(rng.randrange(0, size - 4), rng.choice(externals + self.functions.keys() + [(None, '.text')])) for _ in xrange(relocations)]
+
+        self.add((None, '.text'), None, store.LocalScope, '.text')
+        for name in self.functions:
+            self.add(name, 0, store.GlobalScope, '.text')
+        for name in set(externals):
+            self.add(name, None, store.ExternalScope, None)
+        self.do()
+
+    def listsegments(self):
+        return ['.text']
+    def getsegmentlength(self, name):
+        return self.size
+    def getsegment(self, name):
+        return self.data
+    def loadsymbols(self, name):
+        for symbol, offset in self.functions.iteritems():
+            self[symbol] = offset
+        return set(self.functions)
+    def getrelocator(self, name):
+        return fixups(self.relocations)
+    def relocatesegment(self, name, data):
+        return fixups(self.relocations)(data, self)
+
+def library(count, relocations):
+    result = linker.new()
+    for index in xrange(count):
+        result.addstore(member(index, count, relocations, 0x4000))
+    result[store.BaseAddress] = 0x10000000
+    return result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    relocations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    logging.root.setLevel(logging.INFO)
+
+    st = library(count, relocations)
+    st.link()
+
+    start = time.time()
+    serial = dict((name, st.relocatesegment(name, st.getsegment(name))) for name in st.listsegments())
+    ta = time.time() - start
+
+    start = time.time()
+    current = st.link()
+    tb = time.time() - start
+
+    print '{:>8s} {:>12s} {:>12s} {:>12s}'.format('objects', 'relocations', 'serial', 'link')
+    print '{:8d} {:12d} {:11.3f}s {:11.3f}s'.format(count, count * relocations, ta, tb)
+    if serial != current:
+        raise AssertionError('linked segments are different')
+
+    if processes:
+        start = time.time()
+        pooled = st.link(processes=processes)
+        tc = time.time() - start
+
+        print '{:>8s} {:>12s}'.format('processes', 'pool')
+        print '{:9d} {:11.3f}s'.format(processes, tc)
+        if serial != pooled:
+            raise AssertionError('linked segments are different')
@@ -0,0 +1,55 @@
+'''
+Compare the time it takes to merge the symbols of one symboltable into another
+using the original per-symbol merge against symboltable.merge.
+
+usage: python linker-merge.py [count]
+'''
+import sys,time,random,logging
+from linker import store
+
+def legacy(self, st, symbolnames):
+    '''The original implementation of symboltable.merge which scans each alias for every symbol'''
+    symbolnames = set(self._symboltable__alias_expand(symbolnames))
+    key2alias = lambda t, names: dict((key, tuple(name for name,x in t.aliases.iteritems() if x == t.aliases[key])) for key in names)
+    values = dict((st.aliases[key], dict.__getitem__(st, st.aliases[key])) for key in symbolnames)
+    store_aliases = key2alias(st, symbolnames)
+    for n in symbolnames.difference(self.viewkeys()):
+        self._symboltable__setitem__direct(n, None)
+    local_aliases = key2alias(self, symbolnames)
+    for ln in symbolnames:
+        id = self.aliases[ln]
+        module,symbolname = ln
+        sn = ([module,None][module==st.modulename],symbolname)
+        dict.__setitem__(self, id, values[st.aliases[sn]])
+        self._symboltable__hooks[id](self, ln)
+        a,b = set(local_aliases[ln]),set(store_aliases[sn])
+        [ self.alias(x,ln) for x in b ]
+        [ self.unalias(x) for x in b.difference(a) ]
+    return symbolnames
+
+def tables(count):
+    random.seed(0)
+    names = ['symbol_{:d}'.format(i) for i in xrange(count)]
+    source, target, calls = store.symboltable(), store.symboltable(), []
+    for name in names:
+        source[name] = random.randrange(0x400000, 0x800000)
+    for name in names[::2]:
+        target[name] = None
+        target.hook(name, lambda st, n: calls.append(n))
+    return source, target, names, calls
+
+def measure(merge, count):
+    source, target, names, calls = tables(count)
+    start = time.time()
+    merge(target, source, names)
+    return (dict(target.iteritems()), sorted(calls)), time.time() - start
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logging.root.setLevel(logging.INFO)
+
+    (a, ta), (b, tb) = measure(legacy, count), measure(store.symboltable.merge, count)
+    print '{:>8s} {:>12s} {:>12s}'.format('symbols', 'legacy', 'merge')
+    print '{:8d} {:11.3f}s {:11.3f}s'.format(count, ta, tb)
+    if a != b:
+        raise AssertionError('merged symboltables are different')
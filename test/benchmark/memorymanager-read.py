@@ -0,0 +1,71 @@
+'''
+Compare the time it takes to write and read pages with the LinuxLocal allocator
+using the original per-character copies against ctypes.memmove/string_at, and
+the time it takes to produce bytes one at a time the way instrument.lift does
+using a read per byte against MemoryManager.iterate.
+
+usage: python memorymanager-read.py [pages] [rounds]
+'''
+import sys,time,random,itertools,ctypes
+import memorymanager
+from memorymanager import allocator
+
+def legacy_read(address, length):
+    '''The original implementation of allocator.Local.read'''
+    p = ctypes.cast(ctypes.c_void_p(address), ctypes.POINTER(ctypes.c_char*length))
+    return ''.join(p.contents)
+
+def legacy_write(address, value):
+    '''The original implementation of allocator.Local.write'''
+    length = len(value)
+    p = ctypes.cast(ctypes.c_void_p(address), ctypes.POINTER(ctypes.c_char*length))
+    for i,c in zip(xrange(length), str(value)):
+        p.contents[i] = c
+    return True
+
+def legacy_producer(address, mm):
+    '''The original byte producer used by instrument.lift'''
+    while True:
+        yield mm.read(address, 1)
+        address += 1
+    return
+
+def measure(name, callable, *args):
+    start = time.time()
+    result = callable(*args)
+    print '{:>24s} {:10.3f}s'.format(name, time.time() - start)
+    return result
+
+if __name__ == '__main__':
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 0x40
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    random.seed(0)
+    mm = memorymanager.new(allocator.LinuxLocal())
+    pagesize = mm.allocator.getPageSize()
+    size = pages * pagesize
+    data = ''.join(chr(random.randrange(0x100)) for _ in xrange(size))
+    pointer = mm.load(size)
+
+    def writes(write):
+        for _ in xrange(rounds):
+            write(pointer, data)
+        return True
+
+    def reads(read):
+        return [read(pointer, size) for _ in xrange(rounds)]
+
+    def bytes(producer):
+        return ''.join(itertools.islice(producer, size))
+
+    measure('legacy write', writes, legacy_write)
+    a = measure('legacy read', reads, legacy_read)
+    measure('memmove write', writes, mm.write)
+    b = measure('string_at read', reads, mm.read)
+    c = measure('legacy producer', bytes, legacy_producer(pointer, mm))
+    d = measure('iterate', bytes, mm.iterate(pointer))
+    e = mm.view(pointer, size).tobytes()
+
+    if any(item != data for item in a + b + [c, d, e]):
+        raise AssertionError('the data that was read is different from what was written')
+    mm.unload(pointer)
@@ -0,0 +1,52 @@
+'''
+Perform a mix of allocations and frees of random sizes with a
+memorymanager.Managed using the LinuxLocal allocator, and then verify that
+none of the allocations that are still live overlap.
+
+usage: python memorymanager-slab.py [operations] [live]
+'''
+import sys,time,random
+import memorymanager
+from memorymanager import allocator
+
+SIZES = [8, 16, 24, 40, 64, 100, 200, 500, 1000, 1500, 3000, 9000]
+
+if __name__ == '__main__':
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    random.seed(0)
+    mm = memorymanager.new(allocator.LinuxLocal())
+    live, pointers = {}, []
+
+    start = time.time()
+    for _ in xrange(operations):
+        if pointers and (len(pointers) >= limit or random.random() < 0.5):
+            index = random.randrange(len(pointers))
+            pointers[index], pointers[-1] = pointers[-1], pointers[index]
+            pointer = pointers.pop()
+            mm.free(pointer)
+            del(live[pointer])
+            continue
+        size = random.choice(SIZES)
+        pointer = mm.alloc(size)
+        if pointer in live:
+            raise AssertionError('pointer {:#x} was allocated twice'.format(pointer))
+        live[pointer] = size
+        pointers.append(pointer)
+    elapsed = time.time() - start
+
+    statistics = mm.statistics()
+    print '{:>10s} {:>8s} {:>8s} {:>8s} {:>12s} {:>12s}'.format('operations', 'live', 'arenas', 'pages', 'elapsed', 'fragmented')
+    print '{:10d} {:8d} {:8d} {:8d} {:11.3f}s {:11.1f}%'.format(operations, len(live), statistics['arenas'], statistics['pages'], elapsed, 100.0 * statistics['fragmentation'])
+
+    items = sorted(live.iteritems())
+    for (a, size), (b, _) in zip(items[:-1], items[1:]):
+        if a + size > b:
+            raise AssertionError('allocation at {:#x} overlaps the one at {:#x}'.format(a, b))
+        continue
+
+    for pointer in pointers:
+        mm.free(pointer)
+    if mm.statistics()['live'] != 0:
+        raise AssertionError('memory is still allocated after freeing everything')
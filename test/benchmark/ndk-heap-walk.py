@@ -0,0 +1,71 @@
+'''
+Compare the time it takes to walk the chunks of a heap segment using
+_HEAP_SEGMENT.Chunks, which creates and loads each chunk, against
+_HEAP_SEGMENT.Walk. The heap is a synthetic 32-bit Windows 7 heap whose
+entries are encoded, and it is saved to a file that is read with the file
+provider. If a filename is given, the heap is saved to it and kept.
+
+usage: python ndk-heap-walk.py [count] [filename]
+'''
+import sys,os,time,random,struct,tempfile
+import ptypes
+from ndk import heaptypes
+
+MASK, KEYS = 0x100000, (0x3a5c9e7f, 0x1b2d4c6e)
+
+def heap(count):
+    '''Return the data of a heap containing count chunks'''
+    random.seed(0)
+    res = heaptypes._HEAP().a
+    first = (res.size() + 7) & ~7
+
+    chunks, previous = [], 0
+    for index in xrange(count):
+        units, busy = random.randrange(2, 0x40), random.choice((0, 1))
+        d1 = units | (busy << 16)
+        checksum = map(ord, struct.pack('<L', d1))
+        d1 |= (checksum[0] ^ checksum[1] ^ checksum[2]) << 24
+        d2 = previous | (busy << 27)
+        chunks.append(struct.pack('<LL', d1 ^ KEYS[0], d2 ^ KEYS[1]) + '\xcc' * (units * 8 - 8))
+        previous = units
+    data = ''.join(chunks)
+
+    res['Segment']['FirstEntry'].set(first)
+    res['Segment']['LastValidEntry'].set(first + len(data))
+    res['EncodeFlagMask'].set(MASK)
+    res['Encoding']['Keys'].set(KEYS)
+    header = res.serialize()
+    return header + '\0' * (first - len(header)) + data
+
+def chunks(segment):
+    result = []
+    for chunk in segment.Chunks():
+        header = chunk['Header']
+        result.append((chunk.getoffset(), header.Size(), ord(header.d.li.serialize()[7]), chunk.BusyQ()))
+    return result
+
+def measure(name, callable, *args):
+    start = time.time()
+    result = callable(*args)
+    print '{:>24s} {:10.3f}s'.format(name, time.time() - start)
+    return result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    filename = sys.argv[2] if len(sys.argv) > 2 else None
+
+    fd, path = tempfile.mkstemp(suffix='.heap') if filename is None else (None, filename)
+    with (os.fdopen(fd, 'wb') if fd is not None else open(path, 'wb')) as f:
+        f.write(heap(count))
+
+    try:
+        source = ptypes.prov.file(path, mode='rb')
+        segment = heaptypes._HEAP(source=source).l['Segment']
+        a = measure('Chunks', chunks, segment)
+        b = measure('Walk', list, segment.Walk())
+        if a != b or len(b) != count:
+            raise AssertionError('the chunks that were walked are different')
+        if segment.Chunk(b[-1][0]).l['Header'].Size() != b[-1][1]:
+            raise AssertionError('the chunk at {:#x} is different'.format(b[-1][0]))
+    finally:
+        filename is None and os.unlink(path)
@@ -0,0 +1,86 @@
+'''
+Compare the time it takes to look up the loader modules of a process by
+address and by name by walking the InLoadOrderModuleList of PEB.Ldr for
+each lookup, against the module map that PEB_LDR_DATA builds from a single
+walk of the list. The PEB and the loader data belong to a synthetic 32-bit
+Windows 7 process that is read with provider.snapshot.
+
+usage: python ndk-peb-modules.py [modules] [lookups]
+'''
+import sys,time,random,struct
+import ptypes
+from ptypes import provider
+from ndk import pstypes
+
+PEB, LDR, ENTRIES = 0x7ffd0000, 0x1000, 0x20000
+
+def process(count):
+    '''Return the regions of a process with count modules in its loader list'''
+    random.seed(0)
+    bases = [0x10000000 + index * 0x100000 for index in xrange(count)]
+    random.shuffle(bases)
+
+    head, entries = LDR + 12, []
+    for index, base in enumerate(bases):
+        address = ENTRIES + index * 0x100
+        flink = ENTRIES + (index + 1) * 0x100 if index + 1 < count else head
+        blink = ENTRIES + (index - 1) * 0x100 if index > 0 else head
+        name = 'module{:03d}.dll'.format(index).encode('utf-16-le')
+        fullname = 'C:\\Windows\\System32\\module{:03d}.dll'.format(index).encode('utf-16-le')
+
+        entry = struct.pack('<LL16xLLLHHLHHL', flink, blink, base, 0, 0x80000, len(fullname), len(fullname), address + 0x98, len(name), len(name), address + 0x78)
+        entry += '\0' * (0x78 - len(entry)) + name
+        entry += '\0' * (0x98 - len(entry)) + fullname
+        entries.append(entry + '\0' * (0x100 - len(entry)))
+
+    peb = '\0' * 12 + struct.pack('<L', LDR) + '\0' * 0x240
+    ldr = struct.pack('<LL4xLL', 0x30, 1, ENTRIES, ENTRIES + (count - 1) * 0x100) + '\0' * 0x20
+    return [(PEB, peb), (LDR, ldr), (ENTRIES, ''.join(entries))], bases
+
+def getmodulebyaddress(peb, address):
+    ldr = peb['Ldr'].d.l
+    for m in ldr.walk():
+        start,size = m['DllBase'].int(),m['SizeOfImage'].int()
+        if start <= address < start + size:
+            return m
+        continue
+    raise KeyError(address)
+
+def getmodulebyname(peb, name):
+    ldr = peb['Ldr'].d.l
+    for m in ldr.walk():
+        if m['BaseDllName'].str() == name:
+            return m
+        continue
+    raise KeyError(name)
+
+def lookups(peb, addresses, names, byaddress, byname):
+    result = []
+    for address, name in zip(addresses, names):
+        result.append((byaddress(peb, address).getoffset(), byname(peb, name).getoffset()))
+    return result
+
+def measure(name, callable, *args):
+    start = time.time()
+    result = callable(*args)
+    print '{:>24s} {:10.3f}s'.format(name, time.time() - start)
+    return result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    regions, bases = process(count)
+    source = provider.snapshot(regions)
+    peb = pstypes.PEB(offset=PEB, source=source).l
+
+    random.seed(1)
+    addresses = [random.choice(bases) + random.randrange(0x80000) for _ in xrange(total)]
+    names = ['module{:03d}.dll'.format(random.randrange(count)) for _ in xrange(total)]
+
+    a = measure('walk', lookups, peb, addresses, names, getmodulebyaddress, getmodulebyname)
+    b = measure('module map', lookups, peb, addresses, names, pstypes.PEB.getmodulebyaddress, pstypes.PEB.getmodulebyname)
+    if a != b:
+        raise AssertionError('the modules that were found are different')
+    if peb.getmodulebyfullname('c:/windows/system32/MODULE000.DLL').getoffset() != ENTRIES:
+        raise AssertionError('the module for the full name is different')
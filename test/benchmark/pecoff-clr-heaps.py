@@ -0,0 +1,63 @@
+'''
+Compare the time it takes to resolve names and blobs from synthetic #Strings and
+#Blob heaps using the original heaps, which load each of their objects and then
+search them for the one at an offset, against decoding each object at its offset
+from the data of the heap. The objects are then resolved again from the cache of
+the heap. Most of the time of a lookup that misses the cache is spent creating the
+object and its fields, rather than reading it.
+
+usage: python pecoff-clr-heaps.py [count] [lookups]
+'''
+import sys,time,random
+import ptypes
+from ptypes import parray,dyn
+from pecoff.portable import clr
+
+class legacy(parray.block):
+    '''The original implementation of each heap'''
+    def Get(self, offset):
+        return self.field(offset)
+
+def heaps(count):
+    '''Return the data for a #Strings and a #Blob heap with count objects, and the offset of each object'''
+    random.seed(0)
+    strings, blobs = ['\0'], ['\0']
+    for index in xrange(count):
+        strings.append('Name{:d}_{:s}\0'.format(index, 'x' * random.randrange(16)))
+        data = ''.join(chr(random.randrange(0x100)) for _ in xrange(random.randrange(1, 0x100)))
+        blobs.append((chr(len(data)) if len(data) < 0x80 else chr(0x80 | len(data) >> 8) + chr(len(data) & 0xff)) + data)
+    return ''.join(strings), positions(strings), ''.join(blobs), positions(blobs)
+
+def positions(items):
+    result, offset = [], 0
+    for item in items:
+        result.append(offset)
+        offset += len(item)
+    return result[1:]
+
+def load(t, data):
+    return dyn.clone(t, blocksize=lambda s, cb=len(data): cb)(source=ptypes.prov.string(data)).l
+
+def resolve(strings, blobs, names, signatures):
+    return [strings.Get(offset).str() for offset in names], [blobs.Get(offset)['data'].serialize() for offset in signatures]
+
+def measure(name, callable, *args):
+    start = time.time()
+    result = callable(*args)
+    print '{:>24s} {:10.3f}s'.format(name, time.time() - start)
+    return result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    strings, names, blobs, signatures = heaps(count)
+    names, signatures = [random.choice(names) for _ in xrange(total)], [random.choice(signatures) for _ in xrange(total)]
+
+    a = measure('legacy', lambda: resolve(load(dyn.clone(legacy, _object_=clr.HStrings._object_), strings), load(dyn.clone(legacy, _object_=clr.HBlob._object_), blobs), names, signatures))
+    h, s = load(clr.HStrings, strings), load(clr.HBlob, blobs)
+    b = measure('heap', resolve, h, s, names, signatures)
+    d = measure('heap cached', resolve, h, s, names, signatures)
+    c = measure('raw', lambda: ([h.String(offset) for offset in names], [s.Data(offset) for offset in signatures]))
+    if not (a == b == c == d):
+        raise AssertionError('the objects that were resolved are different')
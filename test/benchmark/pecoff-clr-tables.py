@@ -0,0 +1,77 @@
+'''
+Compare the time it takes to load the tables of a synthetic #~ stream and then
+decode a sample of their rows using the original tables, whose columns each look
+up their width in HTables, against the rows that are laid out by HTables.Layout.
+
+usage: python pecoff-clr-tables.py [rows] [sample]
+'''
+import sys,time,random,struct
+import ptypes
+from ptypes import ptype,parray,dyn
+from pecoff.portable import clr
+
+class TableRow(ptype.encoded_t):
+    '''The original type of each row of a table'''
+    def __getitem__(self, name):
+        return self.d.li.__getitem__(name)
+
+class legacy(parray.type):
+    '''The original implementation of clr.Tables'''
+    length = 64
+    def _object_(self):
+        res = self.getparent(clr.HTables)
+        index, lengths = len(self.value), res['Rows'].li
+        count = lengths[index].int()
+        rowtype = clr.Table.withdefault(index, type=index)
+        rowsize = rowtype.PreCalculateSize(res) if clr.Table.has(index) else 0
+        t = dyn.clone(TableRow, _object_=rowtype, _value_=dyn.block(rowsize))
+        return dyn.array(t, count, blocksize=(lambda s, cb=rowsize*count: cb))
+
+TABLES = ['TypeRef', 'TypeDef', 'Field', 'MethodDef', 'Param', 'InterfaceImpl', 'MemberRef', 'CustomAttribute']
+
+def stream(count):
+    '''Return the data for a #~ stream with a random number of rows of random data in each of TABLES'''
+    random.seed(0)
+    counts = dict((clr.TableType.byname(name), random.randrange(count // 2, count)) for name in TABLES)
+    indices = sorted(counts)
+    header = struct.pack('<LBBBBQQ', 0, 2, 0, 0x01, 1, sum(1 << index for index in indices), 0)
+    header += struct.pack('<{:d}L'.format(len(indices)), *(counts[index] for index in indices))
+
+    heapsizes, rows = {'HStrings' : 1, 'HGUID' : 0, 'HBlob' : 0}, [counts.get(index, 0) for index in xrange(64)]
+    size = sum(sum(clr.Table.lookup(index).Columns(rows, heapsizes)) * counts[index] for index in indices)
+    return header + ''.join(chr(random.randrange(0x100)) for _ in xrange(size))
+
+def load(data, tables):
+    hdr = clr.StreamHdr().set(Size=len(data), Name='#~')
+    t = dyn.clone(clr.HTables, _fields_=[(tables if name == 'Tables' else t, name) for t, name in clr.HTables._fields_])
+    return t(parent=hdr, source=ptypes.prov.string(data)).l
+
+def decode(htables, sample):
+    '''Decode each column of the rows in sample which is a list of (table, index)'''
+    result = []
+    for table, index in sample:
+        row = htables['Tables'][table][index]
+        row = row.d.li if isinstance(row, TableRow) else row
+        result.append([row[name].Index() if isinstance(row[name], clr.TaggedIndex) else row[name].serialize() for _, name in row._fields_])
+    return result
+
+def measure(name, callable, *args):
+    start = time.time()
+    result = callable(*args)
+    print '{:>24s} {:10.3f}s'.format(name, time.time() - start)
+    return result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    data = stream(count)
+
+    a, b = measure('legacy load', load, data, legacy), measure('layout load', load, data, clr.Tables)
+    sample = [(table, random.randrange(len(b['Tables'][table]))) for table in random.sample([t for t in xrange(64) if len(b['Tables'][t])] * total, total)]
+    if measure('legacy decode', decode, a, sample) != measure('layout decode', decode, b, sample):
+        raise AssertionError('the rows that were decoded are different')
+
+    table = b['Tables']['MethodDef']
+    rva, name = measure('columns', table.columns, 'RVA', 'Name')
+    if [(rva[index], name[index]) for index in xrange(0, len(table), 97)] != [(table[index]['RVA'].int(), table[index]['Name'].int()) for index in xrange(0, len(table), 97)]:
+        raise AssertionError('the columns that were unpacked are different')
@@ -0,0 +1,47 @@
+'''
+Compare translating random addresses and offsets of an executable into their
+IMAGE_SECTION_HEADER by visiting each section against the interval index used
+by SectionTableArray.
+
+usage: python pecoff-sections.py [path] [count]
+'''
+import sys,os,time,random
+import ptypes,pecoff
+
+def linear(sections, method, points):
+    start = time.time()
+    res = []
+    for point in points:
+        items = [n for n in sections if getattr(n, method)(point)]
+        res.append(items[0].getoffset() if items else None)
+    return res, time.time() - start
+
+def indexed(sections, method, points):
+    start = time.time()
+    res = []
+    for point in points:
+        try:
+            res.append(getattr(sections, method)(point).getoffset())
+        except KeyError:
+            res.append(None)
+        continue
+    return res, time.time() - start
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(sys.prefix, 'lib', 'python2.7', 'site-packages', 'pip', '_vendor', 'distlib', 't32.exe')
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    z = pecoff.Executable.File(source=ptypes.prov.file(path, mode='r')).l
+    sections = z['Next']['Header']['Sections']
+    limit = max(n['VirtualAddress'].int() + n.getloadedsize() for n in sections)
+
+    random.seed(0)
+    points = [random.randrange(0, limit + 0x1000) for _ in xrange(count)]
+
+    print '{:>8s} {:>12s} {:>12s}'.format('query', 'linear', 'indexed')
+    for name, (contains, method) in [('address', ('containsaddress', 'getsectionbyaddress')), ('offset', ('containsoffset', 'getsectionbyoffset'))]:
+        (a, ta), (b, tb) = linear(sections, contains, points), indexed(sections, method, points)
+        print '{:>8s} {:11.3f}s {:11.3f}s'.format(name, ta, tb)
+        if a != b:
+            raise AssertionError('section lookups by {:s} returned different results'.format(name))
+        continue
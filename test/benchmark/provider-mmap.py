@@ -0,0 +1,38 @@
+'''
+Compare provider.file against provider.mmap by loading individual integers
+from random offsets of a file, and then by loading a large array from it.
+
+usage: python provider-mmap.py [path] [count]
+'''
+import sys,os,time,random
+import ptypes
+from ptypes import pint,parray,dynamic,provider
+
+def fields(source, offsets):
+    start = time.time()
+    res = [pint.uint32_t(offset=offset, source=source).l.int() for offset in offsets]
+    return res, time.time() - start
+
+def array(source, count):
+    start = time.time()
+    res = dynamic.array(pint.uint32_t, count)(source=source).l
+    return res.serialize(), time.time() - start
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(sys.prefix, 'lib', 'python2.7', 'distutils', 'command', 'wininst-9.0-amd64.exe')
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    size = os.stat(path).st_size
+    random.seed(0)
+    offsets = [random.randrange(0, size - 4) for _ in xrange(count)]
+
+    print '{:>8s} {:>12s} {:>12s}'.format('source', 'fields', 'array')
+    results = []
+    for name, source in [('file', provider.file(path, mode='r')), ('mmap', provider.mmap(path))]:
+        (a, ta), (b, tb) = fields(source, offsets), array(source, size // 4)
+        print '{:>8s} {:11.3f}s {:11.3f}s'.format(name, ta, tb)
+        results.append((a, b))
+        source.close()
+
+    if any(item != results[0] for item in results[1:]):
+        raise AssertionError('providers returned different results')
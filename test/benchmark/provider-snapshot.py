@@ -0,0 +1,89 @@
+'''
+Compare the time it takes to read from a snapshot of some memory regions
+using provider.snapshot, which bisects a sorted index of the regions,
+against a provider that searches each region in order. The regions are
+saved as the Memory64ListStream of a synthetic minidump, and a synthetic
+heap is placed before them so that it can be walked from the snapshot.
+
+usage: python provider-snapshot.py [regions] [reads]
+'''
+import sys,os,time,random,struct,tempfile
+import ptypes
+from ptypes import provider
+from ndk import heaptypes
+
+class linear(provider.base):
+    '''The regions are searched in order for every read'''
+    offset = 0
+    def __init__(self, regions):
+        self.regions = [(base, data) for base, data in regions]
+    def seek(self, offset):
+        res, self.offset = self.offset, offset
+        return res
+    def consume(self, amount):
+        for base, data in self.regions:
+            if base <= self.offset < base + len(data):
+                res = data[self.offset - base : self.offset - base + amount]
+                self.offset += len(res)
+                return res
+            continue
+        raise ptypes.error.ConsumeError(self, self.offset, amount)
+
+def regions(count, heap):
+    '''Return count pages at random addresses with the heap placed before them'''
+    random.seed(0)
+    bases = sorted(random.sample(xrange(0x10, 0x7fff0), count))
+    result = [(base * 0x1000, os.urandom(0x1000)) for base in bases]
+    return [(0, heap)] + result
+
+def minidump(regions):
+    '''Return the data of a minidump containing the regions in a Memory64ListStream'''
+    header = struct.pack('<4sLLL', 'MDMP', 0xa793, 1, 16)
+    directory = struct.pack('<LLL', 9, 16 + 16 * len(regions), 28)
+    stream = struct.pack('<QQ', len(regions), 28 + 16 + 16 * len(regions))
+    stream += ''.join(struct.pack('<QQ', base, len(data)) for base, data in regions)
+    return header + directory + stream + ''.join(data for _, data in regions)
+
+def reads(source, addresses):
+    result = []
+    for address in addresses:
+        source.seek(address)
+        result.append(source.consume(8))
+    return result
+
+def measure(name, callable, *args):
+    start = time.time()
+    result = callable(*args)
+    print '{:>24s} {:10.3f}s'.format(name, time.time() - start)
+    return result
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    # reuse the synthetic heap from the heap walk benchmark
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    heap = __import__('ndk-heap-walk').heap(500)
+    items = regions(count, heap)
+
+    fd, path = tempfile.mkstemp(suffix='.dmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(minidump(items))
+
+    try:
+        source = provider.snapshot.minidump(path)
+        random.seed(1)
+        addresses = [random.choice(items[1:])[0] + random.randrange(0x1000 - 8) for _ in xrange(total)]
+        a = measure('linear', reads, linear(items), addresses)
+        b = measure('snapshot', reads, source, addresses)
+        if a != b:
+            raise AssertionError('the data that was read is different')
+
+        segment = heaptypes._HEAP(source=source).l['Segment']
+        c = measure('snapshot walk', list, segment.Walk())
+        d = list(heaptypes._HEAP(source=ptypes.prov.string(heap)).l['Segment'].Walk())
+        if c != d or len(c) != 500:
+            raise AssertionError('the chunks that were walked are different')
+        source.close()
+    finally:
+        os.unlink(path)
@@ -0,0 +1,42 @@
+'''
+Decode IMAGE_SECTION_HEADER structures from a block of memory, both with the
+struct codec that pstruct.type compiles for structures whose fields are all
+of a fixed size and by loading each field individually like before. Each
+header is loaded, one of its fields is decoded, and then it is serialized.
+
+Loading each field individually is slow enough that it is only measured for
+the first `fields` headers.
+
+usage: python pstruct-compiled.py [count] [fields]
+'''
+import sys,time,struct
+import ptypes,pecoff
+from ptypes import provider
+from pecoff.portable.headers import IMAGE_SECTION_HEADER
+
+def decode(source, count, size):
+    start = time.time()
+    res = []
+    for index in xrange(count):
+        header = IMAGE_SECTION_HEADER(offset=index * size, source=source).l
+        res.append((header['VirtualSize'].int(), header.serialize()))
+    return res, time.time() - start
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    fields = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    size = IMAGE_SECTION_HEADER().a.size()
+    data = str().join(struct.pack('<8sLLLLLLHHL', '.s{:06x}'.format(index % 0x1000000), index * 0x10, index * 0x1000, 0x200, index * 0x200, 0, 0, 0, 0, 0x60000020) for index in xrange(count))
+    source = provider.string(data)
+
+    ptypes.Config.pstruct.compiled = True
+    compiled, elapsed = decode(source, count, size)
+    print '{:>8s} {:8d} headers {:11.3f}s {:11.2f}us/header'.format('compiled', count, elapsed, 1e6 * elapsed / count)
+
+    ptypes.Config.pstruct.compiled = False
+    individual, elapsed = decode(source, min(count, fields), size)
+    print '{:>8s} {:8d} headers {:11.3f}s {:11.2f}us/header'.format('fields', len(individual), elapsed, 1e6 * elapsed / len(individual))
+
+    if compiled[:len(individual)] != individual:
+        raise AssertionError('compiled and individually loaded headers decoded differently')
@@ -0,0 +1,43 @@
+'''
+Resolve random offsets within a loaded pecoff.Executable.File using
+ptype.container.at, both with the offsets that are indexed by each container
+and by scanning each container's elements like before.
+
+Scanning is slow enough that it is only measured for the first `scan` offsets.
+
+usage: python ptypes-at.py [path] [count] [scan]
+'''
+import sys,os,time,random
+import ptypes,pecoff
+from ptypes import ptype
+
+def measure(f, offsets):
+    start = time.time()
+    res = [f.at(offset) for offset in offsets]
+    return res, time.time() - start
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(sys.prefix, 'lib', 'python2.7', 'distutils', 'command', 'wininst-9.0-amd64.exe')
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    scan = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    start = time.time()
+    f = pecoff.Executable.File(source=ptypes.prov.file(path, mode='r')).l
+    print 'loaded {:s} ({:d} bytes) in {:.3f}s'.format(path, f.size(), time.time() - start)
+
+    random.seed(0)
+    offsets = [random.randrange(f.getoffset(), f.getoffset() + f.size()) for _ in xrange(count)]
+
+    indexed, elapsed = measure(f, offsets)
+    print '{:>8s} {:8d} offsets {:11.3f}s {:11.2f}us/offset'.format('indexed', count, elapsed, 1e6 * elapsed / count)
+
+    # disable the index so that .at falls back to scanning every element
+    getposition, ptype.container.__getposition__ = ptype.container.__getposition__, lambda self, offset: None
+    try:
+        scanned, elapsed = measure(f, offsets[:scan])
+    finally:
+        ptype.container.__getposition__ = getposition
+    print '{:>8s} {:8d} offsets {:11.3f}s {:11.2f}us/offset'.format('scanned', len(scanned), elapsed, 1e6 * elapsed / len(scanned))
+
+    if any(a is not b for a, b in zip(indexed, scanned)):
+        raise AssertionError('indexed and scanned lookups resolved to different elements')
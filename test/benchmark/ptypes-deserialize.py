@@ -0,0 +1,53 @@
+'''
+Compare deserializing a large parray.type of pint.uint32_t using the original
+copying implementation of ptype.container.__deserialize_block__ against the
+view-based one. The load columns include the time it takes to create each
+element, whereas the block columns only measure deserializing the elements
+that were already created.
+
+usage: python ptypes-deserialize.py [count...]
+'''
+import sys,time
+import ptypes
+from ptypes import ptype,parray,pint,provider
+
+class copying(parray.type):
+    '''parray.type that deserializes its elements by re-slicing the block for each element'''
+    _object_ = pint.uint32_t
+
+    def __deserialize_block__(self, block):
+        value, expected, bs, total = self.value[:], self.blocksize(), 0, 0
+        while value and total < expected:
+            res = value.pop(0)
+            bs = res.blocksize()
+            res.__deserialize_block__(block[:bs])
+            block = block[bs:]
+            total += bs
+        return self
+
+class viewing(parray.type):
+    '''parray.type that uses ptype.container.__deserialize_block__'''
+    _object_ = pint.uint32_t
+
+def measure(t, count, data):
+    source = provider.string(data)
+
+    # time loading the array from the provider
+    start = time.time()
+    res = t(length=count, source=source).l
+    load = time.time() - start
+    if res[count-1].int() != count-1:
+        raise AssertionError('{:s} : unexpected value at index {:d}'.format(t.__name__, count-1))
+
+    # time deserializing the elements by themselves
+    start = time.time()
+    res.__deserialize_block__(data)
+    return load, time.time() - start
+
+if __name__ == '__main__':
+    counts = map(int, sys.argv[1:]) or [1000, 10000, 50000, 200000]
+    print '{:>8s} {:>12s} {:>12s} {:>12s} {:>12s}'.format('count', 'load/copy', 'load/view', 'block/copy', 'block/view')
+    for count in counts:
+        data = str().join(pint.uint32_t().set(i).serialize() for i in xrange(count))
+        (la, da), (lb, db) = (measure(t, count, data) for t in (copying, viewing))
+        print '{:8d} {:11.3f}s {:11.3f}s {:11.3f}s {:11.3f}s'.format(count, la, lb, da, db)